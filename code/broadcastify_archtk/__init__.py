@@ -19,7 +19,7 @@
 # contains archive entry information for the date selected in the navigation
 # calendar
 
-from .btk import BroadcastifyArchive
+from .btk import BroadcastifyArchive, BroadcastifyArchiveSet, MetricsRegistry
 
 __version__ = '1.0.2'
 __license__ = 'GNU Affero General Public License v3.0'
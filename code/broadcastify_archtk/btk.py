@@ -8,18 +8,46 @@
 # Imports
 #-----------------------------------------------------------------------------
 import errno as _errno
+import hashlib as _hashlib
 import os as _os
+import queue as _queue
+import random as _random
+import asyncio as _asyncio
+import json as _json
 import re as _re
+import sqlite3 as _sqlite3
 import requests as _requests
 import datetime as _dt
+import threading as _threading
 import warnings as _warnings
 
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor, \
+                               as_completed as _as_completed
+
+from contextlib import contextmanager as _contextmanager
+from array import array as _array
+from bisect import bisect_left as _bisect_left, bisect_right as _bisect_right
+from itertools import groupby as _groupby
+from collections import Counter as _Counter
 from configparser import ConfigParser as _ConfigParser#, \
                          # ExtendedInterpolation as _ExtendedInterpolation
-from time import time as _timer
+from time import time as _timer, monotonic as _monotonic, sleep as _sleep
 from tqdm.auto import tqdm as _tqdm
 
-from bs4 import BeautifulSoup as _BeautifulSoup
+from bs4 import BeautifulSoup as _BeautifulSoup, SoupStrainer as _SoupStrainer
+
+from requests.adapters import HTTPAdapter as _HTTPAdapter
+from urllib3.util.retry import Retry as _Retry
+from http.cookies import SimpleCookie as _SimpleCookie
+from email.utils import parsedate_to_datetime as _parsedate_to_datetime
+
+# aiohttp is only needed for AsyncArchiveDownloader
+# (pip install broadcastify-archtk[async])
+try:
+    import aiohttp as _aiohttp
+    from yarl import URL as _URL
+except ImportError:
+    _aiohttp = None
 
 from selenium import webdriver as _webdriver
 from selenium.webdriver.support import wait as _wait
@@ -30,6 +58,7 @@ from selenium.webdriver.common.by import By as _By
 from selenium.webdriver.chrome.options import Options as _Options
 from selenium.common.exceptions import NoSuchElementException as _NSEE, \
                                        ElementNotInteractableException as _ENI
+from selenium.common.exceptions import TimeoutException as _TimeoutException
 
 
 
@@ -53,12 +82,219 @@ _ARCHIVE_FEED_STEM = 'https://www.broadcastify.com/archives/feed/'
 #_ARCHIVE_DOWNLOAD_STEM = 'https://m.broadcastify.com/archives/id/'
 _ARCHIVE_DOWNLOAD_STEM = 'https://m.broadcastify.com/archives/idv2/'
 #_ARCHIVE_DOWNLOAD_STEM = 'https://m.broadcastify.com/archives/downloadv2/'
+_BROADCASTIFY_URL = 'https://www.broadcastify.com/'
 _LOGIN_URL = 'https://www.broadcastify.com/login/'
-
-# Throttle times
-_FILE_REQUEST_WAIT = 5
-_PAGE_REQUEST_WAIT = 0.5
-_DATE_NAV_WAIT = 0.1
+# The archive page's archiveTimes table loads its data from here
+_ARCHIVE_TIMES_URL = 'https://www.broadcastify.com/archives/ajax.php'
+
+# Serializes logging in shared HTTP sessions
+_SESSION_LOGIN_LOCK = _threading.Lock()
+
+# Cached login cookies are reused for at most this long (in seconds), even if
+# the cookies themselves last longer
+_LOGIN_TTL = 12 * 60 * 60
+
+# Maximum wait (in seconds) for each step of the browser login form
+_LOGIN_FORM_WAIT = 10
+
+# HTTP connection pooling & retries (for connection errors)
+_HTTP_POOL_SIZE = 10
+_HTTP_RETRIES = 3
+_HTTP_BACKOFF_FACTOR = 0.5
+
+# Seconds to wait for a connection, & between bytes of a response, before a
+# request is abandoned (& retried as transient)
+_HTTP_TIMEOUT = (10, 60)
+
+# Retries of download pages, archive times & mp3 files that fail for transient
+# reasons or are rate limited: the number of retries, the base & maximum
+# backoff (in seconds), and the longest Retry-After that will be honored
+_RETRY_ATTEMPTS = 4
+_RETRY_BACKOFF = 1.0
+_RETRY_MAX_DELAY = 60
+_RETRY_AFTER_LIMIT = 300
+
+# HTTP statuses that are worth retrying, & those that mean "slow down"
+_TRANSIENT_STATUSES = (408, 500, 502, 503, 504)
+_RATE_LIMIT_STATUSES = (429,)
+
+# HTTP statuses meaning an mp3 file doesn't exist on the server
+_UNAVAILABLE_STATUSES = (403, 404, 410)
+
+# How many resolved mp3 URLs may wait for a download worker
+_RESOLVE_PREFETCH = 5
+
+# How often (in seconds) .follow polls for new archive entries by default
+_FOLLOW_INTERVAL = 5 * 60
+
+# mp3 downloads are written to [path] + _PARTIAL_SUFFIX until complete
+_PARTIAL_SUFFIX = '.part'
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Name of the SQLite database holding the on-disk caches in `cache_dir`
+_CACHE_DB_NAME = 'broadcastify_archtk.sqlite'
+
+# Name of the SQLite database, in each download directory, recording the mp3
+# files downloaded there
+_MANIFEST_DB_NAME = 'broadcastify_archtk_manifest.sqlite'
+
+# How long (in seconds) a cached feed name is reused
+_FEED_NAME_TTL = 7 * 24 * 60 * 60
+
+# How long (in seconds) archive start & end dates read from the calendar are
+# cached, so a feed's new days are seen; never past the day they were read
+_ARCHIVE_DATES_TTL = 60 * 60
+
+# Number of days of archives Broadcastify keeps, for archive_dates='retention'
+_ARCHIVE_RETENTION_DAYS = 180
+
+# The assumed data rate (in bytes per second of audio) of archive mp3 files,
+# for estimating download sizes before any have been downloaded
+_MP3_BYTES_PER_SECOND = 2000
+
+# How long (in seconds) a resolved mp3 URL is reused, & how many are kept
+_MP3_URL_TTL = 24 * 60 * 60
+_MP3_URL_CACHE_SIZE = 100000
+
+# Returns the outerHTML of the element matching a CSS selector (or null), so
+# only that element has to be transferred from the browser & parsed
+_OUTER_HTML_SCRIPT = """
+    var element = document.querySelector(arguments[0]);
+    return element ? element.outerHTML : null;
+"""
+
+# The page elements _PageWatcher counts changes to
+_WATCHED_ELEMENTS = {'calendar': 'div.datepicker',
+                     'att': 'table#archiveTimes'}
+
+# Seconds to wait for the calendar or ATT to refresh after a click
+_REFRESH_TIMEOUT = 5
+
+# Installs (once per page) a MutationObserver that counts the changes to each
+# watched element, and settles the waits queued by _WAIT_SCRIPT as soon as a
+# change makes their element's check pass. Returns the change counts.
+_WATCH_SCRIPT = """
+    if (!window._btkWatch) {
+        var selectors = arguments[0];
+        var watch = window._btkWatch = {changes: {}, waiters: []};
+        Object.keys(selectors).forEach(function (key) {
+            watch.changes[key] = 0;
+        });
+
+        watch.checks = {
+            // The displayed month or the active day differs from [month, day]
+            calendar: function (previous) {
+                var month = document.querySelector('th.datepicker-switch');
+                if (!month) return false;
+                if (month.textContent !== previous[0]) return true;
+                var day = document.querySelector('td.active.day');
+                return !!day && day.textContent !== previous[1];
+            },
+            // The table lists a first entry other than `previous`, or shows
+            // that there are no entries
+            att: function (previous) {
+                var body = document.querySelector('table#archiveTimes tbody');
+                if (!body) return false;
+                var link = body.querySelector('a[href*="/archives/"]');
+                if (link) {
+                    return !previous ||
+                           link.getAttribute('href').indexOf(previous) === -1;
+                }
+                var empty = body.querySelector('td.dataTables_empty');
+                return !!empty && !/loading/i.test(empty.textContent);
+            }
+        };
+
+        watch.settle = function () {
+            watch.waiters = watch.waiters.filter(function (waiter) {
+                if (watch.changes[waiter.key] > waiter.mark &&
+                        watch.checks[waiter.key](waiter.previous)) {
+                    waiter.done(true);
+                    return false;
+                }
+                return true;
+            });
+        };
+
+        new MutationObserver(function (records) {
+            Object.keys(selectors).forEach(function (key) {
+                var element = document.querySelector(selectors[key]);
+                if (element && records.some(function (record) {
+                        return element.contains(record.target) ||
+                            Array.prototype.some.call(record.addedNodes,
+                                function (node) {
+                                    return node.contains(element);
+                                });
+                        })) {
+                    watch.changes[key]++;
+                }
+            });
+            watch.settle();
+        }).observe(document.body, {attributes: true, childList: true,
+                                   characterData: true, subtree: true});
+    }
+    return Object.assign({}, window._btkWatch.changes);
+"""
+
+# Returns a copy of the change counts, or null if the watcher isn't installed
+# (e.g. the page was reloaded)
+_MARK_SCRIPT = """
+    return window._btkWatch ? Object.assign({}, window._btkWatch.changes)
+                            : null;
+"""
+
+# Asynchronously waits until a watched element has changed since `mark` & its
+# check passes; calls back with true, false on timeout, or null if the watcher
+# isn't installed
+_WAIT_SCRIPT = """
+    var key = arguments[0], mark = arguments[1], previous = arguments[2];
+    var callback = arguments[arguments.length - 1];
+    var watch = window._btkWatch;
+    if (!watch) {
+        callback(null);
+        return;
+    }
+
+    var waiter = {key: key, mark: mark, previous: previous};
+    var timer = setTimeout(function () {
+        watch.waiters.splice(watch.waiters.indexOf(waiter), 1);
+        callback(false);
+    }, arguments[3]);
+    waiter.done = function (result) {
+        clearTimeout(timer);
+        callback(result);
+    };
+
+    watch.waiters.push(waiter);
+    watch.settle();
+"""
+
+# Archive entry times are stored as whole seconds since this (naive) epoch
+_EPOCH = _dt.datetime(1970, 1, 1)
+
+# Default throttle rates, as (requests per second, burst size), for each type
+# of request made to Broadcastify
+_THROTTLE_RATES = {
+    'page': (2, 1),        # html requests: one every 0.5s
+    'file': (0.2, 1),      # mp3 downloads: one every 5s
+    'date_nav': (10, 1),   # clicks on the archive calendar: one every 0.1s
+}
+
+# Bounds for adaptive throttles, as (min rate, max rate, target latency in
+# seconds), for the request types whose responses are fed back to the throttle
+_THROTTLE_BOUNDS = {
+    'page': (0.5, 5, 2.0),    # slow down if html takes over 2s to arrive
+    'file': (0.05, 1, 5.0),   # slow down if mp3 headers take over 5s
+}
+
+# Adaptive throttles add (max rate - min rate) / _AIMD_STEPS to a rate after
+# each healthy response, & multiply it by _AIMD_BACKOFF after an error that
+# signals overload (or by _AIMD_LATENCY_BACKOFF after a slow response), at
+# most once every _AIMD_COOLDOWN seconds
+_AIMD_STEPS = 20
+_AIMD_BACKOFF = 0.5
+_AIMD_LATENCY_BACKOFF = 0.8
+_AIMD_COOLDOWN = 2.0
 
 
 
@@ -87,12 +323,16 @@ _DATE_NAV_WAIT = 0.1
 class BroadcastifyArchive:
     def __init__(self, feed_id, username=None, password=None,
                  login_cfg_path=None, show_browser_ui=False,
-                 webdriver_path=None):
+                 webdriver_path=None, cache_dir=None,
+                 http_pool_size=_HTTP_POOL_SIZE, throttle=None, session=None,
+                 browser_pool=None, archive_dates='calendar',
+                 retention_days=_ARCHIVE_RETENTION_DAYS,
+                 adaptive_throttle=False, metrics=None, verbose=True):
         """
         A container for Broadcastify feed archive data, and an engine for re-
         trieving archive entry information & downloading the corresponding mp3
-        files. Populates feed name, feed & archive URLs, and start & end dates
-        on initialization.
+        files. Populates feed & archive URLs on initialization; the feed name
+        and the archive's start & end dates are retrieved when first used.
 
         Init Parameters
         ---------------
@@ -120,7 +360,59 @@ class BroadcastifyArchive:
         webdriver_path : str
                 Optional absolute path to WebDriver if it's not located in a
                 directory in the PATH environment variable
-
+        cache_dir : str
+            Optional path to a directory for the toolkit's on-disk caches. If
+            supplied, the archive entries for each date scraped by .build are
+            saved there, and later builds (by this or any other archive object
+            for the same feed) reuse them instead of scraping those dates
+            again. The current day is always re-scraped, since its entries are
+            still being added. The mp3 file URL resolved from each archive
+            entry's download page is cached there as well, so re-runs don't
+            need to request the download page again, as are the login
+            cookies, so that runs don't need to log in again.
+        http_pool_size : int
+            The number of keep-alive connections per host kept open by the
+            archive's HTTP session, which is shared by everything the archive
+            requests without a browser (feed info, download pages & mp3
+            files). Set it to at least the number of concurrent download
+            workers.
+        throttle : _RequestThrottle
+        session : requests.Session
+        browser_pool : _BrowserPool
+            Optional request throttle, HTTP session & pool of logged-in
+            webdrivers to share with other archives, so that they draw on a
+            single request budget, connection pool & set of browsers. Usually
+            supplied by a BroadcastifyArchiveSet. If omitted, the archive
+            creates its own throttle & session, and launches its own browsers.
+        archive_dates : str
+            How the archive's start & end dates are determined:
+             - 'calendar': read them from the archive calendar, walking it
+               back month by month to the first available date (launches the
+               webdriver)
+             - 'retention': take the end date to be today (on this computer's
+               clock) and the start date to be `retention_days` before that,
+               without launching a browser
+            Either way, the dates are looked up again when the day changes,
+            or when a build asks for dates past the end date. With a
+            `cache_dir`, dates read from the calendar (and the feed name) are
+            cached there, & reused for up to an hour on the same day.
+        retention_days : int
+            The number of days of archives Broadcastify keeps, for
+            archive_dates='retention'.
+        adaptive_throttle : bool
+            If True, the throttle adjusts the rates of page & mp3 requests to
+            how Broadcastify is responding: speeding up while responses are
+            quick, & slowing down after slow responses, timeouts or 429/503
+            responses, within _THROTTLE_BOUNDS. Otherwise (the default), the
+            fixed rates in _THROTTLE_RATES are used. Ignored if `throttle` is
+            supplied.
+        metrics : MetricsRegistry
+            The registry in which to record timers & counters for the
+            archive's navigation, requests, parsing & downloads (see
+            MetricsRegistry). If omitted, the archive creates its own.
+        verbose : bool
+            If False, the archive prints no progress bars or messages, e.g.
+            when run as a headless service. Defaults to True.
 
         Other Attributes & Properties
         -----------------------------
@@ -128,8 +420,9 @@ class BroadcastifyArchive:
             Full https URL for the feed's main "listen" page.
         archive_url : str
             Full https URL for the feed's archive page.
-        entries : dictionary
-            Container for archive entry information.
+        entries : ArchiveEntries
+            Container for archive entry information, sorted by start time.
+            Indexing or iterating over it gives a dictionary for each entry:
             uri : str
                 [Populated at .build] The unique ID for an individual archive
                 file page, which corresponds to a feed's transmissions over a
@@ -144,12 +437,38 @@ class BroadcastifyArchive:
         latest_entry   : datetime
             The datetime of the earliest/latest archive entry currently in
             `entries`.
+        feed_name : str
+            The feed's name, as shown on its "listen" page.
         start_date : datetime
         end_date   : datetime
             The datetime of the earliest/latest dates on the archive's calendar.
+            (See `archive_dates`.)
         throttle : _RequestThrottle
             (INTERNAL USE ONLY) Throttle http requests to the Broadcastify
             servers.
+        session : requests.Session
+            (INTERNAL USE ONLY) The connection-pooled HTTP session used for all
+            requests made without a browser.
+        entry_index : _EntryIndex
+            (INTERNAL USE ONLY) The on-disk store of previously scraped dates'
+            archive entries; None if `cache_dir` was not supplied.
+        feed_info_cache : _FeedInfoCache
+            (INTERNAL USE ONLY) The on-disk cache of feed names & archive
+            dates; None if `cache_dir` was not supplied.
+        login_cache : _LoginCache
+            (INTERNAL USE ONLY) The on-disk cache of Broadcastify login cookies,
+            shared by the HTTP session & the webdriver; None if `cache_dir`
+            was not supplied.
+        mp3_url_cache : _Mp3UrlCache
+            (INTERNAL USE ONLY) The on-disk cache of mp3 URLs resolved from
+            archive entry download pages; None if `cache_dir` was not supplied.
+        retry_policy : _RetryPolicy
+            (INTERNAL USE ONLY) How failed page & file requests are retried.
+        dead_letters : list
+            The downloads that still failed after being retried, as
+            dictionaries with the keys `entry` (the archive entry), `output_
+            path`, `error` & `error_type` ('transient', 'rate_limited' or
+            'permanent'). See .sweep_dead_letters.
         """
         self.show_browser_ui = show_browser_ui
         if webdriver_path is None:
@@ -157,37 +476,52 @@ class BroadcastifyArchive:
         else:
             self.webdriver_path = webdriver_path
 
+        if archive_dates not in ('calendar', 'retention'):
+            raise ValueError(f"`archive_dates` must be 'calendar' or "
+                             f"'retention', not {archive_dates!r}.")
+
         self._feed_id = None
+        self._feed_name = None
+        self._start_date = None
+        self._end_date = None
+        self._dates_retrieved_on = None
+        self._lazy_lock = _threading.RLock()
+        self.archive_dates = archive_dates
+        self.retention_days = retention_days
 
         self.feed_url = _FEED_URL_STEM + feed_id
         self.archive_url = _ARCHIVE_FEED_STEM + feed_id
         self.username = username
         self.password = password
-        self.entries = []
-        self.earliest_entry = None
-        self.latest_entry = None
-        self.start_date = None
-        self.end_date = None
-        self.throttle = _RequestThrottle()
+        self.entries = ArchiveEntries()
+        self.metrics = MetricsRegistry() if metrics is None else metrics
+        self.verbose = verbose
+        if throttle is None:
+            throttle = _RequestThrottle(
+                bounds=_THROTTLE_BOUNDS if adaptive_throttle else None,
+                metrics=self.metrics)
+        self.throttle = throttle
+        self.session = (_new_session(http_pool_size) if session is None
+                        else session)
+        self._browser_pool = browser_pool
+        self.entry_index = _EntryIndex(cache_dir) if cache_dir else None
+        self.feed_info_cache = _FeedInfoCache(cache_dir) if cache_dir else None
+        self.login_cache = _LoginCache(cache_dir) if cache_dir else None
+        self.mp3_url_cache = _Mp3UrlCache(cache_dir) if cache_dir else None
+        self.retry_policy = _RetryPolicy()
+        self.dead_letters = []
 
         # If username or password was not passed...
         if (username is None or password is None) and login_cfg_path is not None:
             # ...try to get it from the pwd.ini file
-            _config = _ConfigParser()
-            config_result = _config.read(login_cfg_path)
-
-            if len(config_result) != 0:
-                # Replace only if argument was not passed
-                if not(username):
-                    self.username = _config['authentication_data']['username']
-                if not(password):
-                    self.password = _config['authentication_data']['password']
+            self.username, self.password = _read_login_cfg(login_cfg_path,
+                                                           username, password)
 
         self.feed_id = feed_id
-        self._get_feed_name(feed_id)
 
     def build(self, start=None, end=None, days_back=None, chronological=False,
-              rebuild=False):
+              rebuild=False, use_index=True, backend='selenium',
+              max_workers=1, throttle_share=None):
         """
         Build archive entry data for the BroadcastifyArchive's feed_id and
         populate as a dictionary to the .entries attribute.
@@ -211,6 +545,27 @@ class BroadcastifyArchive:
             rebuild : bool
                 Specifies that existing data in the `entries` list should be
                 overwritten with data newly fetched from Broadcastify.
+            use_index : bool
+                If the archive has a `cache_dir`, take entries for dates that
+                were already scraped from the on-disk entry index rather than
+                from Broadcastify. Set to False to scrape (and re-index) every
+                date in the range.
+            backend : str
+                How archive entries are scraped:
+                 - 'selenium': navigate the archive calendar in the webdriver
+                 - 'http': request each date's archive times directly, without
+                   launching a browser. If Broadcastify doesn't return usable
+                   data, the remaining dates are scraped with 'selenium'.
+            max_workers : int
+                The number of webdrivers to scrape with in parallel. The dates
+                are split into one chunk per calendar month, and each worker
+                logs in with its own browser and takes chunks from the queue
+                until none are left. Entries are merged back in date order
+                either way. Defaults to 1.
+            throttle_share : float
+                The fraction of the archive's request rates each parallel
+                worker may use. Defaults to 1 / the number of workers, so the
+                workers together make requests no faster than one would.
         """
         # Prevent the user from unintentionally erasing existing archive info
         if self.entries and not rebuild:
@@ -218,6 +573,634 @@ class BroadcastifyArchive:
                              f' this BroadcastifyArchive. To erase and rebuild,'
                              f' specify `rebuild=True` when calling .build()')
 
+        built_entries = dict(self.iter_build(start, end, days_back,
+                                             chronological, use_index, backend,
+                                             max_workers, throttle_share))
+
+        # Empty & replace the current archive entries, adding the dates in
+        # order so each date's entries are appended
+        self.entries = ArchiveEntries()
+        for date in sorted(built_entries):
+            self.entries.extend(built_entries[date])
+
+        self._print(self)
+
+    def iter_build(self, start=None, end=None, days_back=None,
+                   chronological=False, use_index=True, backend='selenium',
+                   max_workers=1, throttle_share=None):
+        """
+        Generate archive entry data for the BroadcastifyArchive's feed_id one
+        date at a time, as each date is scraped.
+
+        Unlike .build, nothing is stored in the .entries attribute, so entries
+        can be processed (e.g. downloaded) while later dates are still being
+        scraped, & memory use doesn't grow with the size of the date range.
+        With a `cache_dir`, each past date is saved to the entry index as soon
+        as it's scraped, so an interrupted build picks up where it stopped.
+
+        Parameters
+        ----------
+            start, end, days_back, chronological, use_index, backend,
+            max_workers, throttle_share
+                As for .build.
+
+        Yields
+        ------
+        (date, entries) tuples, where `entries` is an ArchiveEntries holding
+        the archive entries for `date` (iterating over it gives entry
+        dictionaries, as for .entries). Dates found in the entry index come
+        first, then each scraped date as soon as it's done. Dates are in
+        `chronological` order, except that with several `max_workers`,
+        scraped dates come in the order the workers finish them.
+        """
+        if backend not in ('selenium', 'http'):
+            raise ValueError(f"`backend` must be 'selenium' or 'http', not "
+                             f"{backend!r}.")
+
+        date_list = self._get_date_list(start, end, days_back, chronological)
+
+        # Arguments are checked above, when iter_build is called, rather than
+        # when iteration starts
+        return self._iter_dates(date_list, use_index, backend, max_workers,
+                                throttle_share)
+
+    def download(self, start=None, end=None, all_entries=False,
+                 output_path=None, max_workers=1, verify=False, plan=None):
+        """
+        Retrieve URIs and downloads mp3 files for the Broadcastify archive.
+
+        Parameters
+        ----------
+        start : datetime.datetime
+            The earliest date & time for which to download files
+        end : datetime.datetime
+            The latest date & time for which to retrieve files
+        all_entries : boolean
+            Download all available archive files
+
+          Behavior
+          --------
+            Omit   `start` ---------> retrieve from the earliest archive
+            Supply `end`              file through the file covering `end`
+
+            Supply `start` ---------> retrieve from the archive file
+            Omit   `end`              containing `start` through the last archive
+                                      file
+
+           `all_entries` is True --> retrieve all files; ignore other arguments
+
+           `all_entries` is False -> raise an error
+            Omit `start`
+            Omit `end`
+          --------
+
+        output_path : str (optional)
+            The absolute path to which archive entry mp3 files will be written.
+        max_workers : int
+            The number of archive files to download concurrently. All workers
+            share the archive's request throttle, so raising this overlaps
+            transfers without increasing the request rate. Defaults to 1
+            (download serially).
+        verify : bool
+            Files already downloaded are skipped based on the download
+            manifest kept in the output directory. If True, also check each
+            one's size & checksum against the manifest, & download any that
+            don't match again. Defaults to False.
+        plan : DownloadPlan
+            A plan made by .plan_download to carry out instead; `start`,
+            `end`, `all_entries` & `output_path` are then ignored. Each batch
+            waits for its window (if any) to open, & files not started by the
+            time it closes get the status 'deferred'.
+
+        Returns
+        -------
+        A list of download results (see ArchiveDownloader.get_archive_mp3s),
+        in the same order as the archive entries that were downloaded.
+        """
+        if plan is not None:
+            return self._download_plan(plan, max_workers, verify)
+
+        filtered_entries = self._entries_to_download(start, end, all_entries,
+                                                     output_path)
+
+        if filtered_entries is not None:
+            # Retrieve the file URIs
+            dn = ArchiveDownloader(self, login=True, username=self.username,
+                                   password=self.__password)
+
+            # Pass them to _DownloadNavigator to get the files
+            results = dn.get_archive_mp3s(filtered_entries, output_path,
+                                          max_workers=max_workers,
+                                          verify=verify)
+            self._collect_dead_letters(filtered_entries, output_path, results)
+
+            return results
+
+    def _download_plan(self, plan, max_workers, verify):
+        ### Carry out a DownloadPlan, batch by batch
+        results = []
+        for batch in plan.batches:
+            _sleep(self._until_window(batch['window']))
+
+            dn = ArchiveDownloader(self, login=True, username=self.username,
+                                   password=self.__password)
+            batch_results = dn.get_archive_mp3s(
+                                batch['entries'], plan.output_path,
+                                max_workers=max_workers, verify=verify,
+                                deadline=self._window_end(batch['window']))
+            self._collect_dead_letters(batch['entries'], plan.output_path,
+                                       batch_results)
+            results.extend(batch_results)
+
+        return results
+
+    async def _download_plan_async(self, plan, max_workers, verify):
+        ### Coroutine version of _download_plan
+        results = []
+        for batch in plan.batches:
+            await _asyncio.sleep(self._until_window(batch['window']))
+
+            async with AsyncArchiveDownloader(self, login=True,
+                                              username=self.username,
+                                              password=self.__password) as dn:
+                batch_results = await dn.get_archive_mp3s(
+                                    batch['entries'], plan.output_path,
+                                    max_workers=max_workers, verify=verify,
+                                    deadline=self._window_end(
+                                        batch['window']))
+            self._collect_dead_letters(batch['entries'], plan.output_path,
+                                       batch_results)
+            results.extend(batch_results)
+
+        return results
+
+    def _until_window(self, window):
+        # Seconds until a plan batch's download window opens (0 if it has,
+        # or if the batch has no window)
+        if window is None:
+            return 0
+
+        wait = (window[0] - _dt.datetime.now()).total_seconds()
+        if wait > 0:
+            self._print(f'Waiting until {window[0]:%Y-%m-%d %H:%M} for the '
+                        f'next download window.')
+
+        return max(wait, 0)
+
+    def _window_end(self, window):
+        return None if window is None else window[1]
+
+    def plan_download(self, start=None, end=None, all_entries=False,
+                      output_path=None, order='oldest', hours=None,
+                      max_files=None, max_bytes=None, windows=None, runs=1):
+        """
+        Plan a download without starting it: choose which of the entries
+        selected by `start`, `end` & `all_entries` (as for .download) to
+        download, in what order, & when. Entries whose files are already in
+        `output_path` (per its download manifest) are left out. Nothing is
+        written (not even the manifest) until the plan is passed to
+        .download(plan=...) to carry it out.
+
+        Parameters
+        ----------
+        start, end, all_entries, output_path
+            As for .download.
+        order : str
+            'oldest' (the default) to download the earliest entries first, or
+            'newest' to download the latest first, e.g. so fresh archives
+            aren't held up behind a large backfill.
+        hours : iterable of int
+            Optional hours of the day (0-23). Entries starting in these hours
+            are downloaded before all others, still in `order`.
+        max_files : int
+        max_bytes : int
+            Optional caps on the number of files & the (estimated) number of
+            bytes downloaded per batch. Every batch includes at least one
+            file. Sizes are estimated from entry durations, at the data rate
+            of the files already recorded in the manifest.
+        windows : list of (datetime.time, datetime.time)
+            Optional daily (start, end) times of day during which downloads
+            may run, e.g. [(time(1), time(6))] for off-peak hours; a window
+            may span midnight, & overlapping windows are merged. Each batch
+            is scheduled in the next window after the one before, starting
+            from now; files not started by a window's end are left for the
+            next run.
+        runs : int
+            With `windows`, the number of windows (& batches) to plan.
+            Without windows, there is a single batch.
+
+        Returns
+        -------
+        A DownloadPlan, or None if no entries were selected.
+        """
+        if order not in ('oldest', 'newest'):
+            raise ValueError(f"`order` must be 'oldest' or 'newest', not "
+                             f"{order!r}.")
+
+        filtered_entries = self._entries_to_download(start, end, all_entries,
+                                                     output_path)
+        if filtered_entries is None:
+            return None
+
+        entries = list(filtered_entries)
+
+        # Find the files already downloaded, as a download would, but
+        # without writing anything until the plan is carried out
+        results = ArchiveDownloader(self)._plan_downloads(entries,
+                                                          output_path,
+                                                          dry_run=True)
+        present = [entry for entry, result in zip(entries, results)
+                   if result['status'] == 'exists']
+        pending = [entry for entry, result in zip(entries, results)
+                   if result['status'] != 'exists']
+
+        bytes_per_second = _mp3_data_rate(
+            [(entry, result['size']) for entry, result in zip(entries, results)
+             if result['status'] == 'exists'])
+
+        pending.sort(key=lambda entry: entry['start_time'],
+                     reverse=(order == 'newest'))
+        if hours is not None:
+            hours = set(hours)
+            pending = ([entry for entry in pending
+                        if entry['start_time'].hour in hours] +
+                       [entry for entry in pending
+                        if entry['start_time'].hour not in hours])
+
+        if windows is None:
+            scheduled_windows = [None]
+        else:
+            scheduled_windows = _next_windows(windows, _dt.datetime.now(),
+                                              max(1, runs))
+
+        # Fill each batch in priority order until it reaches a cap
+        batches = []
+        i = 0
+        for window in scheduled_windows:
+            if i == len(pending):
+                break
+
+            first = i
+            batch_bytes = 0
+            while i < len(pending):
+                size = _estimated_size(pending[i], bytes_per_second)
+                if i > first and (
+                        (max_files is not None and i - first >= max_files) or
+                        (max_bytes is not None and
+                         batch_bytes + size > max_bytes)):
+                    break
+
+                batch_bytes += size
+                i += 1
+
+            batches.append({'entries': pending[first:i],
+                            'estimated_bytes': batch_bytes,
+                            'window': window})
+
+        return DownloadPlan(output_path, batches, present, pending[i:],
+                            bytes_per_second)
+
+    async def download_async(self, start=None, end=None, all_entries=False,
+                             output_path=None, max_workers=1, verify=False,
+                             plan=None):
+        """
+        Awaitable version of .download, for use inside an asyncio event loop.
+
+        Takes the same parameters & returns the same results as .download, but
+        downloads with an AsyncArchiveDownloader, so waiting on Broadcastify
+        (or for a plan's download window) doesn't block the event loop or tie
+        up a thread per transfer. Requires aiohttp (pip install
+        broadcastify-archtk[async]).
+        """
+        if plan is not None:
+            return await self._download_plan_async(plan, max_workers, verify)
+
+        filtered_entries = self._entries_to_download(start, end, all_entries,
+                                                     output_path)
+
+        if filtered_entries is not None:
+            async with AsyncArchiveDownloader(self, login=True,
+                                              username=self.username,
+                                              password=self.__password) as dn:
+                results = await dn.get_archive_mp3s(filtered_entries,
+                                                    output_path,
+                                                    max_workers=max_workers,
+                                                    verify=verify)
+            self._collect_dead_letters(filtered_entries, output_path, results)
+
+            return results
+
+    def follow(self, output_path, interval=_FOLLOW_INTERVAL,
+               backend='selenium', max_workers=1, max_polls=None, stop=None):
+        """
+        Keep polling the current day's archive times for new archive entries
+        & download each one as soon as it appears, until stopped.
+
+        A single logged-in browser (or HTTP session) is kept open between
+        polls. On each poll, entries whose URIs aren't yet in `entries` are
+        added to it & their mp3 files downloaded to `output_path`. After
+        midnight, the day just ended is polled once more for its last
+        entries (and, with a `cache_dir`, saved to the entry index) before
+        following moves on to the new day; if that poll fails, it's polled
+        again with the next. Files that Broadcastify doesn't
+        have yet (status 'unavailable') are tried again on later polls of
+        their day; failed downloads go to .dead_letters.
+
+        .build needn't be called first, but entries already in the archive
+        aren't downloaded again.
+
+        Parameters
+        ----------
+        output_path : str
+            The absolute path to which archive entry mp3 files will be written.
+        interval : float
+            Seconds from the start of one poll to the start of the next.
+            Defaults to 5 minutes.
+        backend : str
+            How the archive times are polled, as for .build: 'selenium'
+            reloads the archive page in the browser; 'http' requests them
+            directly, without a browser.
+        max_workers : int
+            The number of archive files to download concurrently.
+        max_polls : int
+            Optional number of polls after which to stop. Otherwise, follow
+            until `stop` is set or the process is interrupted (Ctrl-C).
+        stop : threading.Event
+            Optional event to stop following from another thread; it's
+            checked between polls.
+
+        Returns
+        -------
+        A list of download results (see .download) for the files downloaded
+        (or attempted) while following.
+        """
+        if backend not in ('selenium', 'http'):
+            raise ValueError(f"`backend` must be 'selenium' or 'http', not "
+                             f"{backend!r}.")
+
+        if not output_path:
+            raise TypeError(f'No output path was given. Supply one as an '
+                            f'argument or in the initialization file.')
+
+        if stop is None:
+            stop = _threading.Event()
+
+        known_uris = set(self.entries.uris)
+        # {date listed under: [entry, ...]} of files not up yet
+        unavailable = {}
+        results = []
+        followed_date = None
+        polls = 0
+
+        with self._follow_source(backend) as poll:
+            dn = ArchiveDownloader(self, login=True, username=self.username,
+                                   password=self.__password)
+            self._print(f'Following {self.feed_name}; polling every '
+                        f'{interval:g} seconds.')
+
+            try:
+                while not stop.is_set():
+                    started = _monotonic()
+
+                    # Poll the day just ended once more after midnight;
+                    # until a poll succeeds, it stays in the dates polled
+                    today = _dt.date.today()
+                    dates = [today]
+                    if followed_date is not None and followed_date < today:
+                        dates.insert(0, followed_date)
+
+                    polled, poll_results = self._follow_poll(
+                                            poll, dates, dn, output_path,
+                                            max_workers, known_uris,
+                                            unavailable)
+                    results += poll_results
+                    if polled:
+                        followed_date = today
+
+                        # Days before today have had their last poll
+                        for date in [date for date in unavailable
+                                     if date < today]:
+                            del unavailable[date]
+
+                    polls += 1
+                    if max_polls is not None and polls >= max_polls:
+                        break
+
+                    stop.wait(max(0, interval - (_monotonic() - started)))
+            except KeyboardInterrupt:
+                self._print('Stopped following.')
+
+        return results
+
+    @_contextmanager
+    def _follow_source(self, backend):
+        ### Yield a function that takes a list of dates & returns {date:
+        ### entries} for them, polled with `backend` over one kept-open
+        ### browser or session
+        if backend == 'http':
+            with ArchiveTimesClient(self, session=self.session) as client:
+                yield lambda dates: {date: client.get_entries(date)
+                                     for date in dates}
+            return
+
+        # The calendar needs the archive dates, which (with archive_dates=
+        # 'calendar') take a browser of their own to look up, so look them
+        # up before holding one
+        self.start_date, self.end_date
+
+        self._print('Launching webdriver...')
+        with self._launch_browser(login=True) as browser:
+            arch_cal = None
+
+            def poll(dates):
+                # Reload the page for a fresh calendar & ATT, which open on
+                # the latest date, so it's read first without a click
+                nonlocal arch_cal
+                if arch_cal is None:
+                    browser.get(self.archive_url)
+                    arch_cal = ArchiveCalendar(self, browser)
+                else:
+                    arch_cal.reload()
+
+                polled = {}
+                for date in sorted(dates, reverse=True):
+                    polled.update(arch_cal.harvest_month([date]))
+
+                return polled
+
+            yield poll
+
+    def _follow_poll(self, poll, dates, dn, output_path, max_workers,
+                     known_uris, unavailable):
+        ### One poll of .follow: add the new entries for `dates` to .entries
+        ### & download them, along with those of `unavailable` ({date: [entry,
+        ### ...]}) still to come for the dates polled. Returns (whether the
+        ### poll succeeded, the download results).
+        try:
+            polled = poll(dates)
+        except (NavigatorException, OSError, _requests.RequestException,
+                _TimeoutException) as e:
+            self._print(f'Could not poll archive times for {dates[-1]}: {e}')
+            self.metrics.increment('follow_poll_errors_total')
+            return False, []
+
+        self.metrics.increment('follow_polls_total')
+
+        new_entries = []
+        listed_dates = {}
+        for date, date_entries in polled.items():
+            # A day before the one being followed is over, so index it
+            if date < dates[-1] and self.entry_index is not None:
+                self.entry_index.store_date(self.feed_id, date, date_entries)
+
+            for entry in date_entries:
+                if entry[0] not in known_uris:
+                    new_entries.append(entry)
+                    listed_dates[entry[0]] = date
+
+        known_uris.update(entry[0] for entry in new_entries)
+        self.entries.extend(new_entries)
+        self.metrics.increment('follow_new_entries_total', len(new_entries))
+
+        # Files that weren't up yet are retried while their day is polled;
+        # those of other days wait for their day's next poll
+        retries = []
+        for date in polled:
+            for entry in unavailable.get(date, []):
+                retries.append(entry)
+                listed_dates[entry['uri']] = date
+
+        to_download = ArchiveEntries(new_entries + retries)
+        if not len(to_download):
+            return True, []
+
+        self._print(f'{_dt.datetime.now():%Y-%m-%d %H:%M}: '
+                    f'{len(new_entries)} new archive entries.')
+
+        entries = list(to_download)
+        results = dn.get_archive_mp3s(entries, output_path,
+                                      max_workers=max_workers)
+        self._collect_dead_letters(entries, output_path, results)
+
+        for date in polled:
+            unavailable.pop(date, None)
+        for entry, result in zip(entries, results):
+            if result['status'] == 'unavailable':
+                unavailable.setdefault(listed_dates[entry['uri']], []
+                                       ).append(entry)
+
+        return True, results
+
+    def clear_login_cache(self):
+        """
+        Delete the Broadcastify login cookies cached for the archive's
+        username in `cache_dir`, e.g. after changing the account's password.
+        The next request that needs a login logs in afresh. Does nothing if
+        the archive has no `cache_dir`.
+        """
+        if self.login_cache is not None:
+            self.login_cache.clear(self.username)
+
+    def sweep_dead_letters(self, max_workers=1, include_permanent=False):
+        """
+        Try the downloads in .dead_letters again, e.g. once Broadcastify has
+        recovered from an outage.
+
+        Parameters
+        ----------
+        max_workers : int
+            The number of archive files to download concurrently.
+        include_permanent : bool
+            Also retry downloads that failed for reasons that aren't expected
+            to go away (e.g. a 4xx response). Defaults to False.
+
+        Returns
+        -------
+        A list of download results (see .download) for the downloads that
+        were retried. Those that fail again stay in .dead_letters.
+        """
+        swept, kept = [], []
+        for letter in self.dead_letters:
+            if include_permanent or letter['error_type'] != 'permanent':
+                swept.append(letter)
+            else:
+                kept.append(letter)
+
+        if not swept:
+            return []
+
+        self.dead_letters = kept
+
+        dn = ArchiveDownloader(self, login=True, username=self.username,
+                               password=self.__password)
+
+        # Retry each output path's entries together
+        results = []
+        for output_path, letters in _groupby(
+                sorted(swept, key=lambda letter: letter['output_path']),
+                key=lambda letter: letter['output_path']):
+            entries = [letter['entry'] for letter in letters]
+            path_results = dn.get_archive_mp3s(entries, output_path,
+                                               max_workers=max_workers)
+            self._collect_dead_letters(entries, output_path, path_results)
+            results += path_results
+
+        return results
+
+    def _collect_dead_letters(self, entries, output_path, results):
+        # Keep the downloads that failed (even after retrying) for a sweep
+        for entry, result in zip(entries, results):
+            if result['status'] == 'failed':
+                self.dead_letters.append({'entry': entry,
+                                          'output_path': output_path,
+                                          'error': result['error'],
+                                          'error_type': result['error_type']})
+
+    def _entries_to_download(self, start, end, all_entries, output_path):
+        ### Validate .download's arguments & return the entries to download;
+        ### None (after explaining why) if there are none
+        # Make sure entries exist
+        if not len(self.entries):
+            raise ValueError(f'The archive contains no entries. You may need '
+                             f'to call .build before trying to download.')
+
+        # Make sure arguments were passed in a valid combination
+        if not all_entries:
+            if all([not(start), not(end)]):
+                raise ValueError(f'One of `start` or `end` dates must be '
+                                   f'supplied, or all_entries must be set to '
+                                   f'True.')
+
+        # Make sure start and end are either None or a datetime
+        if not((isinstance(start, _dt.datetime) or start is None) and (
+            isinstance(end, _dt.datetime) or end is None)):
+            raise TypeError(f'`start` and `end` must be of type `datetime`.')
+
+        # Make sure an output_path was given
+        if output_path == '':
+            raise TypeError(f'No output path was given. Supply one as an '
+                            f'argument or in the initialization file.')
+
+        # Build the list of download dates; store in filtered_entries
+        if all_entries:
+            filtered_entries = self.entries
+        else:
+            # An omitted `start`/`end` leaves that end of the range open
+            filtered_entries = self.entries.between(start, end)
+
+        # Check that filtered entries isn't empty
+        if len(filtered_entries):
+            return filtered_entries
+        else:
+            self._print(f'No entries found between {start} and {end}. \n\n'
+                        f'You may need to call .build with rebuild=True to '
+                        f'include those dates \nin the BroadcastifyArchive. '
+                        f'Or it may be that no archives exist for \nthose '
+                        f'dates on Broadcastify.')
+
+
+    def _get_date_list(self, start, end, days_back, chronological):
+        ### Validate .build's date arguments & return the dates to build
         # Make sure valid arguments were passed
         ## Either start/end or days_back; not both
         if (start or end) and days_back:
@@ -250,6 +1233,12 @@ class BroadcastifyArchive:
                 days_back = archive_size
 
         else:
+            ## The feed may have gained days since its dates were retrieved
+            if (start and start > self.end_date) or (end and
+                                                     end > self.end_date):
+                with self._lazy_lock:
+                    self._get_archive_dates(use_cache=False)
+
             ## Check that `start` and `end` within archive's start/end dates
             ## If they weren't passed, set them to the archive's start/end dates
             out_of_range = ''
@@ -293,201 +1282,327 @@ class BroadcastifyArchive:
                            for x in range(days_back)],
                            reverse=not(chronological))
 
-        archive_entries = []
-
-        # Spin up a browser and an ArchiveCalendar
-        # Set whether to show browser UI while fetching
-        print('Launching webdriver...')
-        
-        options = _Options()
-        if not self.show_browser_ui:
-            options.add_argument('--headless')
-            options.add_argument('--disable-gpu')
-
-        with _webdriver.Chrome(executable_path=self.webdriver_path,
-                               chrome_options=options) as browser:
-            import time
-                               
-            browser.get(_LOGIN_URL)
-            username = browser.find_element_by_id("signinSrEmail")
-            username.clear()
-            username.send_keys(self.username)
-            
-            time.sleep(3)
-            
-            password = browser.find_element_by_id("signinSrPassword")
-            password.clear()
-            password.send_keys(self.__password)
-            
-            time.sleep(3)
-            
-            browser.find_element_by_class_name("btn.btn-primary.transition-3d-hover").click()
-            
-            time.sleep(3)
-            
-            browser.get(self.archive_url)
-                       
-            self.arch_cal = ArchiveCalendar(self, browser)
-
-            # Get archive entries for each date in list
-            t = _tqdm(date_list, desc=f'Building dates', leave=True,
-                      dynamic_ncols=True)
-            for date in t:
-                t.set_description(f'Building {date}', refresh=True)
-                self.arch_cal.go_to_date(date)
-
-                if self.arch_cal.entries_for_date:
-                    archive_entries.extend(self.arch_cal.entries_for_date)
-
-        # Empty & replace the current archive entries
-        self.entries = []
-
-        # Store URIs and end times in the entries attritbute
-        for entry in archive_entries:
-            entry_dict = {
-                'uri': entry[0],
-                'start_time': entry[1],
-                'end_time': entry[2]
-            }
-
-            self.entries.append(entry_dict)
-
-        self.earliest_entry = min([entry['end_time']
-                                   for entry in self.entries]).date()
-        self.latest_entry = max([entry['end_time']
-                                 for entry in self.entries]).date()
-
-        print(self)
-
-    def download(self, start=None, end=None, all_entries=False,
-             output_path=None):
-        """
-        Retrieve URIs and downloads mp3 files for the Broadcastify archive.
-
-        Parameters
-        ----------
-        start : datetime.datetime
-            The earliest date & time for which to download files
-        end : datetime.datetime
-            The latest date & time for which to retrieve files
-        all_entries : boolean
-            Download all available archive files
-
-          Behavior
-          --------
-            Omit   `start` ---------> retrieve from the earliest archive
-            Supply `end`              file through the file covering `end`
-
-            Supply `start` ---------> retrieve from the archive file
-            Omit   `end`              containing `start` through the last archive
-                                      file
-
-           `all_entries` is True --> retrieve all files; ignore other arguments
-
-           `all_entries` is False -> raise an error
-            Omit `start`
-            Omit `end`
-          --------
-
-        output_path : str (optional)
-            The absolute path to which archive entry mp3 files will be written.
-        """
-        
-        # Make sure entries exist
-        if not len(self.entries):
-            raise ValueError(f'The archive contains no entries. You may need '
-                             f'to call .build before trying to download.')
-
-        # Make sure arguments were passed in a valid combination
-        if not all_entries:
-            if all([not(start), not(end)]):
-                raise ValueError(f'One of `start` or `end` dates must be '
-                                   f'supplied, or all_entries must be set to '
-                                   f'True.')
-
-        # Make sure start and end are either None or a datetime
-        if not((isinstance(start, _dt.datetime) or start is None) and (
-            isinstance(end, _dt.datetime) or end is None)):
-            raise TypeError(f'`start` and `end` must be of type `datetime`.')
-
-        # Make sure an output_path was given
-        if output_path == '':
-            raise TypeError(f'No output path was given. Supply one as an '
-                            f'argument or in the initialization file.')
-
-        # Build the list of download dates; store in filtered_entries
-        if all_entries:
-            filtered_entries = self.entries
-        else:
-            filter_start = _dt.datetime.combine(self.earliest_entry,
-                                            _dt.datetime(1,1,1,0,0).time())
-
-            filter_end = _dt.datetime.combine(self.latest_entry,
-                                          _dt.datetime(1,1,1,0,0).time())
+        return date_list
+
+    def _iter_dates(self, date_list, use_index=True, backend='selenium',
+                    max_workers=1, throttle_share=None):
+        ### Generator behind iter_build: yield (date, ArchiveEntries) for each
+        ### date in date_list, from the entry index or as it's scraped
+        # Past dates' entries never change, so take any that were already
+        # scraped from the entry index. The current day is still open.
+        indexed_entries = {}
+        if self.entry_index is not None and use_index:
+            indexed_entries = self.entry_index.get_dates(
+                                self.feed_id,
+                                [date for date in date_list
+                                 if date < self.end_date])
+
+        if indexed_entries:
+            self._print(f'{len(indexed_entries)} of {len(date_list)} dates '
+                        f'found in the entry index.')
+
+        for date in date_list:
+            if date in indexed_entries:
+                yield date, ArchiveEntries(indexed_entries[date])
+
+        dates_to_scrape = [date for date in date_list
+                           if date not in indexed_entries]
+
+        if dates_to_scrape:
+            for date, date_entries in self._scrape_dates(dates_to_scrape,
+                                                         backend, max_workers,
+                                                         throttle_share):
+                yield date, ArchiveEntries(date_entries)
+
+    def _scrape_dates(self, date_list, backend='selenium', max_workers=1,
+                      throttle_share=None):
+        ### Scrape the entries for each date in date_list from Broadcastify,
+        ### yielding (date, entries) as each date is done
+        requested_dates = set()
+
+        if backend == 'http':
+            for date, date_entries in self._request_dates(date_list):
+                requested_dates.add(date)
+                yield date, date_entries
+
+        # Anything the http backend couldn't get falls back to the webdriver
+        remaining_dates = [date for date in date_list
+                           if date not in requested_dates]
+
+        if remaining_dates:
+            if backend == 'http':
+                self._print(f'Scraping the remaining {len(remaining_dates)} '
+                            f'dates with the webdriver.')
+            yield from self._browse_dates(remaining_dates, max_workers,
+                                          throttle_share)
+
+    def _request_dates(self, date_list):
+        ### Get the entries for each date in date_list over http, yielding
+        ### (date, entries) for each & stopping at the first date that fails
+        # Log in first, as the webdriver does; an anonymous request may be
+        # answered with no entries at all
+        try:
+            self._authenticate()
+        except (NavigatorException, OSError,
+                _requests.RequestException) as e:
+            self._print(f'Could not log in over http: {e}')
+            return
 
-            if start:
-                filter_start = start
-            if end:
-                filter_end = end
+        client = ArchiveTimesClient(self, session=self.session)
 
-            filtered_entries = [entry for entry in self.entries if
-                                entry['start_time'] >= filter_start and
-                                entry['end_time'] <= filter_end]
+        with client:
+            t = self._progress(date_list, desc=f'Building dates', leave=True,
+                               dynamic_ncols=True)
+            try:
+                for date in t:
+                    t.set_description(f'Building {date}', refresh=True)
+                    try:
+                        date_entries = client.get_entries(date)
+                    except (NavigatorException, OSError,
+                            _requests.RequestException) as e:
+                        self._print(f'Could not get archive times for {date} '
+                                    f'over http: {e}', t)
+                        break
+
+                    # An empty day may only mean the request wasn't let see
+                    # the archive (e.g. its login expired), so it isn't
+                    # indexed; later builds request it again
+                    if date_entries:
+                        self._index_date(date, date_entries)
+                    yield date, date_entries
+            finally:
+                t.close()
+
+    def _browse_dates(self, date_list, max_workers=1, throttle_share=None):
+        ### Scrape the entries for each date in date_list by navigating the
+        ### archive calendar in one or more webdrivers, yielding (date,
+        ### entries) as each date is done
+        # Split the dates into one chunk per month, so each worker's calendar
+        # traverses as few months as possible
+        chunks = _queue.Queue()
+        for _, month_dates in _groupby(date_list,
+                                       key=lambda date: (date.year,
+                                                         date.month)):
+            chunks.put(list(month_dates))
+
+        n_workers = max(1, min(max_workers or 1, chunks.qsize()))
+
+        t = self._progress(total=len(date_list), desc=f'Building dates',
+                           leave=True, dynamic_ncols=True)
 
-        # Check that filtered entries isn't empty
-        if len(filtered_entries):
-            # Retrieve the file URIs
-            dn = ArchiveDownloader(self, login=True, username=self.username,
-                                   password=self.__password)
+        try:
+            if n_workers == 1:
+                self._print('Launching webdriver...')
+                yield from self._browse_months(chunks, self.throttle, t)
+            else:
+                self._print(f'Launching {n_workers} webdrivers...')
+                if throttle_share is None:
+                    throttle_share = 1 / n_workers
+
+                yield from self._browse_in_parallel(chunks, n_workers,
+                                                    throttle_share, t)
+        finally:
+            t.close()
+
+    def _browse_in_parallel(self, chunks, n_workers, throttle_share,
+                            progress_bar):
+        ### Scrape month chunks with n_workers webdrivers at once, yielding
+        ### (date, entries) in the order the workers finish them
+        # Bounded, so workers wait for the consumer rather than piling up
+        # scraped dates
+        scraped = _queue.Queue(maxsize=n_workers)
+        abort = _threading.Event()
+
+        with _ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(self._browse_worker, chunks, scraped,
+                                       self.throttle.share(throttle_share),
+                                       progress_bar, abort)
+                       for _ in range(n_workers)]
 
-            # Pass them to _DownloadNavigator to get the files
-            dn.get_archive_mp3s(filtered_entries, output_path)
-        else:
-            print(f'No entries found between {start} and {end}. \n\nYou '
-                  f'may need to call .build with rebuild=True to include those '
-                  f'dates \nin the BroadcastifyArchive. Or it may be that no '
-                  f'archives exist for \nthose dates on Broadcastify.')
+            try:
+                while True:
+                    try:
+                        yield scraped.get(timeout=0.1)
+                        continue
+                    except _queue.Empty:
+                        pass
+
+                    # Raise the first worker error, if there is one
+                    for future in futures:
+                        if future.done():
+                            future.result()
+
+                    if all(future.done() for future in futures) and \
+                            scraped.empty():
+                        return
+            finally:
+                # Stop the other workers after the date they're on (also when
+                # the consumer stops early)
+                abort.set()
+                with chunks.mutex:
+                    chunks.queue.clear()
+
+    def _browse_worker(self, chunks, scraped, throttle, progress_bar, abort):
+        ### Thread target for _browse_in_parallel: put the (date, entries) of
+        ### each date this worker scrapes on the `scraped` queue
+        months = self._browse_months(chunks, throttle, progress_bar)
 
+        try:
+            for scraped_date in months:
+                while not abort.is_set():
+                    try:
+                        scraped.put(scraped_date, timeout=0.1)
+                        break
+                    except _queue.Full:
+                        pass
+                else:
+                    return
+        finally:
+            # Quit the browser now, even if stopped partway
+            months.close()
+
+    def _browse_months(self, chunks, throttle, progress_bar):
+        ### Scrape month chunks from the `chunks` queue in a logged-in browser
+        ### until the queue is empty, yielding (date, entries) for each date
+        with self._launch_browser(login=True) as browser:
+            browser.get(self.archive_url)
 
-    def _get_archive_dates(self):
+            arch_cal = ArchiveCalendar(self, browser, throttle=throttle)
+
+            while True:
+                try:
+                    month_dates = chunks.get_nowait()
+                except _queue.Empty:
+                    break
+
+                # Get archive entries for each date in the month, in one
+                # pass over the month's calendar page
+                progress_bar.set_description(f'Building '
+                                             f'{month_dates[0]:%B %Y}',
+                                             refresh=True)
+                for date, date_entries in arch_cal.harvest_month(month_dates):
+                    # Checkpoint the date before handing it out
+                    self._index_date(date, date_entries)
+                    progress_bar.update()
+
+                    yield date, date_entries
+
+    @_contextmanager
+    def _launch_browser(self, login=False):
+        ### Yield a browser (logged in to Broadcastify, if requested), either
+        ### from the shared browser pool or newly launched
+        if self._browser_pool is not None:
+            # Pooled browsers are already logged in
+            with self._browser_pool.acquire() as browser:
+                yield browser
+            return
+
+        browser = _start_browser(self.webdriver_path, self.show_browser_ui)
+        try:
+            if login:
+                _log_in_browser(browser, self.session, self.username,
+                                self.__password, self.throttle,
+                                self.login_cache)
+
+            yield browser
+        finally:
+            browser.quit()
+
+    def _authenticate(self, force=False, stale_login=None):
+        # Log the archive's HTTP session in to Broadcastify (once), reusing
+        # cached login cookies when possible. `force` logs in afresh; see
+        # _authenticate_session for `stale_login`.
+        _authenticate_session(self.session, self.username, self.__password,
+                              self.throttle, self.login_cache, force,
+                              stale_login)
+
+    def _print(self, message, progress_bar=None):
+        # Print a message (above `progress_bar`, if given), unless the
+        # archive is quiet
+        if self.verbose:
+            if progress_bar is None:
+                print(message)
+            else:
+                progress_bar.write(message)
+
+    def _progress(self, *args, **kwargs):
+        # A tqdm progress bar, disabled if the archive is quiet
+        return _tqdm(*args, disable=not self.verbose, **kwargs)
+
+    def _index_date(self, date, date_entries):
+        # Index completed days so later builds can skip them
+        if self.entry_index is not None and date < self.end_date:
+            self.entry_index.store_date(self.feed_id, date, date_entries)
+
+    def _get_archive_dates(self, use_cache=True):
+        # Populate start_date & end_date from the retention window, or from
+        # the cache or (failing that, or without `use_cache`) the archive
+        # calendar
+        self._dates_retrieved_on = _dt.date.today()
+
+        if self.archive_dates == 'retention':
+            self._end_date = self._dates_retrieved_on
+            self._start_date = self._end_date - _dt.timedelta(
+                                                    days=self.retention_days)
+            return
+
+        if self.feed_info_cache is not None and use_cache:
+            cached_dates = self.feed_info_cache.get_dates(self.feed_id)
+            if cached_dates:
+                self._start_date, self._end_date = cached_dates
+                return
+
+        self._get_calendar_dates()
+
+        if self.feed_info_cache is not None and self._start_date is not None:
+            self.feed_info_cache.put_dates(self.feed_id, self._start_date,
+                                           self._end_date)
+
+    def _archive_dates_stale(self):
+        # Whether start_date & end_date need retrieving (again): they never
+        # have been, or were retrieved on an earlier day
+        return (self._start_date is None or
+                self._dates_retrieved_on != _dt.date.today())
+
+    def _get_calendar_dates(self):
         # Initialize calendar navigation
-        print(f'Initializing calendar navigation for {self.feed_name}...')
-
-        # Set whether to show browser UI while fetching
-        options = _Options()
-        if not self.show_browser_ui:
-            options.add_argument('--headless')
-            options.add_argument('--disable-gpu')
+        self._print(f'Initializing calendar navigation for '
+                    f'{self.feed_name}...')
 
         # Launch Chrome
-        with _webdriver.Chrome(executable_path=self.webdriver_path,
-                               chrome_options=options) as browser:
+        with self._launch_browser() as browser:
             browser.get(self.archive_url)
             self.archive_calendar = ArchiveCalendar(self, browser,
                                                     get_dates=True)
-            self.start_date = self.archive_calendar.start_date
-            self.end_date = self.archive_calendar.end_date
+            self._start_date = self.archive_calendar.start_date
+            self._end_date = self.archive_calendar.end_date
 
         self.archive_calendar = None
 
-        print('Initialization complete.\n')
-        print(self)
+        self._print('Initialization complete.\n')
+        self._print(self)
 
     def _get_feed_name(self, feed_id):
-        s = _requests.Session()
-        with s:
-            r = s.get(_FEED_URL_STEM + feed_id)
-            if r.status_code != 200:
-                raise ConnectionError(f'Problem connecting while getting feed name: '
-                                      f' {r.status_code}')
+        if self.feed_info_cache is not None:
+            self._feed_name = self.feed_info_cache.get_name(feed_id)
+            if self._feed_name is not None:
+                return
 
-            soup = _BeautifulSoup(r.text, 'lxml')
-            try:
-                feed_name = soup.find('span', attrs={'class':'px13'}).text
-            except AttributeError:
-                raise NavigatorException(f'Invalid feed_id ({feed_id}).')
+        r = self.session.get(_FEED_URL_STEM + feed_id, timeout=_HTTP_TIMEOUT)
+        if r.status_code != 200:
+            raise ConnectionError(f'Problem connecting while getting feed name: '
+                                  f' {r.status_code}')
+
+        soup = _BeautifulSoup(r.text, 'lxml')
+        try:
+            feed_name = soup.find('span', attrs={'class':'px13'}).text
+        except AttributeError:
+            raise NavigatorException(f'Invalid feed_id ({feed_id}).')
 
-            self.feed_name = feed_name
+        self._feed_name = feed_name
+
+        if self.feed_info_cache is not None:
+            self.feed_info_cache.put_name(feed_id, feed_name)
 
     @property
     def feed_id(self):
@@ -499,21 +1614,52 @@ class BroadcastifyArchive:
         # Changing the feed_id re-initializes the object's other properties
         if value != self._feed_id:
             self._feed_id = value
-            self._get_feed_name(value)
             self.feed_url = _FEED_URL_STEM + value
             self.archive_url = _ARCHIVE_FEED_STEM + value
-            self.earliest_entry = None
-            self.latest_entry = None
-            self.start_date = None
-            self.end_date = None
-            self.entries = []
-            self.earliest_entry = None
-            self.latest_entry = None
-
-            self._get_archive_dates()
+            self.entries = ArchiveEntries()
+
+            # Retrieved again when next used
+            self._feed_name = None
+            self._start_date = None
+            self._end_date = None
         else:
-            print('New Feed ID same as old Feed ID.')
-            print(self)
+            self._print('New Feed ID same as old Feed ID.')
+            self._print(self)
+
+    @property
+    def feed_name(self):
+        # Retrieved (and memoized) on first use
+        with self._lazy_lock:
+            if self._feed_name is None:
+                self._get_feed_name(self.feed_id)
+        return self._feed_name
+
+    @property
+    def start_date(self):
+        # Retrieved on first use, along with end_date, & memoized for the
+        # rest of the day
+        with self._lazy_lock:
+            if self._archive_dates_stale():
+                self._get_archive_dates()
+        return self._start_date
+
+    @property
+    def end_date(self):
+        with self._lazy_lock:
+            if self._archive_dates_stale():
+                self._get_archive_dates()
+        return self._end_date
+
+    @property
+    def earliest_entry(self):
+        # Date of the earliest archive entry (by end time) in `entries`
+        if self.entries:
+            return self.entries.earliest_end.date()
+    @property
+    def latest_entry(self):
+        # Date of the latest archive entry (by end time) in `entries`
+        if self.entries:
+            return self.entries.latest_end.date()
 
     @property
     def password(self):
@@ -528,13 +1674,14 @@ class BroadcastifyArchive:
         self.__password = value
 
     def __repr__(self):
+        # Show lazy properties only if they've been retrieved
         repr = f'BroadcastifyArchive\n' + \
                f' (Feed ID = {self.feed_id}\n' + \
-               f'  Feed Name = {self.feed_name}\n' + \
+               f'  Feed Name = {self._feed_name}\n' + \
                f'  Feed URL = "{self.feed_url}"\n' + \
                f'  Archive URL = "{self.archive_url}"\n' + \
-               f'  Start Date: {str(self.start_date)}\n' + \
-               f'  End Date:   {str(self.end_date)}\n' + \
+               f'  Start Date: {str(self._start_date)}\n' + \
+               f'  End Date:   {str(self._end_date)}\n' + \
                f'  Username = "{self.username}" Password = [{self.password}]\n' + \
                f"  {'{:,}'.format(len(self.entries))} built archive entries "
 
@@ -555,59 +1702,641 @@ class BroadcastifyArchive:
 #
 #
 #
-# ArchiveDownloader
+# BroadcastifyArchiveSet
 #-----------------------------------------------------------------------------
-class ArchiveDownloader:
-    def __init__(self, parent, login=False, username=None, password=None):
-        self._parent = parent
+class BroadcastifyArchiveSet:
+    def __init__(self, feed_ids, username=None, password=None,
+                 login_cfg_path=None, show_browser_ui=False,
+                 webdriver_path=None, cache_dir=None, max_feeds=4,
+                 max_browsers=2, http_pool_size=_HTTP_POOL_SIZE,
+                 throttle_rates=None, archive_dates='calendar',
+                 adaptive_throttle=False, metrics=None, verbose=True):
+        """
+        A collection of BroadcastifyArchives for several feeds, which builds &
+        downloads them concurrently. The archives share one pool of logged-in
+        webdrivers, one connection-pooled HTTP session (logged in once) and one
+        request throttle, so the whole set stays within a single rate budget
+        and pays for browser startup & login only once.
 
-        self.download_page_soup = None
-        self.current_archive_id = None
-        self.session = s = _requests.Session()
-        self.login = l = login
+        Init Parameters
+        ---------------
+        feed_ids : list of str
+            The feeds to include (see BroadcastifyArchive).
+        username, password, login_cfg_path, show_browser_ui, webdriver_path,
+        cache_dir, archive_dates, adaptive_throttle, metrics, verbose
+            As for BroadcastifyArchive; shared by every feed, so `metrics`
+            aggregates the whole set.
+        max_feeds : int
+            The number of feeds built or downloaded at once.
+        max_browsers : int
+            The number of webdrivers the feeds share. Browsers are launched as
+            needed & stay open (and logged in) until .close() is called.
+        http_pool_size : int
+            The number of keep-alive connections per host in the shared HTTP
+            session.
+        throttle_rates : dict
+            Optional {type: (rate, burst)} overrides of the default request
+            rates, applied to the set as a whole (see _RequestThrottle).
 
-        # If login requested, populated login info
-        if l:
-            # Set post parameters
-            login_data = {
-                'username': username,
-                'password': password,
-                'action': 'auth',
-                'redirect': '/'
-            }
+        Other Attributes & Properties
+        -----------------------------
+        archives : dict
+            {feed_id: BroadcastifyArchive} for every feed, in feed_ids order.
+            The set can also be indexed by feed_id & iterated over directly.
+        throttle : _RequestThrottle
+            The request throttle shared by every feed.
+        metrics : MetricsRegistry
+            The metrics registry shared by every feed.
+        """
+        self.username = username
+        self.password = password
+        self.show_browser_ui = show_browser_ui
+        self.webdriver_path = ('chromedriver' if webdriver_path is None
+                               else webdriver_path)
+        self.cache_dir = cache_dir
+        self.archive_dates = archive_dates
+        self.max_feeds = max_feeds
+        self.metrics = MetricsRegistry() if metrics is None else metrics
+        self.verbose = verbose
 
-            self._login_credentials_present(username, password)
+        if (username is None or password is None) and login_cfg_path is not None:
+            self.username, self.password = _read_login_cfg(login_cfg_path,
+                                                           username, password)
+
+        self.throttle = _RequestThrottle(
+            throttle_rates,
+            bounds=_THROTTLE_BOUNDS if adaptive_throttle else None,
+            metrics=self.metrics)
+        self.session = _new_session(http_pool_size)
+        self.login_cache = _LoginCache(cache_dir) if cache_dir else None
+        self.browser_pool = _BrowserPool(self._launch_browser, max_browsers)
+
+        # Feed names & archive dates are retrieved lazily, when each feed is
+        # first built
+        self.archives = {feed_id: self._new_archive(feed_id)
+                         for feed_id in feed_ids}
+
+    def build(self, **kwargs):
+        """
+        Build every feed's archive concurrently. Takes the same keyword
+        arguments as BroadcastifyArchive.build, applied to every feed.
 
-            self._parent.throttle.throttle('page')
-            r = s.post(_LOGIN_URL, data=login_data)
+        Returns
+        -------
+        A {feed_id: exception} dictionary of the feeds that failed to build;
+        empty if all succeeded.
+        """
+        results = self._for_each_feed(lambda archive: archive.build(**kwargs),
+                                      self.archives.values())
 
-            if r.status_code != 200:
-                raise ConnectionError(f'Encountered a problem connecting '
-                                      f'during ArchiveDownloader initialization:'
-                                      f' code = {r.status_code}, login = {l}')
-            # Check successful login
-            soup = _BeautifulSoup(r.text, 'lxml')
+        return {feed_id: result for feed_id, result in results
+                if isinstance(result, Exception)}
+
+    def download(self, **kwargs):
+        """
+        Download every feed's archive files concurrently. Takes the same
+        keyword arguments as BroadcastifyArchive.download, applied to every
+        feed. Feeds without entries in the requested range are skipped.
+
+        Returns
+        -------
+        A {feed_id: result} dictionary in feed order, where each result is
+        the list returned by BroadcastifyArchive.download or, if the feed
+        failed, the exception raised.
+        """
+        return dict(self._for_each_feed(
+                        lambda archive: archive.download(**kwargs),
+                        [archive for archive in self.archives.values()
+                         if archive.entries]))
+
+    def close(self):
+        ### Quit the shared browsers & close the shared HTTP session
+        self.browser_pool.close()
+        self.session.close()
+
+    def _new_archive(self, feed_id):
+        return BroadcastifyArchive(feed_id, username=self.username,
+                                   password=self.__password,
+                                   show_browser_ui=self.show_browser_ui,
+                                   webdriver_path=self.webdriver_path,
+                                   cache_dir=self.cache_dir,
+                                   archive_dates=self.archive_dates,
+                                   throttle=self.throttle,
+                                   session=self.session,
+                                   browser_pool=self.browser_pool,
+                                   metrics=self.metrics,
+                                   verbose=self.verbose)
+
+    def _launch_browser(self):
+        # Launch a logged-in browser for the pool
+        browser = _start_browser(self.webdriver_path, self.show_browser_ui)
+        try:
+            _log_in_browser(browser, self.session, self.username,
+                            self.__password, self.throttle, self.login_cache)
+        except:
+            browser.quit()
+            raise
+
+        return browser
+
+    def _for_each_feed(self, func, items):
+        ### Call func on each item (a feed ID or archive) on up to max_feeds
+        ### threads; returns [(feed_id, result or exception)] in item order
+        items = list(items)
+        results = [None] * len(items)
+
+        with _ThreadPoolExecutor(max_workers=max(1, self.max_feeds)
+                                 ) as executor:
+            futures = {executor.submit(func, item): i
+                       for i, item in enumerate(items)}
+
+            for future in _as_completed(futures):
+                i = futures[future]
+                item = items[i]
+                feed_id = getattr(item, 'feed_id', item)
+
+                try:
+                    results[i] = (feed_id, future.result())
+                except Exception as e:
+                    self._print(f'Feed {feed_id} failed: {e}')
+                    results[i] = (feed_id, e)
+
+        return results
+
+    def _print(self, message):
+        # Print a message above the feeds' progress bars, unless the set is
+        # quiet
+        if self.verbose:
+            _tqdm.write(message)
+
+    @property
+    def password(self):
+        # As for BroadcastifyArchive.password
+        if self.__password:
+            return True
+        else:
+            return False
+    @password.setter
+    def password(self, value):
+        self.__password = value
+
+    def __getitem__(self, feed_id):
+        return self.archives[feed_id]
+
+    def __iter__(self):
+        return iter(self.archives.values())
+
+    def __len__(self):
+        return len(self.archives)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return (f'BroadcastifyArchiveSet({len(self.archives)} feeds: '
+                f'{", ".join(self.archives)}; {self.browser_pool})')
+
+
+
+
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+#
+#
+#
+# ArchiveEntries
+#-----------------------------------------------------------------------------
+class ArchiveEntries:
+    """
+    A compact, sorted container of archive entries. Entry start & end times
+    are kept as int64 seconds in parallel arrays alongside the URIs, ordered
+    by start time, so that time-range queries are binary searches and the
+    earliest/latest end times are known without a scan.
+
+    For compatibility with the list of dictionaries it replaces, len(),
+    iteration & indexing work as before: each entry is presented as a
+    {'uri': str, 'start_time': datetime, 'end_time': datetime} dictionary
+    (built on access; changing it does not change the container).
+
+    Init Parameters
+    ---------------
+    entries : iterable
+        Optional initial entries, either [uri, start_time, end_time] sequences
+        (as parsed from the ATT) or entry dictionaries.
+    """
+    __slots__ = ('_uris', '_starts', '_ends', '_min_end', '_max_end')
+
+    def __init__(self, entries=None):
+        self._uris = []
+        self._starts = _array('q')
+        self._ends = _array('q')
+        self._min_end = None
+        self._max_end = None
+
+        if entries is not None:
+            self.extend(entries)
+
+    def extend(self, entries):
+        ### Add entries, keeping the container sorted by start time
+        new_entries = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                entry = (entry['uri'], entry['start_time'], entry['end_time'])
+            uri, start_time, end_time = entry
+            new_entries.append((_to_epoch(start_time), _to_epoch(end_time),
+                                uri))
+
+        if not new_entries:
+            return
+
+        new_entries.sort(key=lambda entry: entry[0])
+
+        if self._starts and new_entries[0][0] < self._starts[-1]:
+            # Interleaved with existing entries: merge & re-sort everything
+            new_entries = sorted(list(zip(self._starts, self._ends,
+                                          self._uris)) + new_entries,
+                                 key=lambda entry: entry[0])
+            self._uris = []
+            self._starts = _array('q')
+            self._ends = _array('q')
+
+        for start, end, uri in new_entries:
+            self._starts.append(start)
+            self._ends.append(end)
+            self._uris.append(uri)
+
+            if self._min_end is None or end < self._min_end:
+                self._min_end = end
+            if self._max_end is None or end > self._max_end:
+                self._max_end = end
+
+    def between(self, start=None, end=None):
+        """
+        Return a new ArchiveEntries holding the entries that start at or after
+        `start` and end at or before `end`. Either may be None to leave that
+        end of the range open.
+        """
+        lo, hi = 0, len(self._starts)
+
+        if start is not None:
+            lo = _bisect_left(self._starts, _to_epoch(start))
+
+        if end is not None:
+            end = _to_epoch(end)
+            # An entry ending by `end` must also start by `end`
+            hi = _bisect_right(self._starts, end, lo)
+
+        selected = ArchiveEntries()
+        selected.extend((self._uris[i], _from_epoch(self._starts[i]),
+                         _from_epoch(self._ends[i]))
+                        for i in range(lo, hi)
+                        if end is None or self._ends[i] <= end)
 
-            if soup(text='Log in Failed!'):
-                raise NavigatorException(f'Login credentials rejected by the '
-                                         f'server.')
+        return selected
+
+    @property
+    def uris(self):
+        return list(self._uris)
+
+    @property
+    def earliest_end(self):
+        # End time of the entry that ends first; None if empty
+        if self._min_end is not None:
+            return _from_epoch(self._min_end)
+
+    @property
+    def latest_end(self):
+        # End time of the entry that ends last; None if empty
+        if self._max_end is not None:
+            return _from_epoch(self._max_end)
+
+    def _entry(self, i):
+        return {'uri': self._uris[i],
+                'start_time': _from_epoch(self._starts[i]),
+                'end_time': _from_epoch(self._ends[i])}
+
+    def __len__(self):
+        return len(self._uris)
+
+    def __iter__(self):
+        for i in range(len(self._uris)):
+            yield self._entry(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(i)
+                    for i in range(*index.indices(len(self._uris)))]
+
+        if index < 0:
+            index += len(self._uris)
+        if not 0 <= index < len(self._uris):
+            raise IndexError('ArchiveEntries index out of range')
+
+        return self._entry(index)
+
+    def __repr__(self):
+        if not self._uris:
+            return 'ArchiveEntries(0 entries)'
+
+        return (f'ArchiveEntries({len(self._uris):,} entries from '
+                f'{_from_epoch(self._starts[0])} to {self.latest_end})')
+
+
+
+
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+#
+#
+#
+# DownloadPlan
+#-----------------------------------------------------------------------------
+class DownloadPlan:
+    """
+    An ordered, budgeted plan of which archive files to download & when, as
+    made by BroadcastifyArchive.plan_download. Nothing is downloaded until
+    the plan is passed to BroadcastifyArchive.download(plan=...), so it can
+    be inspected first.
+
+    Attributes
+    ----------
+    output_path : str
+        The path the files will be written to.
+    batches : list
+        The work to do, in order, as dictionaries with the keys:
+            entries : list
+                The archive entry dictionaries to download, in priority order.
+            estimated_bytes : int
+                The batch's estimated total size.
+            window : tuple
+                The (start, end) datetimes of the download window the batch
+                runs in; None to run as soon as the plan is executed.
+    present : list
+        Entries whose files are already in the output directory.
+    deferred : list
+        Entries left for a later plan by the budget, in priority order.
+    bytes_per_second : float
+        The mp3 data rate used to estimate file sizes from entry durations.
+    """
+    def __init__(self, output_path, batches, present, deferred,
+                 bytes_per_second):
+        self.output_path = output_path
+        self.batches = batches
+        self.present = present
+        self.deferred = deferred
+        self.bytes_per_second = bytes_per_second
+
+    @property
+    def entries(self):
+        # Every planned entry, in the order they'll be downloaded
+        return [entry for batch in self.batches for entry in batch['entries']]
+
+    @property
+    def estimated_bytes(self):
+        return sum(batch['estimated_bytes'] for batch in self.batches)
+
+    def __len__(self):
+        return sum(len(batch['entries']) for batch in self.batches)
+
+    def __repr__(self):
+        windows = [batch['window'] for batch in self.batches
+                   if batch['window'] is not None]
+        return (f'DownloadPlan({len(self)} files, ~'
+                f'{self.estimated_bytes / 2**20:,.1f} MB in '
+                f'{len(self.batches)} batch(es)'
+                + (f' from {windows[0][0]:%Y-%m-%d %H:%M}' if windows else '')
+                + f'; {len(self.present)} present, {len(self.deferred)} '
+                  f'deferred)')
+
+
+
+
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+#
+#
+#
+# ArchiveDownloader
+#-----------------------------------------------------------------------------
+class ArchiveDownloader:
+    def __init__(self, parent, login=False, username=None, password=None):
+        self._parent = parent
+
+        # The last download page each thread fetched; per thread, since
+        # pages are fetched concurrently
+        self._page = _threading.local()
+        # Serializes download page requests, from the resolver stage & from
+        # fetch workers re-resolving stale cached URLs
+        self._resolve_lock = _threading.Lock()
+        self._cached_urls = {}
+        self._manifest = None
+        self._retry = parent.retry_policy
+        # Share the archive's connection pool
+        self.session = s = parent.session
+        self.login = l = login
+
+        # If login requested, make sure the (possibly shared) session is
+        # logged in
+        if l:
+            self._login_credentials_present(username, password)
+            self._parent._authenticate()
+
+    @property
+    def download_page_soup(self):
+        # The soup of the download page last fetched by this thread
+        return getattr(self._page, 'soup', None)
+
+    @property
+    def current_archive_id(self):
+        # The archive URI whose page was last fetched by this thread
+        return getattr(self._page, 'archive_id', None)
 
     def get_download_soup(self, archive_id):
-        self.current_archive_id = archive_id
         s = self.session
 
         self._parent.throttle.throttle()
-        r = s.get(_ARCHIVE_DOWNLOAD_STEM + archive_id)
-        if r.status_code != 200:
-            raise ConnectionError(f'Problem connecting while getting soup from '
-                    f'{_ARCHIVE_DOWNLOAD_STEM + archive_id}: {r.status_code}')
+        with self._parent.throttle.reporting('page'):
+            r = s.get(_ARCHIVE_DOWNLOAD_STEM + archive_id,
+                      timeout=_HTTP_TIMEOUT)
+            if r.status_code != 200:
+                raise _ResponseError(r.status_code, r.headers,
+                        f'Problem connecting while getting soup from '
+                        f'{_ARCHIVE_DOWNLOAD_STEM + archive_id}: '
+                        f'{r.status_code}')
+
+        with self._parent.metrics.timer('parse_seconds', page='download'):
+            soup = _BeautifulSoup(r.text, 'lxml')
+
+        # Other threads may be fetching pages at the same time, so return
+        # this page's soup, not the shared attribute
+        self._page.archive_id = archive_id
+        self._page.soup = soup
 
-        self.download_page_soup = _BeautifulSoup(r.text, 'lxml')
+        return soup
 
-        return self.download_page_soup
+    def get_archive_mp3s(self, archive_entries, filepath, max_workers=1,
+                         prefetch=_RESOLVE_PREFETCH, verify=False,
+                         deadline=None):
+        """
+        Download the mp3 files for `archive_entries` into `filepath`.
+
+        Downloading is a two-stage pipeline: one thread resolves each entry's
+        mp3 URL (under the 'page' throttle) and queues it, while download
+        workers (under the 'file' throttle) stream the queued files. Resolving
+        the next entries therefore overlaps the current transfers.
+
+        Each file downloaded is recorded in a manifest in `filepath`'s
+        directory. Entries whose files are recorded there (and still present)
+        are skipped without resolving their download pages.
+
+        Parameters
+        ----------
+        archive_entries : list
+            Archive entry dictionaries (see BroadcastifyArchive.entries).
+        filepath : str
+            The path to which the mp3 files will be written.
+        max_workers : int
+            The number of files to download concurrently. Defaults to 1.
+        prefetch : int
+            The number of resolved mp3 URLs that may wait in the queue for a
+            download worker.
+        verify : bool
+            Check the size & checksum of files already recorded in the
+            manifest, & download any that don't match again. Defaults to
+            False.
+        deadline : datetime.datetime
+            Optional time after which no more files are started. Files
+            already under way are finished.
+
+        Returns
+        -------
+        A list with one dictionary per archive entry, in the same order as
+        `archive_entries`, regardless of the order in which downloads finish:
+            uri : str
+                The archive entry's URI.
+            path : str
+                The path the mp3 file was (or would have been) written to.
+                Entries whose default file names would collide have their URI
+                appended to the name.
+            status : str
+                One of 'downloaded', 'exists' (already present in `filepath`),
+                'unavailable' (the server reports the file does not exist),
+                'failed' or 'deferred' (not started before the `deadline`).
+            error : Exception
+                The exception that caused a 'failed' status; otherwise None.
+            error_type : str
+                For a 'failed' status, whether the error was 'transient'
+                (e.g. a dropped connection or a 5xx response), 'rate_limited'
+                or 'permanent'; otherwise None. Transient & rate limited
+                failures are only reported after several retries.
+            size : int
+                The size of the file in bytes, if it was downloaded or exists.
+            checksum : str
+                The SHA-256 hex digest of the file, if known.
+        """
+        results = self._plan_downloads(archive_entries, filepath, verify)
+
+        t = self._start_progress(archive_entries, filepath)
+        self._report_existing(results, t)
+
+        # Look up mp3 URLs resolved on earlier runs in a single query
+        if self._parent.mp3_url_cache is not None:
+            self._cached_urls = self._parent.mp3_url_cache.get_many(
+                                    [entry['uri'] for entry in archive_entries])
+
+        n_fetchers = max(1, max_workers or 1)
+        resolved = _queue.Queue(maxsize=max(1, prefetch))
+        abort = _threading.Event()
+
+        with _ThreadPoolExecutor(max_workers=n_fetchers + 1) as executor:
+            stages = [executor.submit(self._resolve_stage, results, resolved,
+                                      n_fetchers, abort, deadline)]
+            stages += [executor.submit(self._fetch_stage, resolved, results, t,
+                                       abort, deadline)
+                       for _ in range(n_fetchers)]
+
+            try:
+                for stage in _as_completed(stages):
+                    stage.result()
+            except:
+                # Stop both stages once their current file is done
+                abort.set()
+                raise
+            finally:
+                t.close()
+
+        self._defer_unstarted(results)
+        self._count_results(results)
+        self._report_failures(results)
+
+        return results
+
+    def _resolve_stage(self, results, resolved, n_fetchers, abort,
+                       deadline=None):
+        ### Pipeline stage 1: resolve the mp3 URL of each entry that still
+        ### needs downloading & queue it for the fetch stage, followed by one
+        ### None per fetch worker to stop them. Stops at the deadline.
+        try:
+            for i, result in enumerate(results):
+                if result['status'] is not None:
+                    continue
+
+                if abort.is_set() or _past(deadline):
+                    return
+
+                job = (i,) + self._resolve_entry(result)
+
+                if not self._put_job(resolved, job, abort):
+                    return
+        finally:
+            for _ in range(n_fetchers):
+                self._put_job(resolved, None, abort)
+
+    def _fetch_stage(self, resolved, results, main_progress_bar, abort,
+                     deadline=None):
+        ### Pipeline stage 2: download queued mp3 files until stage 1 is done;
+        ### files still queued at the deadline are left unstarted
+        while True:
+            job = self._get_job(resolved, abort)
+            if job is None:
+                return
+
+            i, result, file_url = job
+
+            # Entries that couldn't be resolved arrive already failed
+            if file_url is not None and not _past(deadline):
+                self._fetch_entry(result, file_url, main_progress_bar)
+
+            results[i] = result
+            main_progress_bar.update()
+
+    def _put_job(self, resolved, job, abort):
+        # Queue a job, giving up if the pipeline is aborted while it's full
+        while not abort.is_set():
+            try:
+                resolved.put(job, timeout=0.1)
+                return True
+            except _queue.Full:
+                pass
+        return False
+
+    def _get_job(self, resolved, abort):
+        # Take the next job; None once the queue is finished or aborted
+        while not abort.is_set():
+            try:
+                return resolved.get(timeout=0.1)
+            except _queue.Empty:
+                pass
+        return None
 
-    def get_archive_mp3s(self, archive_entries, filepath):
-        start = _timer()
+    def _start_progress(self, archive_entries, filepath):
+        # Open & return the overall progress bar for a batch of downloads
         earliest_download = min([entry['start_time']
                                  for entry in archive_entries]
                                  ).strftime('%m-%d-%y %H:%M')
@@ -615,27 +2344,211 @@ class ArchiveDownloader:
                             for entry in archive_entries]
                             ).strftime('%m-%d-%y %H:%M')
 
-        t = _tqdm(archive_entries, desc='Overall progress',
-                  leave=True, dynamic_ncols=True)
-
-        t.write(f'Downloading {earliest_download} to {latest_download}')
-        t.write(f'Storing at {filepath}.')
-
-
-        for file_info in t:
-            feed_id =  self._parent.feed_id
-            archive_uri = file_info['uri']
-            file_date = self._format_entry_date(file_info['end_time'])
-
-
-            # Build the path for saving the downloaded .mp3
-            out_file_name = filepath + '-'.join([feed_id, file_date]) + '.mp3'
+        t = self._parent._progress(total=len(archive_entries),
+                                   desc='Overall progress', leave=True,
+                                   dynamic_ncols=True)
+
+        self._parent._print(f'Downloading {earliest_download} to '
+                            f'{latest_download}', t)
+        self._parent._print(f'Storing at {filepath}.', t)
+
+        return t
+
+    def _defer_unstarted(self, results):
+        # Mark the entries left unstarted at a deadline as deferred
+        for result in results:
+            if result['status'] is None:
+                result['status'] = 'deferred'
+
+    def _count_results(self, results):
+        # Record the batch's outcomes in the archive's metrics
+        for status, count in _Counter(result['status']
+                                      for result in results).items():
+            self._parent.metrics.increment('files_total', count,
+                                           status=status)
+
+    def _report_failures(self, results):
+        failed = [result for result in results if result['status'] == 'failed']
+        if failed:
+            self._parent._print(f'{len(failed)} of {len(results)} archive '
+                                f'files could not be downloaded:')
+            for result in failed:
+                self._parent._print(f'\t{result["uri"]}: {result["error"]}')
+
+    def _report_existing(self, results, main_progress_bar):
+        # Count the entries the plan found already downloaded as done
+        n_existing = sum(result['status'] == 'exists' for result in results)
+        if n_existing:
+            self._parent._print(f'{n_existing} of {len(results)} files '
+                                f'already downloaded. Skipping them.',
+                                main_progress_bar)
+            main_progress_bar.update(n_existing)
+
+    def _new_result(self, file_info, filepath):
+        # Build the (unfinished) result dict for an archive entry
+        feed_id =  self._parent.feed_id
+        file_date = self._format_entry_date(file_info['end_time'])
+
+        # Build the path for saving the downloaded .mp3
+        out_file_name = filepath + '-'.join([feed_id, file_date]) + '.mp3'
+
+        return {'uri': file_info['uri'], 'path': out_file_name,
+                'status': None, 'error': None, 'error_type': None,
+                'size': None, 'checksum': None}
+
+    def _plan_downloads(self, archive_entries, filepath, verify=False,
+                        dry_run=False):
+        ### Build the result dicts for archive_entries from the download
+        ### manifest & a single listing of the output directory, rather than
+        ### by probing for each file. Entries already downloaded are marked
+        ### 'exists'; the rest (status None) still need to be downloaded.
+        ### With `dry_run`, nothing is created, moved or deleted.
+        directory = _os.path.dirname(filepath) or _os.curdir
+        if not dry_run:
+            self._manifest = manifest = _DownloadManifest(directory)
+            file_names = set(_os.listdir(directory))
+        elif _os.path.isdir(directory):
+            manifest = (_DownloadManifest(directory) if _os.path.exists(
+                            _os.path.join(directory, _MANIFEST_DB_NAME))
+                        else None)
+            file_names = set(_os.listdir(directory))
+        else:
+            manifest, file_names = None, set()
+
+        results = [self._new_result(file_info, filepath)
+                   for file_info in archive_entries]
+        records = ({} if manifest is None else
+                   manifest.get_many([result['uri'] for result in results]))
+
+        # Entries with no record whose default file names collide, with each
+        # other or with another entry's recorded file, get their URI appended
+        name_counts = _Counter(_os.path.basename(result['path'])
+                               for result in results
+                               if result['uri'] not in records)
+        owners = ({} if manifest is None else
+                  manifest.get_owners(list(name_counts)))
+
+        for result in results:
+            uri = result['uri']
+            record = records.get(uri)
+
+            if record is not None:
+                # Keep the name the file was downloaded under
+                result['path'] = _os.path.join(directory, record['name'])
+            else:
+                name = _os.path.basename(result['path'])
+                if name_counts[name] > 1 or owners.get(name, uri) != uri:
+                    result['path'] = (result['path'][:-len('.mp3')] + '-' +
+                                      _re.sub(r'[^\w.-]', '_', uri) + '.mp3')
+
+            name = _os.path.basename(result['path'])
+            if name not in file_names:
+                # Never downloaded, deleted since, or only partly downloaded
+                continue
+
+            if record is None:
+                # Downloaded before the manifest was kept, so it may have
+                # been cut short; _fetch_mp3 checks it with the server
+                continue
+            elif record['size'] is None:
+                # Recorded as unavailable, but since downloaded
+                continue
+            elif verify and not _file_matches(result['path'], record):
+                if not dry_run:
+                    self._parent._print(f'{name} does not match its recorded '
+                                        f'size or checksum. Downloading it '
+                                        f'again.')
+                    _os.remove(result['path'])
+                continue
+
+            result['status'] = 'exists'
+            result['size'] = record['size']
+            result['checksum'] = record['checksum']
+
+        return results
+
+    def _resolve_entry(self, result):
+        ### Resolve the mp3 URL for a planned result dict; returns (result,
+        ### url), where url is None if resolution failed
+        archive_uri = result['uri']
 
+        try:
             # Get the URL of the mp3 file
+            return result, self._retry.call(self._resolve_mp3_url,
+                                            archive_uri)
+        except NavigatorException:
+            # e.g. no premium subscription; every other file would fail too
+            raise
+        except (OSError, _requests.RequestException) as e:
+            # A single failure shouldn't abort the rest of the batch
+            _fail_result(result, e)
+            return result, None
+
+    def _fetch_entry(self, result, file_url, main_progress_bar):
+        ### Download a resolved archive entry, filling in its result dict
+        archive_uri = result['uri']
+
+        try:
+            url_was_cached = archive_uri in self._cached_urls
+
+            result['status'] = self._retry.call(self._fetch_mp3, result,
+                                                file_url, main_progress_bar)
+
+            if url_was_cached and result['status'] == 'unavailable':
+                # The cached URL may have gone stale (the server answered
+                # 403, 404 or 410); resolve it again
+                self._cached_urls.pop(archive_uri, None)
+                self._parent.mp3_url_cache.invalidate(archive_uri)
+
+                file_url = self._retry.call(self._resolve_mp3_url,
+                                            archive_uri)
+                result['status'] = self._retry.call(self._fetch_mp3, result,
+                                                    file_url,
+                                                    main_progress_bar)
+        except NavigatorException:
+            raise
+        except (OSError, _requests.RequestException) as e:
+            # A single failure shouldn't abort the rest of the batch
+            _fail_result(result, e)
+
+    def _resolve_mp3_url(self, archive_uri):
+        ### Return the mp3 URL for an archive URI, from the URL cache if it's
+        ### there, otherwise from the entry's download page
+        if archive_uri in self._cached_urls:
+            return self._cached_urls[archive_uri]
+
+        with self._resolve_lock:
+            login = _login_count(self.session)
             mp3_soup = self.get_download_soup(archive_uri)
-            file_url = self._parse_mp3_path(mp3_soup)
 
-            self._fetch_mp3([out_file_name, file_url], t)
+            try:
+                file_url = self._parse_mp3_path(mp3_soup)
+            except NavigatorException:
+                if not self._login_may_be_stale(login):
+                    raise
+
+                # The cached login may have expired on the server; log in
+                # afresh (unless another thread already has)
+                self._parent._authenticate(force=True, stale_login=login)
+                mp3_soup = self.get_download_soup(archive_uri)
+                file_url = self._parse_mp3_path(mp3_soup)
+
+            if not file_url:
+                raise _MissingMp3Error(f'No mp3 link found on the download '
+                                       f'page for {archive_uri}.')
+
+            if self._parent.mp3_url_cache is not None:
+                self._parent.mp3_url_cache.put(archive_uri, file_url)
+
+        return file_url
+
+    def _login_may_be_stale(self, login):
+        # Whether a download page refused under the archive session's login
+        # number `login` could load with a fresh login: the login came from
+        # the cache, or the session has logged in again since
+        session = self._parent.session
+        return (_login_count(session) != login or
+                getattr(session, '_btk_login_cached', False))
 
     def _parse_mp3_path(self, download_page_soup):
         try:
@@ -646,33 +2559,137 @@ class ArchiveDownloader:
             if download_page_soup.find('div', {'class': 'alert-warning'}):
                 raise NavigatorException(f'Premium subscription required.')
 
-    def _fetch_mp3(self, entry, main_progress_bar):
-        path, url = entry
-        file_name = url.split('/')[-1]
+    def _fetch_mp3(self, result, url, main_progress_bar):
+        ### Download the mp3 file for a result dict, recording it in the
+        ### manifest; returns a get_archive_mp3s status string. Any file
+        ### already at `path` isn't in the manifest (e.g. it was downloaded
+        ### before the manifest was kept, so may have been cut short); it's
+        ### resumed like a partial file, so the server confirms its size or
+        ### sends the rest, & put back if the download doesn't finish.
+        path = result['path']
+        partial_path = path + _PARTIAL_SUFFIX
+        adopted = _adopt_file(path, partial_path)
 
-        if not _os.path.exists(path):
-            self._parent.throttle.throttle('file')
+        try:
+            status = self._transfer_mp3(result, url, main_progress_bar)
+        except:
+            if adopted:
+                _restore_file(path, partial_path)
+            raise
 
-            r = _requests.get(url, stream=True)
-            file_size = int(r.headers['Content-Length'])
+        if adopted and status == 'unavailable':
+            _restore_file(path, partial_path)
 
-            t = _tqdm(total=file_size,
-                      desc=f'Downloading {file_name}', dynamic_ncols=True)
+        return status
 
-            if r.status_code == 200:
-                self._parent.throttle.got_last_file = True
-                with open(path, 'wb') as f:
-                    for chunk in r:
+    def _transfer_mp3(self, result, url, main_progress_bar):
+        ### Download the mp3 file for a result dict into place. The file is
+        ### written to a partial file first, which is resumed with a Range
+        ### request if a previous download was interrupted, and only renamed
+        ### to `path` once it is complete.
+        path = result['path']
+        file_name = url.split('/')[-1]
+        partial_path = path + _PARTIAL_SUFFIX
+
+        # Pick up where any earlier attempt left off
+        offset = 0
+        if _os.path.exists(partial_path):
+            offset = _os.path.getsize(partial_path)
+
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        self._parent.throttle.throttle('file')
+
+        with self._parent.throttle.reporting('file') as response_arrived, \
+             self.session.get(url, stream=True, headers=headers,
+                              timeout=_HTTP_TIMEOUT) as r:
+            response_arrived()
+
+            status = 'downloaded'
+            if r.status_code == 416 and offset and \
+                    _range_total(r.headers) == offset:
+                # The partial file was already complete
+                self._parent.throttle.refund('file')
+                expected_size = offset
+                status = 'exists'
+            elif r.status_code not in (200, 206):
+                # No file was transferred, so don't hold up the next one
+                self._parent.throttle.refund('file')
+
+                if r.status_code in _UNAVAILABLE_STATUSES:
+                    self._parent._print(f'\tReceived {r.status_code} on '
+                                        f'{file_name}. Archive file does not '
+                                        f'exist. Skipping.', main_progress_bar)
+                    self._manifest.record(result['uri'],
+                                          _os.path.basename(path),
+                                          http_status=r.status_code)
+                    return 'unavailable'
+                elif r.status_code == 416 and offset:
+                    # The partial file doesn't match the server's copy; start
+                    # over
+                    _os.remove(partial_path)
+                    return self._transfer_mp3(result, url, main_progress_bar)
+                else:
+                    raise _ResponseError(r.status_code, r.headers,
+                                         f'Could not retrieve {url} (code '
+                                         f'{r.status_code}).')
+            elif r.status_code == 206 and offset and \
+                    _range_start(r.headers) != offset:
+                # The server sent a different range than the one asked for,
+                # which can't be appended; start over
+                self._parent.throttle.refund('file')
+                _os.remove(partial_path)
+                return self._transfer_mp3(result, url, main_progress_bar)
+            else:
+                if r.status_code == 200:
+                    # The server sent the whole file (it may not honor Range)
+                    offset = 0
+
+                expected_size = None
+                if 'Content-Length' in r.headers:
+                    expected_size = offset + int(r.headers['Content-Length'])
+
+                metrics = self._parent.metrics
+                with self._parent._progress(total=expected_size,
+                                            initial=offset, unit='B',
+                                            unit_scale=True,
+                                            desc=f'Downloading {file_name}',
+                                            dynamic_ncols=True) as t, \
+                     open(partial_path, 'ab' if offset else 'wb') as f, \
+                     metrics.timer('file_transfer_seconds'):
+                    for chunk in r.iter_content(
+                                            chunk_size=_DOWNLOAD_CHUNK_SIZE):
                         f.write(chunk)
                         t.update(len(chunk))
-            elif r.status_code == 403:
-                t.write(f'\tReceived 403 on {file_name}. Archive file does not '
-                        f' exist. Skipping.')
-            else:
-                t.write(f'\tCould not retrieve {url} (code {r.status_code}'
-                      f'). Skipping.')
-        else:
-            main_progress_bar.write(f'\t{file_name} already exists. Skipping.')
+                        metrics.increment('file_bytes_total', len(chunk))
+
+            http_status = r.status_code
+
+        self._finish_download(result, partial_path, expected_size,
+                              http_status)
+
+        return status
+
+    def _finish_download(self, result, partial_path, expected_size,
+                         http_status):
+        ### Check that the whole file arrived, then put it in place & record
+        ### it in the manifest
+        path = result['path']
+        file_size = _os.path.getsize(partial_path)
+
+        if expected_size is not None and file_size != expected_size:
+            raise ConnectionError(f'Incomplete download of '
+                                  f'{_os.path.basename(path)} ({file_size:,} '
+                                  f'of {expected_size:,} bytes). It will be '
+                                  f'resumed on the next attempt.')
+
+        checksum = _hash_file(partial_path)
+        _os.replace(partial_path, path)
+
+        result['size'] = file_size
+        result['checksum'] = checksum
+        self._manifest.record(result['uri'], _os.path.basename(path),
+                              file_size, checksum, http_status)
 
     def _format_entry_date(self, date):
         # Format the ArchiveEntry end time as YYYYMMDD-HHMM
@@ -702,6 +2719,380 @@ class ArchiveDownloader:
 
 
 
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+#
+#
+#
+# AsyncArchiveDownloader
+#-----------------------------------------------------------------------------
+class AsyncArchiveDownloader(ArchiveDownloader):
+    """
+    An asyncio counterpart to ArchiveDownloader.
+
+    Download pages & mp3 files are requested with aiohttp, so waiting on
+    Broadcastify doesn't hold up the event loop (or a thread per transfer).
+    Concurrency is bounded with semaphores, requests wait on the archive's
+    request throttle without blocking, and mp3 data is written to disk in the
+    default executor. Results, file names & resumption of interrupted
+    downloads are the same as ArchiveDownloader's.
+
+    Use as an async context manager, or await .close() when done:
+
+        async with AsyncArchiveDownloader(archive, login=True, ...) as dn:
+            results = await dn.get_archive_mp3s(entries, '/path/to/mp3s/')
+
+    Requires aiohttp (pip install broadcastify-archtk[async]).
+    """
+    def __init__(self, parent, login=False, username=None, password=None):
+        if _aiohttp is None:
+            raise ImportError(f'AsyncArchiveDownloader requires aiohttp. '
+                              f'Install it with `pip install '
+                              f'broadcastify-archtk[async]`.')
+
+        # Logging in is blocking, so it's put off until the session is opened
+        super().__init__(parent)
+
+        if login:
+            self._login_credentials_present(username, password)
+
+        self.login = login
+        self.session = None
+
+    async def get_download_soup(self, archive_id):
+        await self._open()
+
+        await self._parent.throttle.throttle_async()
+        page_url = _ARCHIVE_DOWNLOAD_STEM + archive_id
+
+        with self._parent.throttle.reporting('page'):
+            async with self.session.get(page_url) as r:
+                if r.status != 200:
+                    raise _ResponseError(r.status, r.headers,
+                                         f'Problem connecting while getting '
+                                         f'soup from {page_url}: {r.status}')
+                page_text = await r.text()
+
+        with self._parent.metrics.timer('parse_seconds', page='download'):
+            soup = _BeautifulSoup(page_text, 'lxml')
+
+        # Other tasks may be fetching pages at the same time
+        self._page.archive_id = archive_id
+        self._page.soup = soup
+
+        return soup
+
+    async def get_archive_mp3s(self, archive_entries, filepath, max_workers=1,
+                               prefetch=_RESOLVE_PREFETCH, verify=False,
+                               deadline=None):
+        """
+        Download the mp3 files for `archive_entries` into `filepath`.
+
+        Each entry's mp3 URL is resolved (under the 'page' throttle) & its file
+        downloaded (under the 'file' throttle) in a task of its own. Up to
+        `max_workers` files are downloaded at once, and URLs are resolved at
+        most `prefetch` entries ahead of the downloads.
+
+        Parameters & return value are the same as for
+        ArchiveDownloader.get_archive_mp3s.
+        """
+        await self._open()
+        loop = _asyncio.get_running_loop()
+
+        results = await loop.run_in_executor(None, self._plan_downloads,
+                                             archive_entries, filepath, verify)
+
+        t = self._start_progress(archive_entries, filepath)
+        self._report_existing(results, t)
+
+        # Look up mp3 URLs resolved on earlier runs in a single query
+        if self._parent.mp3_url_cache is not None:
+            self._cached_urls = await loop.run_in_executor(
+                None, self._parent.mp3_url_cache.get_many,
+                [entry['uri'] for entry in archive_entries])
+
+        n_fetchers = max(1, max_workers or 1)
+        fetch_slots = _asyncio.Semaphore(n_fetchers)
+        entry_slots = _asyncio.Semaphore(n_fetchers + max(1, prefetch))
+
+        tasks = [_asyncio.ensure_future(self._download_entry(
+                     result, entry_slots, fetch_slots, t, deadline))
+                 for result in results if result['status'] is None]
+
+        try:
+            await _asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the other downloads, e.g. on a NavigatorException
+            for task in tasks:
+                task.cancel()
+            await _asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            t.close()
+
+        self._defer_unstarted(results)
+        self._count_results(results)
+        self._report_failures(results)
+
+        return results
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _open(self):
+        ### Log in (if requested) & start the aiohttp session, carrying over
+        ### the archive's login cookies
+        if self.session is not None:
+            return
+
+        if self.login:
+            loop = _asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._parent._authenticate)
+
+        connect_timeout, read_timeout = _HTTP_TIMEOUT
+        self.session = _aiohttp.ClientSession(
+            cookie_jar=_aiohttp.CookieJar(),
+            timeout=_aiohttp.ClientTimeout(total=None,
+                                           sock_connect=connect_timeout,
+                                           sock_read=read_timeout))
+        self._copy_cookies()
+
+    def _copy_cookies(self):
+        # Copy the archive's (requests) session cookies into the aiohttp
+        # session
+        for cookie in self._parent.session.cookies:
+            morsel = _SimpleCookie()
+            morsel[cookie.name] = cookie.value
+            morsel[cookie.name]['domain'] = cookie.domain
+            morsel[cookie.name]['path'] = cookie.path
+
+            self.session.cookie_jar.update_cookies(
+                morsel, _URL(f'https://{cookie.domain.lstrip(".")}/'))
+
+    async def _download_entry(self, result, entry_slots, fetch_slots,
+                              main_progress_bar, deadline=None):
+        ### Resolve & download one archive entry, filling in its result dict;
+        ### left unstarted after the deadline
+        async with entry_slots:
+            if _past(deadline):
+                return
+
+            result, file_url = await self._resolve_entry(result)
+
+            # Entries that couldn't be resolved are already failed
+            if file_url is not None:
+                async with fetch_slots:
+                    if _past(deadline):
+                        return
+                    await self._fetch_entry(result, file_url,
+                                            main_progress_bar)
+
+        main_progress_bar.update()
+
+    async def _resolve_entry(self, result):
+        try:
+            return result, await self._retry.call_async(self._resolve_mp3_url,
+                                                        result['uri'])
+        except NavigatorException:
+            raise
+        except (OSError, _aiohttp.ClientError, _asyncio.TimeoutError) as e:
+            _fail_result(result, e)
+            return result, None
+
+    async def _fetch_entry(self, result, file_url, main_progress_bar):
+        archive_uri = result['uri']
+
+        try:
+            url_was_cached = archive_uri in self._cached_urls
+
+            result['status'] = await self._retry.call_async(
+                self._fetch_mp3, result, file_url, main_progress_bar)
+
+            if url_was_cached and result['status'] == 'unavailable':
+                # The cached URL may have gone stale (the server answered
+                # 403, 404 or 410); resolve it again
+                self._cached_urls.pop(archive_uri, None)
+                await _asyncio.get_running_loop().run_in_executor(
+                    None, self._parent.mp3_url_cache.invalidate, archive_uri)
+
+                file_url = await self._retry.call_async(self._resolve_mp3_url,
+                                                        archive_uri)
+                result['status'] = await self._retry.call_async(
+                    self._fetch_mp3, result, file_url, main_progress_bar)
+        except NavigatorException:
+            raise
+        except (OSError, _aiohttp.ClientError, _asyncio.TimeoutError) as e:
+            _fail_result(result, e)
+
+    async def _resolve_mp3_url(self, archive_uri):
+        if archive_uri in self._cached_urls:
+            return self._cached_urls[archive_uri]
+
+        loop = _asyncio.get_running_loop()
+        login = _login_count(self._parent.session)
+        mp3_soup = await self.get_download_soup(archive_uri)
+
+        try:
+            file_url = self._parse_mp3_path(mp3_soup)
+        except NavigatorException:
+            if not self._login_may_be_stale(login):
+                raise
+
+            # The cached login may have expired on the server; log in afresh
+            # (unless another task already has)
+            await loop.run_in_executor(None, self._parent._authenticate, True,
+                                       login)
+            self._copy_cookies()
+
+            mp3_soup = await self.get_download_soup(archive_uri)
+            file_url = self._parse_mp3_path(mp3_soup)
+
+        if not file_url:
+            raise _MissingMp3Error(f'No mp3 link found on the download '
+                                   f'page for {archive_uri}.')
+
+        if self._parent.mp3_url_cache is not None:
+            await loop.run_in_executor(None, self._parent.mp3_url_cache.put,
+                                       archive_uri, file_url)
+
+        return file_url
+
+    async def _fetch_mp3(self, result, url, main_progress_bar):
+        ### Download the mp3 file for a result dict, as
+        ### ArchiveDownloader._fetch_mp3 does, but with every file system
+        ### call (stat, open, write, remove, check & rename) made in the
+        ### default executor, so none of them blocks the event loop
+        path = result['path']
+        partial_path = path + _PARTIAL_SUFFIX
+        loop = _asyncio.get_running_loop()
+        adopted = await loop.run_in_executor(None, _adopt_file, path,
+                                             partial_path)
+
+        try:
+            status = await self._transfer_mp3(result, url, main_progress_bar)
+        except:
+            if adopted:
+                await loop.run_in_executor(None, _restore_file, path,
+                                           partial_path)
+            raise
+
+        if adopted and status == 'unavailable':
+            await loop.run_in_executor(None, _restore_file, path,
+                                       partial_path)
+
+        return status
+
+    async def _transfer_mp3(self, result, url, main_progress_bar):
+        ### As ArchiveDownloader._transfer_mp3
+        path = result['path']
+        file_name = url.split('/')[-1]
+        partial_path = path + _PARTIAL_SUFFIX
+        loop = _asyncio.get_running_loop()
+
+        # Pick up where any earlier attempt left off
+        offset = await loop.run_in_executor(None, _partial_size, partial_path)
+
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        await self._parent.throttle.throttle_async('file')
+
+        with self._parent.throttle.reporting('file') as response_arrived:
+            async with self.session.get(url, headers=headers) as r:
+                response_arrived()
+
+                status = 'downloaded'
+                if r.status == 416 and offset and \
+                        _range_total(r.headers) == offset:
+                    # The partial file was already complete
+                    self._parent.throttle.refund('file')
+                    expected_size = offset
+                    status = 'exists'
+                elif r.status not in (200, 206):
+                    # No file was transferred, so don't hold up the next one
+                    self._parent.throttle.refund('file')
+
+                    if r.status in _UNAVAILABLE_STATUSES:
+                        self._parent._print(f'\tReceived {r.status} on '
+                                            f'{file_name}. Archive file does '
+                                            f'not exist. Skipping.',
+                                            main_progress_bar)
+                        await loop.run_in_executor(
+                            None, self._manifest.record, result['uri'],
+                            _os.path.basename(path), None, None, r.status)
+                        return 'unavailable'
+                    elif r.status == 416 and offset:
+                        # The partial file doesn't match the server's copy;
+                        # start over
+                        await loop.run_in_executor(None, _os.remove,
+                                                   partial_path)
+                        return await self._transfer_mp3(result, url,
+                                                        main_progress_bar)
+                    else:
+                        raise _ResponseError(r.status, r.headers,
+                                             f'Could not retrieve {url} (code '
+                                             f'{r.status}).')
+                elif r.status == 206 and offset and \
+                        _range_start(r.headers) != offset:
+                    # The server sent a different range than the one asked
+                    # for, which can't be appended; start over
+                    self._parent.throttle.refund('file')
+                    await loop.run_in_executor(None, _os.remove, partial_path)
+                    return await self._transfer_mp3(result, url,
+                                                    main_progress_bar)
+                else:
+                    if r.status == 200:
+                        # The server sent the whole file (it may not honor
+                        # Range)
+                        offset = 0
+
+                    expected_size = None
+                    if r.content_length is not None:
+                        expected_size = offset + r.content_length
+
+                    metrics = self._parent.metrics
+                    f = await loop.run_in_executor(None, open, partial_path,
+                                                   'ab' if offset else 'wb')
+                    try:
+                        with self._parent._progress(
+                                total=expected_size, initial=offset,
+                                unit='B', unit_scale=True,
+                                desc=f'Downloading {file_name}',
+                                dynamic_ncols=True) as t, \
+                             metrics.timer('file_transfer_seconds'):
+                            async for chunk in r.content.iter_chunked(
+                                    _DOWNLOAD_CHUNK_SIZE):
+                                await loop.run_in_executor(None, f.write,
+                                                           chunk)
+                                t.update(len(chunk))
+                                metrics.increment('file_bytes_total',
+                                                  len(chunk))
+                    finally:
+                        await loop.run_in_executor(None, f.close)
+
+                http_status = r.status
+
+        await loop.run_in_executor(None, self._finish_download, result,
+                                   partial_path, expected_size, http_status)
+
+        return status
+
+    async def __aenter__(self):
+        await self._open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __repr__(self):
+        return(f'AsyncArchiveDownloader(Current Archive: '
+               f'{self.current_archive_id})')
+
+
+
+
+
 #-----------------------------------------------------------------------------
 #-----------------------------------------------------------------------------
 #
@@ -710,17 +3101,48 @@ class ArchiveDownloader:
 # ArchiveCalendar
 #-----------------------------------------------------------------------------
 class ArchiveCalendar:
-    def __init__(self, parent, browser, get_dates=False):
+    def __init__(self, parent, browser, get_dates=False, throttle=None):
         self._parent = parent
         self._browser = browser
+        self._metrics = parent.metrics
+        # Parallel build workers each pass their own share of the throttle
+        self._throttle = parent.throttle if throttle is None else throttle
         self.active_date = None
 
         ## Wait for calendar to load on navigation page
+        self._wait_for_load()
+
+        # Watch the calendar & ATT for refreshes
+        self._watcher = _PageWatcher(browser)
+
+        # Initialize object attributes
+        self._read_calendar()
+
+        if get_dates:
+            self.end_date = self.active_date
+            self._get_start_date()     # Initializes start_date
+        else:
+            self.end_date = self._parent.end_date
+            self.start_date = self._parent.start_date
+
+        self._att = ArchiveTimesTable(self, browser)
+
+    def reload(self):
+        ### Reload the archive page to see its latest archive entries; the
+        ### calendar & ATT open on the latest date again
+        self._browser.get(self._parent.archive_url)
+        self._wait_for_load()
+        self._watcher.install()
+        self._read_calendar()
+        self._att = ArchiveTimesTable(self, self._browser)
+
+    def _wait_for_load(self):
         element = _WebDriverWait(self._browser, 10).until(
                                  _EC.presence_of_element_located((
                                  _By.CLASS_NAME, 'datepicker-switch')))
 
-        # Initialize object attributes
+    def _read_calendar(self):
+        # Scrape & parse the freshly loaded calendar
         self._scrape_contents()        # Initializes _contents
         self._parse_calendar_attrs()   # Initializes _calendar, displayed_month,
                                        # & active_date
@@ -731,36 +3153,33 @@ class ArchiveCalendar:
                 f'Archive at {self._parent.archive_url} is no longer available '
                 f'(no active date appears when loading the calendar).')
 
-        if get_dates:
-            self.end_date = self.active_date
-            self._get_start_date()     # Initializes start_date
-        else:
-            self.end_date = self._parent.end_date
-            self.start_date = self._parent.start_date
-
-        self._att = ArchiveTimesTable(self, browser)
-
-    def update(self):
-        self._wait_for_refresh()
+    def update(self, marks=None):
+        # Wait for the calendar to refresh after a click (made after `marks`
+        # were taken; see _PageWatcher), then re-read it
+        self._wait_for_refresh(marks)
         self._scrape_contents()
         self._parse_calendar_attrs()
 
     def go_to_date(self, date):
         ### Navigate to & click on a date in the archive calendar; the clicked-
         ### on date becomes the new active_date, which is returned
+        with self._metrics.timer('go_to_date_seconds'):
+            return self._go_to_date(date)
 
+    def _go_to_date(self, date):
         # If date is "today" or equal to end_date, take the shortcut
         if date == 'today':
             date = self.end_date
 
         if date == self.end_date:
             try:
-                self._parent.throttle.throttle('date_nav')
+                self._throttle.throttle('date_nav')
+                marks = self._watcher.mark()
                 self._browser.find_element_by_class_name('today').click()
                 # Check that we need to wait for a refresh
                 if (self.active_date.month != self._displayed_month_dt.month
                   ) or (self.active_date.year != self._displayed_month_dt.year):
-                    self._wait_for_refresh()
+                    self._wait_for_refresh(marks)
                 return self._displayed_month_dt
             except _NSEE:
                 return False
@@ -788,7 +3207,8 @@ class ArchiveCalendar:
             self._traverse_month(button_name)
 
         # Click the day
-        self._parent.throttle.throttle('date_nav')
+        self._throttle.throttle('date_nav')
+        marks = self._watcher.mark()
         try:
             self._browser.find_element_by_xpath(f"//td[@class='day' "
                                     f"and contains(text(), '{new_day}')]"
@@ -797,11 +3217,73 @@ class ArchiveCalendar:
             self._browser.find_element_by_xpath(f"//td[@class='active day' "
                                     f"and contains(text(), '{new_day}')]"
                                     ).click()
-        self.update()
-        self._att.update()
+        self.update(marks)
+        self._att.update(marks)
 
         return self._displayed_month_dt
 
+    def harvest_month(self, dates):
+        """
+        Yield (date, entries) for each of `dates`, which must all fall in one
+        month. The calendar is moved to that month & parsed once; the days
+        it shows as clickable are then clicked in turn, waiting only for the
+        ATT to refresh after each. Days that aren't clickable (disabled, or
+        outside the archive) have no archive entries, so they're yielded
+        with none, without being clicked.
+        """
+        if not dates:
+            return
+
+        self._go_to_month(dates[0])
+        if self._displayed_month_dt != dates[0].replace(day=1):
+            raise NavigatorException(f'Could not display the calendar for '
+                                     f'{dates[0]:%B %Y}.')
+
+        clickable_days = self._clickable_days()
+
+        for date in dates:
+            if date.day not in clickable_days:
+                self._metrics.increment('days_skipped_total')
+                yield date, []
+                continue
+
+            # The active date's entries are already in the ATT
+            if date != self.active_date:
+                self._click_day(date)
+
+            yield date, self.entries_for_date or []
+
+    def _go_to_month(self, date):
+        # Traverse the calendar until it displays `date`'s month
+        months_to_traverse = self._diff_month(self._displayed_month_dt, date)
+        button_name = 'next' if months_to_traverse >= 0 else 'prev'
+
+        for _ in range(abs(months_to_traverse)):
+            if not self._traverse_month(button_name):
+                break
+
+    def _clickable_days(self):
+        # The days of the displayed month that can be clicked: those with
+        # the "day" class that aren't disabled or in a neighboring month
+        return {int(day.text) for day in self._calendar
+                if 'day' in day['class'] and
+                not {'old', 'new', 'disabled'} & set(day['class'])}
+
+    def _click_day(self, date):
+        # Click a clickable day of the displayed month & wait for the ATT to
+        # show its entries; the calendar itself isn't re-read
+        self._throttle.throttle('date_nav')
+        marks = self._watcher.mark()
+        self._browser.find_element_by_xpath(
+            f"//td[contains(concat(' ', @class, ' '), ' day ') "
+            f"and not(contains(@class, 'disabled')) "
+            f"and not(contains(@class, 'old')) "
+            f"and not(contains(@class, 'new')) "
+            f"and normalize-space(text())='{date.day}']").click()
+
+        self.active_date = date
+        self._att.update(marks)
+
     def _diff_month(self, d1, d2):
         return (d2.year - d1.year) * 12 + d2.month - d1.month
 
@@ -896,30 +3378,37 @@ class ArchiveCalendar:
 
     def _scrape_contents(self):
         ### Scrape the contents of the currently displayed calendar
-        # Scrape the nav page
-        soup = _BeautifulSoup(self._browser.page_source, 'lxml')
-
         # Isolate & store the calendar contents
-        self._contents = soup.find('table', {'class': 'table-condensed'})
+        with self._metrics.timer('scrape_seconds', table='calendar'):
+            self._contents = _scrape_table(self._browser,
+                                           'table.table-condensed',
+                                           {'class': 'table-condensed'})
 
     def _traverse_month(self, direction):
         ### Click on the 'prev' or 'next' arrow
+        with self._metrics.timer('traverse_month_seconds'):
+            return self._click_month_arrow(direction)
+
+    def _click_month_arrow(self, direction):
         try:
-            self._parent.throttle.throttle('date_nav')
+            self._throttle.throttle('date_nav')
+            marks = self._watcher.mark()
             self._browser.find_element_by_class_name(direction).click()
-            self._wait_for_refresh()
+            self._wait_for_refresh(marks)
             self._scrape_contents()
             self._parse_calendar_attrs()
             return self._displayed_month_dt
         except _ENI:
             return False
 
-    def _wait_for_refresh(self):
-        # Wait for calendar widget to refresh
-        element = _WebDriverWait(self._browser, 5
-                    ).until(_calendar_to_be_refreshed(self.displayed_month,
-                                                      str(self.active_date.day)
-                                                      ))
+    def _wait_for_refresh(self, marks=None):
+        # Wait for calendar widget to refresh: for the displayed month or the
+        # active day to change
+        with self._metrics.timer('wait_for_refresh_seconds',
+                                 table='calendar'):
+            self._watcher.wait('calendar', marks,
+                               [self.displayed_month,
+                                str(self.active_date.day)])
 
     @property
     def displayed_month(self):
@@ -962,31 +3451,21 @@ class ArchiveTimesTable:
     def __init__(self, parent, browser):
         self._parent = parent
         self._browser = browser
+        self._metrics = parent._metrics
+        self._watcher = parent._watcher
 
-        ## Wait for ATT to load on navigation page
-        element = _WebDriverWait(self._browser, 10).until(
-                                 _EC.presence_of_element_located((
-                                 _By.CLASS_NAME, 'cursor-link')))
+        ## Wait for ATT to load on navigation page: until it lists an entry,
+        ## or shows that the active date has none
+        self._watcher.wait('att', None, None)
 
         # Initialize object attributes
         self._scrape_contents() # Initializes _contents
         self._parse_entries()   # Initializes current_entries
-        self.last_refresh = None
-
-        # Set up MutationObserver to handle refresh waits for consecutive dates
-        # with no data
-        self._browser.execute_script(
-        """ new MutationObserver(() => {
-                window.lastRefresh = new Date()
-            }).observe(
-            document.querySelector(
-            "table.table-sm.table-striped.table-bordered.table-hover.compact.dataTable.no-footer"
-            ), {attributes: true, childList: true, subtree: true } )
-        """
-        )
 
-    def update(self):
-        self._wait_for_refresh()
+    def update(self, marks=None):
+        # Wait for the ATT to refresh after a calendar click (made after
+        # `marks` were taken; see _PageWatcher), then re-read it
+        self._wait_for_refresh(marks)
         self._scrape_contents()
         self._parse_entries()
 
@@ -1028,56 +3507,289 @@ class ArchiveTimesTable:
             self.current_first_uri = None
 
     def _scrape_contents(self):
-        ### Scrape the contents of the currently displayed calendar
-        # Scrape the nav page
-        soup = _BeautifulSoup(self._browser.page_source, 'lxml')
-
+        ### Scrape the contents of the currently displayed ATT
         # Isolate & store the ATT contents
-        self._contents = soup.find('table', attrs={'id': 'archiveTimes'}
-                                  ).find('tbody')
-
-    def _wait_for_refresh(self):
-        # If the ATT previously had entires...
-        if self.current_first_uri:
-#            _first_uri_xpath = "//a[contains(@href,'/archives/download/')]"
-            _first_uri_xpath = "//a[contains(@href,'/archives/downloadv2/')]"            
-
-            # ...wait until the first entry URI is different
-            element = _WebDriverWait(self._browser, 5).until_not(
-                            _text_to_be_present_in_href((
-                                _By.XPATH, _first_uri_xpath),
-                                self.current_first_uri))
-        else:
-            # ...otherwise wait until ATT data has been refreshed
-            element = _WebDriverWait(self._browser, 5).until_not(
-                            _att_to_be_updated((self.last_refresh)))
+        with self._metrics.timer('scrape_seconds', table='att'):
+            self._contents = _scrape_table(self._browser, 'table#archiveTimes',
+                                           {'id': 'archiveTimes'}
+                                           ).find('tbody')
+
+    def _wait_for_refresh(self, marks=None):
+        # Wait until the ATT lists a different first entry than before, or
+        # shows that the date has none. Consecutive dates without entries
+        # are told apart by the change the click makes to the table.
+        with self._metrics.timer('wait_for_refresh_seconds', table='att'):
+            self._watcher.wait('att', marks, self.current_first_uri)
 
     def _get_entry_datetimes(self, times):
         # Convert the archive entry start & end times from a list of strings
         # to a tuple of datetimes
 
         # Set date component to the date currently displayed
-        date = self._parent.active_date
+        return _entry_datetimes(self._parent.active_date, times)
+
+    def __repr__(self):
+        return (f'ArchiveTimesTable()')
+
 
-        # Get time objects from the HH:MM AM/PM text
-        hhmm_start, hhmm_end = [ _dt.datetime.strptime(each, '%I:%M %p').time()
-                                for each in times]
 
-        # Set the end time
-        end = _dt.datetime.combine(date, hhmm_end)
 
-        # If the start time is bigger than the end time, the archive starts on
-        # the previous day
-        if hhmm_start > hhmm_end:
-            date -= _dt.timedelta(days=1)
-            start = _dt.datetime.combine(date, hhmm_start)
-        else:
-            start = _dt.datetime.combine(date, hhmm_start)
 
-        return (start, end)
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+#
+#
+#
+# ArchiveTimesClient
+#-----------------------------------------------------------------------------
+class ArchiveTimesClient:
+    def __init__(self, parent, session=None):
+        """
+        Fetches the archive times for a date directly from the endpoint the
+        archive page's archiveTimes table loads its data from, without a
+        browser. Produces the same [uri, start, end] entries as
+        ArchiveTimesTable.
+
+        Init Parameters
+        ---------------
+        parent : BroadcastifyArchive
+            The archive whose feed is being scraped. Requests are made under
+            its throttle.
+        session : requests.Session
+            Optional session to make requests with. If None, the client opens
+            its own, which is closed when the client is used as a context
+            manager.
+        """
+        self._parent = parent
+        self._owns_session = session is None
+        self.session = _requests.Session() if session is None else session
+
+    def get_entries(self, date):
+        ### Return the [[uri, start, end], ...] entries for `date`
+        r = self._parent.retry_policy.call(self._request_entries, date)
+
+        with self._parent.metrics.timer('parse_seconds', page='archive_times'):
+            return self._parse_entries(r, date)
+
+    def _request_entries(self, date):
+        self._parent.throttle.throttle('page')
+        with self._parent.throttle.reporting('page'):
+            r = self.session.get(_ARCHIVE_TIMES_URL,
+                                 params={'feedId': self._parent.feed_id,
+                                         'date': date.strftime('%m/%d/%Y')},
+                                 timeout=_HTTP_TIMEOUT)
+            if r.status_code != 200:
+                raise _ResponseError(r.status_code, r.headers,
+                                     f'Problem connecting while getting '
+                                     f'archive times for {date}: '
+                                     f'{r.status_code}')
+
+        return r
+
+    def _parse_entries(self, response, date):
+        """
+        Parses the endpoint's JSON response, which has the form
+
+            {"data": [[<file cell>, <start time>, <end time>, ...], ...]}
+
+        where the file cell is either the archive entry's URI or a link to its
+        download page, and the times are 'HH:MM AM/PM' strings.
+        """
+        try:
+            rows = response.json()['data']
+        except (ValueError, KeyError, TypeError):
+            raise NavigatorException(f'Unexpected archive times response for '
+                                     f'{date}.')
+
+        att_entries = []
+
+        for row in rows:
+            cells = list(row.values()) if isinstance(row, dict) else row
+
+            try:
+                # Take the URI from the link, if the cell holds one
+                link = _re.search(r'href=["\']([^"\']+)', str(cells[0]))
+                file_uri = (link.group(1) if link else str(cells[0])
+                            ).rstrip('/').split('/')[-1]
+
+                file_start, file_end = _entry_datetimes(
+                                        date,
+                                        [_re.sub(r'<[^>]+>', '', str(each)
+                                                 ).strip()
+                                         for each in cells[1:3]])
+            except (IndexError, ValueError):
+                raise NavigatorException(f'Could not parse archive times row '
+                                         f'for {date}: {row}')
+
+            att_entries.append([file_uri, file_start, file_end])
+
+        return att_entries
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def __repr__(self):
-        return (f'ArchiveTimesTable()')
+        return f'ArchiveTimesClient(feed_id={self._parent.feed_id})'
+
+
+
+
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+#
+#
+#
+# MetricsRegistry
+#-----------------------------------------------------------------------------
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Counters & timers around the toolkit's hot paths, to break a slow run
+        down into browser navigation, refresh waits, throttle sleeps, parsing
+        & transfers. Each BroadcastifyArchive records to one (its `metrics`
+        attribute); archives given the same registry, like those of a
+        BroadcastifyArchiveSet, are aggregated. Thread-safe.
+
+        A metric is identified by its name & labels. Timers keep a count,
+        total & maximum in seconds; counters a running total. The toolkit
+        records:
+            go_to_date_seconds               ArchiveCalendar.go_to_date
+            traverse_month_seconds           clicking to the prev/next month
+            days_skipped_total               calendar days not clicked, as
+                                             they can't have entries
+            wait_for_refresh_seconds{table}  waiting for the calendar or ATT
+                                             to redraw
+            scrape_seconds{table}            copying & parsing the calendar
+                                             or ATT from the browser
+            parse_seconds{page}              parsing a download page or an
+                                             archive times response
+            request_seconds{type}            a request's latency (as reported
+                                             to the request throttle)
+            request_errors_total{type, error_type}
+                                             failed requests, by error class
+            throttle_wait_seconds{type}      waiting for the request throttle
+            file_transfer_seconds            streaming an mp3 file to disk
+            file_bytes_total                 bytes of mp3 files received
+            files_total{status}              downloads finished, by status
+
+        Observers added with .add_observer() are called with every measure-
+        ment as observer(kind, name, value, labels), where kind is 'counter'
+        or 'timer', value is the increment or the seconds, and labels is a
+        dictionary; e.g. to forward measurements to a tracing or statsd
+        client. They're called on the measuring thread, so should be quick.
+        """
+        self._counters = {}
+        self._timers = {}
+        self._observers = []
+        self._lock = _threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        # Add `value` to a counter
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._notify('counter', name, value, labels)
+
+    def observe(self, name, seconds, **labels):
+        # Record one timing of `seconds`
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            count, total, maximum = self._timers.get(key, (0, 0.0, 0.0))
+            self._timers[key] = (count + 1, total + seconds,
+                                 max(maximum, seconds))
+        self._notify('timer', name, seconds, labels)
+
+    @_contextmanager
+    def timer(self, name, **labels):
+        # Time the block, whether or not it raises
+        started = _monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, _monotonic() - started, **labels)
+
+    def add_observer(self, observer):
+        with self._lock:
+            self._observers.append(observer)
+
+    def remove_observer(self, observer):
+        with self._lock:
+            self._observers.remove(observer)
+
+    def snapshot(self):
+        """
+        Return the current values as a dictionary of the form
+            {'counters': [{'name', 'labels', 'value'}, ...],
+             'timers': [{'name', 'labels', 'count', 'sum', 'max'}, ...]}
+        sorted by name & labels.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted(self._timers.items())
+
+        return {'counters': [{'name': name, 'labels': dict(labels),
+                              'value': value}
+                             for (name, labels), value in counters],
+                'timers': [{'name': name, 'labels': dict(labels),
+                            'count': count, 'sum': total, 'max': maximum}
+                           for (name, labels), (count, total, maximum)
+                           in timers]}
+
+    def to_json(self, **kwargs):
+        # The snapshot as a JSON string; kwargs are passed to json.dumps
+        return _json.dumps(self.snapshot(), **kwargs)
+
+    def to_prometheus(self, prefix='broadcastify_archtk_'):
+        """
+        Return the current values in the Prometheus text exposition format,
+        with every metric name prefixed by `prefix`. Counters are exported as
+        counters; timers as summaries (`_count` & `_sum`) plus a `_max`
+        gauge.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        for name, counters in _groupby(snapshot['counters'],
+                                       key=lambda m: m['name']):
+            lines.append(f'# TYPE {prefix}{name} counter')
+            lines.extend(f'{prefix}{name}{_prometheus_labels(m["labels"])} '
+                         f'{m["value"]}' for m in counters)
+
+        for name, timers in _groupby(snapshot['timers'],
+                                     key=lambda m: m['name']):
+            timers = list(timers)
+            lines.append(f'# TYPE {prefix}{name} summary')
+            for m in timers:
+                labels = _prometheus_labels(m['labels'])
+                lines.append(f'{prefix}{name}_count{labels} {m["count"]}')
+                lines.append(f'{prefix}{name}_sum{labels} {m["sum"]}')
+
+            lines.append(f'# TYPE {prefix}{name}_max gauge')
+            lines.extend(f'{prefix}{name}_max{_prometheus_labels(m["labels"])} '
+                         f'{m["max"]}' for m in timers)
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def _notify(self, kind, name, value, labels):
+        for observer in list(self._observers):
+            observer(kind, name, value, labels)
+
+    def __repr__(self):
+        return (f'MetricsRegistry({len(self._counters)} counters, '
+                f'{len(self._timers)} timers)')
 
 
 
@@ -1091,16 +3803,129 @@ class NavigatorException(Exception):
 
 
 
+#-----------------------------------------------------------------------------
+# _ResponseError
+#-----------------------------------------------------------------------------
+class _ResponseError(ConnectionError):
+    # Broadcastify answered a request with an unexpected HTTP status
+    def __init__(self, status, headers, message):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = _retry_after(headers)
+
+#-----------------------------------------------------------------------------
+# _MissingMp3Error
+#-----------------------------------------------------------------------------
+class _MissingMp3Error(OSError):
+    # An archive entry's download page has no mp3 link, so there's no file to
+    # download; retrying won't change that
+    pass
+
+#-----------------------------------------------------------------------------
+# _RetryPolicy
+#-----------------------------------------------------------------------------
+class _RetryPolicy:
+    # Retries a request that fails for a transient reason (a dropped
+    # connection, a timeout, a 5xx response) or because Broadcastify is rate
+    # limiting, after exponential backoff with full jitter, or after the
+    # server's Retry-After when it gives one. Permanent failures, & the last
+    # retry's failure, are raised to the caller.
+    def __init__(self, retries=_RETRY_ATTEMPTS, backoff=_RETRY_BACKOFF,
+                 max_delay=_RETRY_MAX_DELAY):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+
+    def call(self, func, *args):
+        ### Return func(*args), retrying it as necessary
+        attempt = 0
+        while True:
+            try:
+                return func(*args)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+
+            attempt += 1
+            _sleep(delay)
+
+    async def call_async(self, func, *args):
+        # Coroutine version of .call(), for coroutine functions
+        attempt = 0
+        while True:
+            try:
+                return await func(*args)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+
+            attempt += 1
+            await _asyncio.sleep(delay)
+
+    def _retry_delay(self, error, attempt):
+        ### Seconds to wait before retrying after `error`; None if it
+        ### shouldn't be retried
+        error_type = _classify_error(error)
+
+        if error_type == 'permanent' or attempt >= self.retries:
+            return None
+
+        retry_after = getattr(error, 'retry_after', None)
+        if retry_after is not None:
+            return min(retry_after, _RETRY_AFTER_LIMIT)
+
+        return _random.uniform(0, min(self.max_delay,
+                                      self.backoff * 2 ** attempt))
+
+    def __repr__(self):
+        return (f'_RetryPolicy(retries={self.retries}, backoff={self.backoff}, '
+                f'max_delay={self.max_delay})')
+
 #-----------------------------------------------------------------------------
 # _RequestThrottle
 #-----------------------------------------------------------------------------
 class _RequestThrottle:
     # Limits the pace with which requests are sent to Broadcastify's servers.
+    # Each request type draws from its own _TokenBucket, so e.g. calendar
+    # clicks never delay mp3 downloads. Types with bounds are adaptive: their
+    # rates follow the responses reported with .report(). All methods are
+    # thread-safe, so a single throttle can be shared by concurrent workers.
 
-    def __init__(self):
-        self.last_file_req = _timer()
-        self.last_page_req = _timer()
-        self.got_last_file = False
+    def __init__(self, rates=None, parent=None, bounds=None, metrics=None):
+        """
+        Parameters
+        ----------
+        rates : dict
+            Optional {type: (rate, burst)} overrides for the default rates in
+            _THROTTLE_RATES, where `rate` is in requests per second and
+            `burst` is the number of requests that may be made back-to-back
+            after a quiet period.
+        parent : _RequestThrottle
+            Optional throttle whose budget every request must also fit in
+            (see .share()).
+        bounds : dict
+            Optional {type: (min_rate, max_rate, target_latency)} for the
+            request types whose rates should adapt (see .set_bounds()), e.g.
+            _THROTTLE_BOUNDS.
+        metrics : MetricsRegistry
+            Optional registry in which to record throttle waits & reported
+            requests.
+        """
+        self._buckets = {}
+        self._controllers = {}
+        self._lock = _threading.Lock()
+        self._parent = parent
+        self.metrics = metrics
+
+        for type, (rate, burst) in dict(_THROTTLE_RATES, **(rates or {})
+                                        ).items():
+            self.set_rate(type, rate, burst)
+
+        for type, (min_rate, max_rate, target_latency) in (bounds or {}
+                                                           ).items():
+            self.set_bounds(type, min_rate, max_rate, target_latency)
 
     def throttle(self, type='page', wait=None):
         """
@@ -1108,113 +3933,1206 @@ class _RequestThrottle:
             - 'page': throttle html requests
             - 'file': throttle mp3 downloads
             - 'date_nav': throttle clicks on elements of the ArchiveCalendar
+        Sleeps (rather than spinning) until the request may be made.
+
+        `wait` is deprecated & ignored, as it always was for the types above;
+        use .set_rate() to change how far apart requests are.
+        """
+        if wait is not None:
+            _warnings.warn("throttle()'s wait parameter is deprecated & "
+                           "ignored; use set_rate() instead.",
+                           DeprecationWarning, stacklevel=2)
+
+        started = _monotonic()
+        self._acquire(type)
+        self._record_wait(type, started)
+
+    async def throttle_async(self, type='page'):
+        # Coroutine version of .throttle(); waits without blocking the event
+        # loop
+        started = _monotonic()
+        await self._acquire_async(type)
+        self._record_wait(type, started)
+
+    def refund(self, type):
+        # Give back the token taken by the last request of `type`, e.g. when
+        # the server refused a file before any data was transferred
+        self._bucket(type).refund()
+
+        if self._parent is not None:
+            self._parent.refund(type)
+
+    def set_rate(self, type, rate=None, burst=None):
         """
-        duration = wait
-
-        if type == 'page':
-            duration = _PAGE_REQUEST_WAIT
-            self._wait(duration)
-        elif type == 'file':
-            if self.got_last_file == True:
-                duration = _FILE_REQUEST_WAIT
-                self.got_last_file = False
+        Change the rate (requests per second) and/or burst size for a request
+        type. Takes effect immediately, including for requests already waiting.
+        Setting the rate of an unknown type adds it.
+        """
+        with self._lock:
+            if type in self._buckets:
+                self._buckets[type].set_rate(rate, burst)
             else:
-                duration = _PAGE_REQUEST_WAIT
-            self._wait(duration)
-        elif type == 'date_nav':
-            duration = _DATE_NAV_WAIT
-            self._wait(duration)
-
-    def _wait(self, duration):
-        while not _timer() - self.last_file_req >= duration:
-            pass
-        self.last_file_req = _timer()
+                self._buckets[type] = _TokenBucket(rate, burst or 1)
+
+    def set_bounds(self, type, min_rate, max_rate, target_latency=None):
+        """
+        Make a request type's rate adaptive, within [min_rate, max_rate]
+        requests per second. After each healthy response (see .report()), the
+        rate rises by a fixed step; after a timeout, a dropped connection or
+        a 429/503/5xx response, it's halved; & after a response slower than
+        `target_latency` seconds, it's cut by a fifth. Pass min_rate=None to
+        make the type's rate fixed again.
+        """
+        with self._lock:
+            self._bucket(type)
+            if min_rate is None:
+                self._controllers.pop(type, None)
+            else:
+                self._controllers[type] = _AIMDController(min_rate, max_rate,
+                                                          target_latency)
+
+    def report(self, type, latency=None, error=None):
+        """
+        Report the outcome of a request of `type`: its latency in seconds if
+        it succeeded, or the exception it failed with. Adaptive types (see
+        .set_bounds()) adjust their rates; others ignore it. Reports are
+        passed on to the parent throttle, if any.
+        """
+        if self.metrics is not None:
+            if error is not None:
+                self.metrics.increment('request_errors_total', type=type,
+                                       error_type=_classify_error(error))
+            elif latency is not None:
+                self.metrics.observe('request_seconds', latency, type=type)
+
+        self._adapt(type, latency, error)
+
+    def _adapt(self, type, latency, error):
+        # Adjust an adaptive type's rate for a reported request, here & in
+        # the parent throttle
+        controller = self._controllers.get(type)
+        if controller is not None:
+            bucket = self._bucket(type)
+            new_rate = controller.update(bucket.rate, latency, error)
+            if new_rate is not None:
+                bucket.set_rate(new_rate)
+
+        if self._parent is not None:
+            self._parent._adapt(type, latency, error)
+
+    @_contextmanager
+    def reporting(self, type='page'):
+        # Report the outcome of the request made in the block: the exception
+        # raised in it, or its latency. The latency runs to the end of the
+        # block, or until the yielded function is called (e.g. as soon as a
+        # streamed response's headers arrive).
+        started = _monotonic()
+        arrived = []
+
+        try:
+            yield lambda: arrived.append(_monotonic())
+        except Exception as e:
+            self.report(type, error=e)
+            raise
+
+        self.report(type, (arrived[0] if arrived else _monotonic()) - started)
+
+    def share(self, fraction):
+        # Return a new throttle allowing `fraction` of this one's rates, to
+        # give each of several parallel workers a slice of the request budget.
+        # Its requests still count against this throttle too, so workers can
+        # never exceed this throttle's (possibly shared) budget together.
+        return _RequestThrottle({type: (rate * fraction, burst)
+                                 for type, (rate, burst)
+                                 in self.rates.items()},
+                                parent=self,
+                                bounds={type: (min_rate * fraction,
+                                               max_rate * fraction,
+                                               target_latency)
+                                        for type, (min_rate, max_rate,
+                                                   target_latency)
+                                        in self.bounds.items()},
+                                metrics=self.metrics)
+
+    @property
+    def rates(self):
+        # {type: (rate, burst)} for every request type; the current rates of
+        # adaptive types, for monitoring
+        with self._lock:
+            return {type: (bucket.rate, bucket.burst)
+                    for type, bucket in self._buckets.items()}
+
+    @property
+    def bounds(self):
+        # {type: (min_rate, max_rate, target_latency)} for every adaptive type
+        with self._lock:
+            return {type: (c.min_rate, c.max_rate, c.target_latency)
+                    for type, c in self._controllers.items()}
 
+    def _acquire(self, type):
+        # Wait for a token from this throttle & each of its ancestors
+        self._bucket(type).acquire()
 
+        if self._parent is not None:
+            self._parent._acquire(type)
 
+    async def _acquire_async(self, type):
+        await self._bucket(type).acquire_async()
 
+        if self._parent is not None:
+            await self._parent._acquire_async(type)
+
+    def _record_wait(self, type, started):
+        # Record the time a request spent waiting, including any wait for
+        # the parent throttle (which doesn't record it again)
+        if self.metrics is not None:
+            self.metrics.observe('throttle_wait_seconds',
+                                 _monotonic() - started, type=type)
+
+    def _bucket(self, type):
+        try:
+            return self._buckets[type]
+        except KeyError:
+            raise ValueError(f'Unknown throttle type: {type}')
+
+    def __repr__(self):
+        return f'_RequestThrottle({self.rates}, bounds={self.bounds})'
 
 #-----------------------------------------------------------------------------
+# _TokenBucket
 #-----------------------------------------------------------------------------
-#
-# Custom Selenium Expected Conditions
+class _TokenBucket:
+    # A token-bucket rate limiter. Tokens accrue at `rate` per second up to
+    # `burst`; each request takes one. A request that finds the bucket empty
+    # reserves a future token (the count goes negative) and sleeps until it's
+    # due, so waiters are served in arrival order.
+
+    def __init__(self, rate, burst=1):
+        if rate is None or rate <= 0:
+            raise ValueError(f'Throttle rate must be positive: {rate}')
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = _monotonic()
+        self._lock = _threading.Lock()
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay > 0:
+            _sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay > 0:
+            await _asyncio.sleep(delay)
+
+    def refund(self):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens + 1, self.burst)
+
+    def set_rate(self, rate=None, burst=None):
+        with self._lock:
+            # Settle tokens earned at the old rate before switching
+            self._refill()
+            if rate is not None:
+                if rate <= 0:
+                    raise ValueError(f'Throttle rate must be positive: {rate}')
+                self.rate = rate
+            if burst is not None:
+                self.burst = burst
+                self._tokens = min(self._tokens, burst)
+
+    def _reserve(self):
+        ### Take a token; return the number of seconds until it may be used
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def _refill(self):
+        now = _monotonic()
+        self._tokens = min(self._tokens + (now - self._last) * self.rate,
+                           self.burst)
+        self._last = now
+
+#-----------------------------------------------------------------------------
+# _AIMDController
 #-----------------------------------------------------------------------------
+class _AIMDController:
+    # Additive-increase/multiplicative-decrease control of one request type's
+    # rate. Healthy responses raise the rate a step at a time; errors that
+    # signal an overloaded or rate-limiting server, & slow responses, cut it
+    # by a factor. Cuts are spaced at least _AIMD_COOLDOWN apart, so that a
+    # burst of concurrent failures counts as one signal.
+
+    def __init__(self, min_rate, max_rate, target_latency=None):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError(f'Throttle bounds must satisfy 0 < min_rate <= '
+                             f'max_rate: {min_rate}, {max_rate}')
+
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.step = (max_rate - min_rate) / _AIMD_STEPS
+        self._last_cut = None
+        self._lock = _threading.Lock()
+
+    def update(self, rate, latency=None, error=None):
+        ### Return the new rate after a response, or None to leave it as is
+        if error is not None:
+            if _classify_error(error) == 'permanent':
+                # e.g. a 4xx; says nothing about the server's load
+                return None
+            factor = _AIMD_BACKOFF
+        elif (latency is not None and self.target_latency is not None and
+              latency > self.target_latency):
+            factor = _AIMD_LATENCY_BACKOFF
+        else:
+            return min(self.max_rate, max(self.min_rate, rate + self.step))
+
+        with self._lock:
+            now = _monotonic()
+            if self._last_cut is not None and \
+                    now - self._last_cut < _AIMD_COOLDOWN:
+                return None
+            self._last_cut = now
+
+        return max(self.min_rate, min(self.max_rate, rate * factor))
+
+
+
 
 
 #-----------------------------------------------------------------------------
-# _text_to_be_present_in_href
+# _PageWatcher
 #-----------------------------------------------------------------------------
-class _text_to_be_present_in_href(object):
-    """
-    A CUSTOM Selenium expectation for checking if the given text is present in
-    the element's locator, href attribute
-    """
-    def __init__(self, locator, text_):
-        self.locator = locator
-        self.text = text_
+class _PageWatcher:
+    # Push-based waits for the archive page's calendar & ATT to refresh. A
+    # MutationObserver injected into the page counts the changes to each
+    # (see _WATCH_SCRIPT). Take a .mark() before clicking, then .wait() for
+    # the element to change & pass its check: a single execute_async_script
+    # call that returns as soon as the page has refreshed, rather than
+    # polling the DOM from python.
+
+    def __init__(self, browser, timeout=_REFRESH_TIMEOUT):
+        self._browser = browser
+        self._timeout = timeout
+        browser.set_script_timeout(timeout + 5)
+        self.install()
+
+    def install(self):
+        # Inject the observer, if the page doesn't already have it; returns
+        # the change counts
+        return self._browser.execute_script(_WATCH_SCRIPT, _WATCHED_ELEMENTS)
+
+    def mark(self):
+        # The change counts of every watched element, to wait from
+        return self._browser.execute_script(_MARK_SCRIPT) or self.install()
+
+    def wait(self, key, marks, previous):
+        """
+        Wait until the watched element `key` ('calendar' or 'att') has
+        changed since `marks` were taken & passes its check against
+        `previous` (see _WATCH_SCRIPT). If `marks` is None, wait for the
+        check alone. Raises a selenium TimeoutException after the timeout.
+        """
+        mark = -1 if marks is None else marks[key]
+        done = self._browser.execute_async_script(
+                _WAIT_SCRIPT, key, mark, previous, self._timeout * 1000)
+
+        if done is None:
+            # The page was reloaded since the mark; the check is all that's
+            # left to go on
+            self.install()
+            done = self._browser.execute_async_script(
+                    _WAIT_SCRIPT, key, -1, previous, self._timeout * 1000)
+
+        if not done:
+            raise _TimeoutException(f'Timed out waiting for the {key} to '
+                                    f'refresh.')
+
+
+
+
+
+#-----------------------------------------------------------------------------
+# _BrowserPool
+#-----------------------------------------------------------------------------
+class _BrowserPool:
+    # A pool of up to `size` logged-in webdrivers shared by several archives.
+    # Browsers are launched (by calling `launch`) only when no idle one is
+    # available, and are kept open for reuse until the pool is closed.
+
+    def __init__(self, launch, size=1):
+        self._launch = launch
+        self.size = size
+        self._idle = []
+        self._n_open = 0
+        self._closed = False
+        self._available = _threading.Condition()
+
+    @_contextmanager
+    def acquire(self):
+        ### Yield a browser for exclusive use, waiting if all are busy
+        with self._available:
+            while (not self._closed and not self._idle
+                   and self._n_open >= self.size):
+                self._available.wait()
+
+            if self._closed:
+                raise NavigatorException('The browser pool has been closed.')
+
+            browser = self._idle.pop() if self._idle else None
+            if browser is None:
+                # Reserve a slot before launching outside the lock
+                self._n_open += 1
+
+        if browser is None:
+            try:
+                browser = self._launch()
+            except:
+                self._release_slot()
+                raise
 
-    def __call__(self, driver):
         try:
-            element_text = _EC._find_element(driver,
-                                         self.locator).get_attribute('href')
-            if element_text:
-                return self.text in element_text
-            else:
-                return False
+            yield browser
         except:
-            return False
+            # The browser may be mid-navigation or broken; don't reuse it
+            self._discard(browser)
+            raise
+
+        with self._available:
+            if not self._closed:
+                self._idle.append(browser)
+                self._available.notify()
+                return
+
+        self._discard(browser)
+
+    def close(self):
+        ### Quit every idle browser; busy ones are quit as they're discarded
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._n_open -= len(idle)
+            self._available.notify_all()
+
+        for browser in idle:
+            browser.quit()
+
+    def _discard(self, browser):
+        try:
+            browser.quit()
+        finally:
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._available:
+            self._n_open -= 1
+            self._available.notify()
+
+    def __repr__(self):
+        return (f'_BrowserPool(size={self.size}, open={self._n_open}, '
+                f'idle={len(self._idle)})')
 
 #-----------------------------------------------------------------------------
-# _att_to_be_updated
+# _SQLiteStore
 #-----------------------------------------------------------------------------
-class _att_to_be_updated(object):
+class _SQLiteStore:
+    # Base class for the toolkit's on-disk caches, which share a single SQLite
+    # database in the cache directory. Each operation opens its own connection
+    # so a store can be used from several threads at once. Stores holding
+    # secrets set _FILE_MODE to restrict who can read the database file.
+    _SCHEMA = ''
+    _FILE_MODE = None
+
+    def __init__(self, cache_dir, db_name=_CACHE_DB_NAME):
+        _os.makedirs(cache_dir, exist_ok=True)
+        self.path = _os.path.join(cache_dir, db_name)
+
+        if self._FILE_MODE is not None:
+            # Create the file with the mode (so it's never readable by
+            # others, whatever the umask), & tighten it if it already exists
+            _os.close(_os.open(self.path, _os.O_CREAT | _os.O_WRONLY,
+                               self._FILE_MODE))
+            _os.chmod(self.path, self._FILE_MODE)
+
+        with self._connect() as con:
+            con.executescript(self._SCHEMA)
+
+    @_contextmanager
+    def _connect(self):
+        # Yield a connection that commits on success & rolls back on error
+        con = _sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path})'
+
+#-----------------------------------------------------------------------------
+# _EntryIndex
+#-----------------------------------------------------------------------------
+class _EntryIndex(_SQLiteStore):
+    # Archive entries for dates that have already been scraped, keyed by feed
+    # ID & date. A date is only stored once the day is over, so dates with no
+    # entries are recorded in scraped_dates to tell them apart from dates that
+    # were never scraped.
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scraped_dates (
+            feed_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            scraped_at TEXT NOT NULL,
+            PRIMARY KEY (feed_id, date));
+        CREATE TABLE IF NOT EXISTS entries (
+            feed_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            uri TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            PRIMARY KEY (feed_id, date, position));
     """
-    A CUSTOM Selenium expectation for checking whether the ATT has been updated.
+
+    def get_dates(self, feed_id, dates):
+        ### Return {date: [[uri, start, end], ...]} for each of `dates` that
+        ### is in the index; dates that aren't are left out
+        if not dates:
+            return {}
+
+        first, last = min(dates).isoformat(), max(dates).isoformat()
+        wanted = {date.isoformat(): date for date in dates}
+
+        with self._connect() as con:
+            indexed = con.execute(
+                'SELECT date FROM scraped_dates WHERE feed_id = ? '
+                'AND date BETWEEN ? AND ?', (feed_id, first, last)).fetchall()
+            rows = con.execute(
+                'SELECT date, uri, start_time, end_time FROM entries '
+                'WHERE feed_id = ? AND date BETWEEN ? AND ? '
+                'ORDER BY date, position', (feed_id, first, last)).fetchall()
+
+        date_entries = {wanted[date]: [] for (date,) in indexed
+                        if date in wanted}
+
+        for date, uri, start_time, end_time in rows:
+            if date in wanted and wanted[date] in date_entries:
+                date_entries[wanted[date]].append(
+                    [uri, _dt.datetime.fromisoformat(start_time),
+                     _dt.datetime.fromisoformat(end_time)])
+
+        return date_entries
+
+    def store_date(self, feed_id, date, date_entries):
+        ### Save (or replace) the entries scraped for a date
+        date = date.isoformat()
+
+        with self._connect() as con:
+            con.execute('DELETE FROM entries WHERE feed_id = ? AND date = ?',
+                        (feed_id, date))
+            con.executemany(
+                'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                [(feed_id, date, position, uri, start_time.isoformat(),
+                  end_time.isoformat())
+                 for position, (uri, start_time, end_time)
+                 in enumerate(date_entries)])
+            con.execute('INSERT OR REPLACE INTO scraped_dates VALUES (?, ?, ?)',
+                        (feed_id, date, _dt.datetime.now().isoformat()))
+
+
+
+
+
+#-----------------------------------------------------------------------------
+# _FeedInfoCache
+#-----------------------------------------------------------------------------
+class _FeedInfoCache(_SQLiteStore):
+    # Feed names & archive calendar start/end dates, keyed by feed ID, so
+    # archives can be initialized without scraping. The calendar gains days
+    # as archives are added, so its dates expire after _ARCHIVE_DATES_TTL,
+    # & at the end of the day they were read. (archive_dates held dates of
+    # either mode, without a time; it's replaced by calendar_dates.)
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS feed_names (
+            feed_id TEXT PRIMARY KEY,
+            feed_name TEXT NOT NULL,
+            retrieved_at REAL NOT NULL);
+        DROP TABLE IF EXISTS archive_dates;
+        CREATE TABLE IF NOT EXISTS calendar_dates (
+            feed_id TEXT PRIMARY KEY,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            retrieved_at REAL NOT NULL);
     """
-    def __init__(self, last_refresh):
-        self.last_refresh = last_refresh
 
-    def __call__(self, driver):
-        try:
-            update = self.browser.execute_script('return window.lastRefresh')
-
-            if update:
-                if last_refresh:
-                    # Convert to a datetime
-                    update = _dt.datetime.strptime(update,
-                                                   '%Y-%m-%dT%H:%M:%S.%fZ')
-                    return self.last_refresh <= update
-                else:
-                    return True
-        except:
-            return False
+    def get_name(self, feed_id):
+        with self._connect() as con:
+            row = con.execute('SELECT feed_name FROM feed_names WHERE '
+                              'feed_id = ? AND retrieved_at > ?',
+                              (feed_id, _timer() - _FEED_NAME_TTL)).fetchone()
+        return row[0] if row else None
+
+    def put_name(self, feed_id, feed_name):
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO feed_names VALUES (?, ?, ?)',
+                        (feed_id, feed_name, _timer()))
+
+    def get_dates(self, feed_id):
+        ### Return (start_date, end_date) if they haven't expired; otherwise
+        ### None
+        with self._connect() as con:
+            row = con.execute('SELECT start_date, end_date, retrieved_at FROM '
+                              'calendar_dates WHERE feed_id = ? AND '
+                              'retrieved_at > ?',
+                              (feed_id, _timer() - _ARCHIVE_DATES_TTL)
+                              ).fetchone()
+
+        if row and _dt.date.fromtimestamp(row[2]) == _dt.date.today():
+            return tuple(_dt.date.fromisoformat(date) for date in row[:2])
+
+    def put_dates(self, feed_id, start_date, end_date):
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO calendar_dates VALUES '
+                        '(?, ?, ?, ?)',
+                        (feed_id, start_date.isoformat(), end_date.isoformat(),
+                         _timer()))
 
 #-----------------------------------------------------------------------------
-# _calendar_to_be_refreshed
+# _LoginCache
 #-----------------------------------------------------------------------------
-class _calendar_to_be_refreshed(object):
+class _LoginCache(_SQLiteStore):
+    # Broadcastify login cookies, keyed by username, so that logging in (over
+    # http or in a browser) happens once rather than every run. An entry
+    # expires when its first cookie does, or after _LOGIN_TTL. The cookies
+    # are stored in plain text, so the database file is readable only by its
+    # owner.
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS login_cookies (
+            username TEXT PRIMARY KEY,
+            cookies TEXT NOT NULL,
+            expires_at REAL NOT NULL);
     """
-    A CUSTOM Selenium expectation for checking whether the calendar has been
-    refreshed.
+    _FILE_MODE = 0o600
+
+    def get(self, username):
+        ### Return a list of cookie dicts (keyword arguments for
+        ### RequestsCookieJar.set), or None if none are cached & unexpired
+        with self._connect() as con:
+            row = con.execute('SELECT cookies FROM login_cookies WHERE '
+                              'username = ? AND expires_at > ?',
+                              (username, _timer())).fetchone()
+        if row:
+            return _json.loads(row[0])
+
+    def put(self, username, cookie_jar):
+        cookies = [{'name': cookie.name, 'value': cookie.value,
+                    'domain': cookie.domain, 'path': cookie.path,
+                    'secure': bool(cookie.secure), 'expires': cookie.expires}
+                   for cookie in cookie_jar]
+
+        expires_at = min([_timer() + _LOGIN_TTL] +
+                         [cookie['expires'] for cookie in cookies
+                          if cookie['expires']])
+
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO login_cookies VALUES (?, ?, ?)',
+                        (username, _json.dumps(cookies), expires_at))
+
+    def clear(self, username):
+        with self._connect() as con:
+            con.execute('DELETE FROM login_cookies WHERE username = ?',
+                        (username,))
+
+#-----------------------------------------------------------------------------
+# _DownloadManifest
+#-----------------------------------------------------------------------------
+class _DownloadManifest(_SQLiteStore):
+    # The mp3 files downloaded into a directory, keyed by archive URI, with
+    # each file's name (relative to the directory), size, SHA-256 checksum &
+    # the HTTP status it was retrieved with. Files the server refused are
+    # recorded without a size.
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS downloads (
+            uri TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            size INTEGER,
+            checksum TEXT,
+            http_status INTEGER,
+            recorded_at REAL NOT NULL);
+        CREATE INDEX IF NOT EXISTS downloads_name ON downloads (name);
     """
-    def __init__(self, displayed_month, active_day):
-        self.active_day = active_day
-        self.displayed_month = displayed_month
 
-    def __call__(self, driver):
-        is_fresh = False
+    def __init__(self, directory):
+        super().__init__(directory, _MANIFEST_DB_NAME)
+
+    def get_many(self, uris):
+        ### Return {uri: {'name', 'size', 'checksum'}} for each of `uris`
+        ### that has a record
+        records = {}
+        uris = list(uris)
+
+        with self._connect() as con:
+            # Stay under SQLite's limit on the number of query parameters
+            for i in range(0, len(uris), 500):
+                batch = uris[i:i + 500]
+                for uri, name, size, checksum in con.execute(
+                        f'SELECT uri, name, size, checksum FROM downloads '
+                        f'WHERE uri IN ({", ".join("?" * len(batch))})',
+                        batch):
+                    records[uri] = {'name': name, 'size': size,
+                                    'checksum': checksum}
+
+        return records
+
+    def get_owners(self, names):
+        ### Return {name: uri} for each of the file `names` that's recorded
+        owners = {}
+        names = list(names)
+
+        with self._connect() as con:
+            for i in range(0, len(names), 500):
+                batch = names[i:i + 500]
+                owners.update((name, uri) for uri, name in con.execute(
+                    f'SELECT uri, name FROM downloads '
+                    f'WHERE name IN ({", ".join("?" * len(batch))})',
+                    batch))
+
+        return owners
+
+    def record(self, uri, name, size=None, checksum=None, http_status=None):
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO downloads VALUES '
+                        '(?, ?, ?, ?, ?, ?)',
+                        (uri, name, size, checksum, http_status, _timer()))
+
+#-----------------------------------------------------------------------------
+# _Mp3UrlCache
+#-----------------------------------------------------------------------------
+class _Mp3UrlCache(_SQLiteStore):
+    # mp3 file URLs resolved from archive entries' download pages, keyed by
+    # archive URI. URLs expire after `ttl` seconds; once the cache holds more
+    # than `max_size` URLs, the oldest are evicted.
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS mp3_urls (
+            uri TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            resolved_at REAL NOT NULL);
+        CREATE INDEX IF NOT EXISTS mp3_urls_resolved_at
+            ON mp3_urls (resolved_at);
+    """
+
+    def __init__(self, cache_dir, ttl=_MP3_URL_TTL,
+                 max_size=_MP3_URL_CACHE_SIZE):
+        super().__init__(cache_dir)
+        self.ttl = ttl
+        self.max_size = max_size
+
+    def get_many(self, uris):
+        ### Return {uri: url} for each of `uris` with an unexpired URL. Also
+        ### evicts expired & excess URLs, since it's called once per download
+        self._evict()
+
+        cached_urls = {}
+        uris = list(uris)
+
+        with self._connect() as con:
+            # Stay under SQLite's limit on the number of query parameters
+            for i in range(0, len(uris), 500):
+                batch = uris[i:i + 500]
+                cached_urls.update(con.execute(
+                    f'SELECT uri, url FROM mp3_urls WHERE resolved_at > ? '
+                    f'AND uri IN ({", ".join("?" * len(batch))})',
+                    [_timer() - self.ttl] + batch).fetchall())
+
+        return cached_urls
+
+    def put(self, uri, url):
+        with self._connect() as con:
+            con.execute('INSERT OR REPLACE INTO mp3_urls VALUES (?, ?, ?)',
+                        (uri, url, _timer()))
+
+    def invalidate(self, uri):
+        with self._connect() as con:
+            con.execute('DELETE FROM mp3_urls WHERE uri = ?', (uri,))
+
+    def _evict(self):
+        with self._connect() as con:
+            con.execute('DELETE FROM mp3_urls WHERE resolved_at <= ?',
+                        (_timer() - self.ttl,))
+            con.execute('DELETE FROM mp3_urls WHERE uri NOT IN (SELECT uri '
+                        'FROM mp3_urls ORDER BY resolved_at DESC LIMIT ?)',
+                        (self.max_size,))
+
+
+
+
+
+#-----------------------------------------------------------------------------
+#-----------------------------------------------------------------------------
+#
+# Helper Functions
+#-----------------------------------------------------------------------------
 
-        try:
-            # Check for displayed_month changes first
-            is_fresh = driver.find_element_by_class_name(
-                        'datepicker-switch').text != self.displayed_month
-
-            # If that hasn't changed...
-            if not is_fresh:
-                # ...see if the active day has
-                is_fresh = driver.find_element_by_class_name(
-                            'active').text != self.active_day
-        except:
-            is_fresh = False
 
-        return is_fresh
+#-----------------------------------------------------------------------------
+# _read_login_cfg
+#-----------------------------------------------------------------------------
+def _read_login_cfg(login_cfg_path, username=None, password=None):
+    # Return (username, password), filling in whichever wasn't passed from the
+    # [authentication_data] section of the config file at login_cfg_path
+    _config = _ConfigParser()
+    config_result = _config.read(login_cfg_path)
+
+    if len(config_result) != 0:
+        # Replace only if argument was not passed
+        if not(username):
+            username = _config['authentication_data']['username']
+        if not(password):
+            password = _config['authentication_data']['password']
+
+    return username, password
+
+#-----------------------------------------------------------------------------
+# _start_browser
+#-----------------------------------------------------------------------------
+def _start_browser(webdriver_path, show_browser_ui=False):
+    # Launch & return a Chrome webdriver
+    # Set whether to show browser UI while fetching
+    options = _Options()
+    if not show_browser_ui:
+        options.add_argument('--headless')
+        options.add_argument('--disable-gpu')
+
+    return _webdriver.Chrome(executable_path=webdriver_path,
+                             chrome_options=options)
+
+#-----------------------------------------------------------------------------
+# _authenticate_session
+#-----------------------------------------------------------------------------
+def _authenticate_session(session, username, password, throttle,
+                          login_cache=None, force=False, stale_login=None):
+    # Log an HTTP session in to Broadcastify, unless it's already logged in as
+    # `username`. Unexpired cookies from login_cache are used if available;
+    # otherwise the login form is posted & the resulting cookies are cached.
+    # `force` ignores both the session's & the cache's login. With
+    # `stale_login` (the session's _login_count when its login was refused),
+    # a forced login is skipped if another thread has logged in since.
+    if not username or not password:
+        raise NavigatorException(f"Login credentials were not supplied or are "
+                                 f"incomplete: username={username}; "
+                                 f"password_supplied={bool(password)}")
+
+    with _SESSION_LOGIN_LOCK:
+        if not force and getattr(session, '_btk_username', None) == username:
+            return
+        if stale_login is not None and _login_count(session) != stale_login:
+            return
+
+        cookies = None
+        if login_cache is not None and not force:
+            cookies = login_cache.get(username)
+
+        if cookies:
+            for cookie in cookies:
+                session.cookies.set(**cookie)
+        else:
+            _post_login(session, username, password, throttle)
+
+            if login_cache is not None:
+                login_cache.put(username, session.cookies)
+
+        # Remember the login, so archives sharing the session don't repeat it
+        session._btk_username = username
+        session._btk_login_cached = bool(cookies)
+        session._btk_logins = _login_count(session) + 1
+
+#-----------------------------------------------------------------------------
+# _login_count
+#-----------------------------------------------------------------------------
+def _login_count(session):
+    # The number of times an HTTP session has been logged in, which tells
+    # whether it has logged in again since a page was fetched
+    return getattr(session, '_btk_logins', 0)
+
+#-----------------------------------------------------------------------------
+# _post_login
+#-----------------------------------------------------------------------------
+def _post_login(session, username, password, throttle):
+    # Log the session in to Broadcastify
+    # Set post parameters
+    login_data = {
+        'username': username,
+        'password': password,
+        'action': 'auth',
+        'redirect': '/'
+    }
+
+    throttle.throttle('page')
+    r = session.post(_LOGIN_URL, data=login_data, timeout=_HTTP_TIMEOUT)
+
+    if r.status_code != 200:
+        raise ConnectionError(f'Encountered a problem connecting while logging '
+                              f'in: code = {r.status_code}')
+    # Check successful login
+    soup = _BeautifulSoup(r.text, 'lxml')
+
+    if soup(text='Log in Failed!'):
+        raise NavigatorException(f'Login credentials rejected by the '
+                                 f'server.')
+
+#-----------------------------------------------------------------------------
+# _log_in_browser
+#-----------------------------------------------------------------------------
+def _log_in_browser(browser, session, username, password, throttle,
+                    login_cache=None):
+    # Log the browser in to Broadcastify by copying in the cookies of the
+    # (logged-in) HTTP session. If the session can't log in over http, use the
+    # browser's login form instead.
+    try:
+        _authenticate_session(session, username, password, throttle,
+                              login_cache)
+    except (OSError, _requests.RequestException):
+        _submit_login_form(browser, username, password)
+        return
+
+    # Cookies can only be added for the domain the browser is on
+    browser.get(_BROADCASTIFY_URL)
+
+    for cookie in session.cookies:
+        if not cookie.domain.lstrip('.').endswith('broadcastify.com'):
+            continue
+
+        browser_cookie = {'name': cookie.name, 'value': cookie.value,
+                          'path': cookie.path, 'secure': bool(cookie.secure),
+                          'domain': cookie.domain}
+        if cookie.expires:
+            browser_cookie['expiry'] = int(cookie.expires)
+
+        browser.add_cookie(browser_cookie)
+
+#-----------------------------------------------------------------------------
+# _submit_login_form
+#-----------------------------------------------------------------------------
+def _submit_login_form(browser, username, password):
+    # Log the browser in to Broadcastify through the login form, waiting for
+    # each step to be ready rather than for a fixed time
+    wait = _WebDriverWait(browser, _LOGIN_FORM_WAIT)
+
+    browser.get(_LOGIN_URL)
+    username_field = wait.until(_EC.visibility_of_element_located((
+                                _By.ID, 'signinSrEmail')))
+    username_field.clear()
+    username_field.send_keys(username)
+
+    password_field = wait.until(_EC.visibility_of_element_located((
+                                _By.ID, 'signinSrPassword')))
+    password_field.clear()
+    password_field.send_keys(password)
+
+    wait.until(_EC.element_to_be_clickable((
+               _By.CSS_SELECTOR, '.btn.btn-primary.transition-3d-hover'))
+               ).click()
+
+    # Logging in redirects away from the login page
+    wait.until(_EC.url_changes(_LOGIN_URL))
+
+#-----------------------------------------------------------------------------
+# _new_session
+#-----------------------------------------------------------------------------
+def _new_session(pool_size=_HTTP_POOL_SIZE, retries=_HTTP_RETRIES):
+    # Return a requests.Session that keeps up to `pool_size` connections per
+    # host alive for reuse, and retries idempotent requests with exponential
+    # backoff after connection errors. (Error responses are left to
+    # _RetryPolicy, which knows which requests are worth retrying.)
+    retry = _Retry(total=retries, backoff_factor=_HTTP_BACKOFF_FACTOR,
+                   status=0, raise_on_status=False)
+    adapter = _HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                           max_retries=retry)
+
+    session = _requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+#-----------------------------------------------------------------------------
+# _scrape_table
+#-----------------------------------------------------------------------------
+def _scrape_table(browser, selector, attrs):
+    # Return the first <table> on the browser's page that matches the CSS
+    # `selector` (and the equivalent bs4 `attrs`) as a bs4 Tag. Only the
+    # table's own html is fetched & parsed, rather than the whole page.
+    html = browser.execute_script(_OUTER_HTML_SCRIPT, selector)
+
+    if html:
+        return _BeautifulSoup(html, 'lxml').find('table')
+
+    # Fall back to the page source, still parsing only the <table> tags
+    soup = _BeautifulSoup(browser.page_source, 'lxml',
+                          parse_only=_SoupStrainer('table'))
+
+    return soup.find('table', attrs)
+
+#-----------------------------------------------------------------------------
+# _classify_error
+#-----------------------------------------------------------------------------
+def _classify_error(error):
+    # Classify a failed request's exception as 'transient' (worth retrying),
+    # 'rate_limited' (retry more slowly) or 'permanent'
+    if isinstance(error, _ResponseError):
+        if error.status in _RATE_LIMIT_STATUSES:
+            return 'rate_limited'
+        elif error.status in _TRANSIENT_STATUSES:
+            # A 503 that says when to come back is also rate limiting
+            if error.status == 503 and error.retry_after is not None:
+                return 'rate_limited'
+            return 'transient'
+        return 'permanent'
+
+    if isinstance(error, (NavigatorException, _MissingMp3Error)):
+        return 'permanent'
+
+    # Network trouble, including downloads cut short (ConnectionError)
+    if isinstance(error, (ConnectionError, TimeoutError, _asyncio.TimeoutError,
+                          _requests.ConnectionError, _requests.Timeout,
+                          _requests.exceptions.ChunkedEncodingError)):
+        return 'transient'
+
+    if _aiohttp is not None and isinstance(error, _aiohttp.ClientError):
+        return 'transient'
+
+    # e.g. the output directory is full or not writable
+    return 'permanent'
+
+#-----------------------------------------------------------------------------
+# _retry_after
+#-----------------------------------------------------------------------------
+def _retry_after(headers):
+    # The number of seconds a response's Retry-After header asks the client to
+    # wait (given as seconds or an HTTP date); None if there isn't one
+    value = (headers or {}).get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = _parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+    return max(0, (retry_at - _dt.datetime.now(retry_at.tzinfo)
+                   ).total_seconds())
+
+#-----------------------------------------------------------------------------
+# _fail_result
+#-----------------------------------------------------------------------------
+def _fail_result(result, error):
+    # Mark a download result dict as failed because of `error`
+    result['status'] = 'failed'
+    result['error'] = error
+    result['error_type'] = _classify_error(error)
+
+#-----------------------------------------------------------------------------
+# _hash_file
+#-----------------------------------------------------------------------------
+def _hash_file(path):
+    # Return the SHA-256 hex digest of a file, reading it in chunks
+    checksum = _hashlib.sha256()
+
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_DOWNLOAD_CHUNK_SIZE), b''):
+            checksum.update(chunk)
+
+    return checksum.hexdigest()
+
+#-----------------------------------------------------------------------------
+# _file_matches
+#-----------------------------------------------------------------------------
+def _file_matches(path, record):
+    # Whether a file has the size & (if recorded) checksum in its manifest
+    # record
+    if _os.path.getsize(path) != record['size']:
+        return False
+
+    return record['checksum'] is None or _hash_file(path) == record['checksum']
+
+#-----------------------------------------------------------------------------
+# _range_total
+#-----------------------------------------------------------------------------
+def _range_total(headers):
+    # The complete size of the file, from a response's Content-Range header
+    # (e.g. "bytes */1234" on a 416); None if it isn't given
+    match = _re.search(r'/(\d+)$', headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+#-----------------------------------------------------------------------------
+# _partial_size
+#-----------------------------------------------------------------------------
+def _partial_size(partial_path):
+    # The size of an earlier attempt's partial download; 0 if there isn't one
+    try:
+        return _os.path.getsize(partial_path)
+    except FileNotFoundError:
+        return 0
+
+#-----------------------------------------------------------------------------
+# _adopt_file / _restore_file
+#-----------------------------------------------------------------------------
+def _adopt_file(path, partial_path):
+    # Move a file that's already at `path` (but not in the manifest) to
+    # `partial_path`, to be resumed; returns whether there was one to move
+    if _os.path.exists(partial_path) or not _os.path.exists(path):
+        return False
+
+    _os.replace(path, partial_path)
+    return True
+
+def _restore_file(path, partial_path):
+    # Put an adopted file back at `path`, if its download didn't finish
+    if _os.path.exists(partial_path) and not _os.path.exists(path):
+        _os.replace(partial_path, path)
+
+#-----------------------------------------------------------------------------
+# _range_start
+#-----------------------------------------------------------------------------
+def _range_start(headers):
+    # The offset of the first byte sent, from a 206 response's Content-Range
+    # header (e.g. "bytes 1000-1233/1234"); None if it isn't given
+    match = _re.match(r'\s*bytes\s+(\d+)-', headers.get('Content-Range', ''))
+    return int(match.group(1)) if match else None
+
+#-----------------------------------------------------------------------------
+# _past
+#-----------------------------------------------------------------------------
+def _past(deadline):
+    # Whether an optional deadline (a datetime) has passed
+    return deadline is not None and _dt.datetime.now() >= deadline
+
+#-----------------------------------------------------------------------------
+# _mp3_data_rate
+#-----------------------------------------------------------------------------
+def _mp3_data_rate(downloaded):
+    # The bytes per second of audio of the downloaded files, from (entry,
+    # size) pairs; _MP3_BYTES_PER_SECOND if there are none to go on
+    total_size = sum(size for _, size in downloaded if size)
+    total_seconds = sum((entry['end_time'] - entry['start_time']
+                         ).total_seconds()
+                        for entry, size in downloaded if size)
+
+    if total_size and total_seconds > 0:
+        return total_size / total_seconds
+
+    return _MP3_BYTES_PER_SECOND
+
+#-----------------------------------------------------------------------------
+# _estimated_size
+#-----------------------------------------------------------------------------
+def _estimated_size(entry, bytes_per_second):
+    # The estimated size in bytes of an archive entry's mp3 file
+    seconds = (entry['end_time'] - entry['start_time']).total_seconds()
+    return int(max(seconds, 1) * bytes_per_second)
+
+#-----------------------------------------------------------------------------
+# _next_windows
+#-----------------------------------------------------------------------------
+def _next_windows(windows, now, n):
+    # The next n (start, end) datetimes of the daily (start time, end time)
+    # windows, from `now`; a window already open starts at `now`. Windows
+    # that overlap or touch are merged, so no time is scheduled twice.
+    for window in windows:
+        if not (len(window) == 2 and
+                all(isinstance(each, _dt.time) for each in window)):
+            raise TypeError(f'Download windows must be (start, end) pairs of '
+                            f'datetime.time, not {window!r}.')
+
+    if not windows:
+        raise ValueError(f'At least one download window must be given.')
+
+    # Every day from yesterday (whose windows may run past midnight) has at
+    # least one window, so n + 2 days give at least n windows after `now`
+    occurrences = []
+    day = now.date() - _dt.timedelta(days=1)
+    for _ in range(n + 2):
+        for start_time, end_time in windows:
+            start = _dt.datetime.combine(day, start_time)
+            end = _dt.datetime.combine(day, end_time)
+            if end <= start:
+                # The window runs past midnight
+                end += _dt.timedelta(days=1)
+
+            occurrences.append((start, end))
+        day += _dt.timedelta(days=1)
+
+    merged = []
+    for start, end in sorted(occurrences):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+
+    return [(max(start, now), end) for start, end in merged if end > now][:n]
+
+#-----------------------------------------------------------------------------
+# _prometheus_labels
+#-----------------------------------------------------------------------------
+def _prometheus_labels(labels):
+    # Format a metric's labels for the Prometheus text format, e.g.
+    # '{type="page"}'; '' if there are none
+    if not labels:
+        return ''
+
+    escaped = {name: str(value).replace('\\', r'\\').replace('"', r'\"'
+                                         ).replace('\n', r'\n')
+               for name, value in labels.items()}
+
+    return '{' + ','.join(f'{name}="{value}"'
+                          for name, value in escaped.items()) + '}'
+
+#-----------------------------------------------------------------------------
+# _to_epoch / _from_epoch
+#-----------------------------------------------------------------------------
+def _to_epoch(time):
+    # Convert a naive datetime (or date, taken as midnight) to whole seconds
+    # since _EPOCH
+    if not isinstance(time, _dt.datetime):
+        time = _dt.datetime.combine(time, _dt.time())
+
+    return (time - _EPOCH) // _dt.timedelta(seconds=1)
+
+def _from_epoch(seconds):
+    return _EPOCH + _dt.timedelta(seconds=seconds)
+
+#-----------------------------------------------------------------------------
+# _entry_datetimes
+#-----------------------------------------------------------------------------
+def _entry_datetimes(date, times):
+    # Convert an archive entry's start & end times, as 'HH:MM AM/PM' strings
+    # listed on `date`, to a tuple of datetimes
+
+    # Get time objects from the HH:MM AM/PM text
+    hhmm_start, hhmm_end = [ _dt.datetime.strptime(each, '%I:%M %p').time()
+                            for each in times]
+
+    # Set the end time
+    end = _dt.datetime.combine(date, hhmm_end)
+
+    # If the start time is bigger than the end time, the archive starts on
+    # the previous day
+    if hhmm_start > hhmm_end:
+        date -= _dt.timedelta(days=1)
+        start = _dt.datetime.combine(date, hhmm_start)
+    else:
+        start = _dt.datetime.combine(date, hhmm_start)
+
+    return (start, end)
@@ -14,6 +14,9 @@ setuptools.setup(
     url="https://github.com/ljhopkins2/broadcastify-archtk",
     packages=setuptools.find_packages(),
     install_requires=[i.strip() for i in open("requirements.txt").readlines()],
+    extras_require={
+        "async": ["aiohttp>=3.6"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: GNU Affero General Public License v3",
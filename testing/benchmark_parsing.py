@@ -0,0 +1,148 @@
+"""
+Micro-benchmark of the per-date parsing cost of building an archive.
+
+Each date visited during .build re-scrapes the archive calendar and the
+archiveTimes table (ATT). This compares parsing the whole page source with
+BeautifulSoup (as the toolkit used to) against parsing only each table's own
+html, which is what ArchiveCalendar/ArchiveTimesTable._scrape_contents now
+fetch from the browser. A synthetic archive page, padded to roughly the size
+of a real Broadcastify archive page, stands in for the browser.
+
+Usage:
+    python benchmark_parsing.py [--repeat N] [--page-kb KB]
+"""
+import argparse
+import datetime as dt
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'code'))
+
+from bs4 import BeautifulSoup
+from broadcastify_archtk import btk
+
+
+def calendar_html(date):
+    # A datepicker calendar for date's month, with date as the active day
+    first = date.replace(day=1)
+    cells = ['<td class="old disabled day">{}</td>'.format(30 - i)
+             for i in range(first.weekday(), 0, -1)]
+    day = first
+    while day.month == date.month:
+        css = 'active day' if day == date else 'day'
+        cells.append('<td class="{}">{}</td>'.format(css, day.day))
+        day += dt.timedelta(days=1)
+
+    rows = ''.join('<tr>' + ''.join(cells[i:i + 7]) + '</tr>'
+                   for i in range(0, len(cells), 7))
+
+    return ('<table class="table-condensed"><thead><tr>'
+            '<th class="prev">&laquo;</th>'
+            '<th colspan="5" class="datepicker-switch">{} {}</th>'
+            '<th class="next">&raquo;</th></tr></thead>'
+            '<tbody>{}</tbody></table>').format(btk._MONTHS[date.month],
+                                                date.year, rows)
+
+
+def att_html(n_entries=48):
+    # An archiveTimes table with n_entries half-hour archive files
+    rows = []
+    for i in range(n_entries):
+        start = dt.datetime(2020, 1, 1) + dt.timedelta(minutes=30 * i)
+        end = start + dt.timedelta(minutes=30)
+        rows.append('<tr><td><a class="cursor-link" href="/archives/'
+                    'downloadv2/{}">{}</a></td><td>{}</td><td>{}</td></tr>'
+                    .format(2020000000 + i, i,
+                            start.strftime('%I:%M %p'),
+                            end.strftime('%I:%M %p')))
+
+    return ('<table id="archiveTimes" class="table-sm table-striped '
+            'table-bordered table-hover compact dataTable no-footer">'
+            '<thead><tr><th>File</th><th>Start</th><th>End</th></tr></thead>'
+            '<tbody>{}</tbody></table>').format(''.join(rows))
+
+
+def page_html(calendar, att, page_kb):
+    # Wrap the tables in enough navigation, script & footer markup to make
+    # the page about page_kb kilobytes, like the real archive page
+    filler_item = ('<li class="nav-item"><a class="nav-link" href="/listen/'
+                   'ctid/{0}">County {0}</a></li>')
+    filler = []
+    size = 0
+    i = 0
+    while size < page_kb * 1024:
+        item = filler_item.format(i)
+        filler.append(item)
+        size += len(item)
+        i += 1
+
+    half = len(filler) // 2
+
+    return ('<html><head><script>var x = 1;</script></head><body>'
+            '<nav><ul>{}</ul></nav><div class="container"><div class="row">'
+            '<div class="col-md-4"><div class="datepicker">{}</div></div>'
+            '<div class="col-md-8">{}</div></div></div>'
+            '<footer><ul>{}</ul></footer></body></html>'
+            ).format(''.join(filler[:half]), calendar, att,
+                     ''.join(filler[half:]))
+
+
+class FakeBrowser:
+    # Just enough of a webdriver for _scrape_table
+    def __init__(self, page_source):
+        self.page_source = page_source
+
+    def execute_script(self, script, selector):
+        if selector == 'table.table-condensed':
+            pattern = r'<table class="table-condensed">.*?</table>'
+        else:
+            pattern = r'<table id="archiveTimes".*?</table>'
+        return re.search(pattern, self.page_source, re.S).group(0)
+
+
+def full_page_parse(browser):
+    # The toolkit's previous approach: parse the whole page for each table
+    soup = BeautifulSoup(browser.page_source, 'lxml')
+    calendar = soup.find('table', {'class': 'table-condensed'})
+    soup = BeautifulSoup(browser.page_source, 'lxml')
+    att = soup.find('table', attrs={'id': 'archiveTimes'}).find('tbody')
+    return calendar, att
+
+
+def table_parse(browser):
+    calendar = btk._scrape_table(browser, 'table.table-condensed',
+                                 {'class': 'table-condensed'})
+    att = btk._scrape_table(browser, 'table#archiveTimes',
+                            {'id': 'archiveTimes'}).find('tbody')
+    return calendar, att
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='number of simulated dates to parse')
+    parser.add_argument('--page-kb', type=int, default=150,
+                        help='approximate size of the archive page')
+    args = parser.parse_args()
+
+    browser = FakeBrowser(page_html(calendar_html(dt.date(2020, 1, 15)),
+                                    att_html(), args.page_kb))
+
+    # Both approaches must find the same tables
+    old, new = full_page_parse(browser), table_parse(browser)
+    assert [str(tag) for tag in old] == [str(tag) for tag in new]
+
+    print(f'Page size: {len(browser.page_source) / 1024:,.0f} KB; '
+          f'{args.repeat} dates')
+
+    for name, func in [('full page source', full_page_parse),
+                       ('table html only', table_parse)]:
+        seconds = timeit.timeit(lambda: func(browser), number=args.repeat)
+        print(f'  {name:<18}{1000 * seconds / args.repeat:8.2f} ms per date')
+
+
+if __name__ == '__main__':
+    main()
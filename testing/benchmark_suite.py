@@ -0,0 +1,287 @@
+"""
+Offline benchmarks of building an archive & downloading its mp3 files.
+
+Runs the toolkit against a local mock Broadcastify server (see
+mock_broadcastify.py) with injected per-request latency & bandwidth limits,
+and reports:
+  - build: per-date latency of .build with the http backend
+  - download: get_archive_mp3s throughput (files/s & MB/s), for each worker
+    count, and for the asyncio downloader if aiohttp is installed; plus the
+    cost of re-running a download whose files all exist
+  - parse: per-call cost of parsing archive times JSON & download pages, and
+    of the browser backend's table parsing (see benchmark_parsing.py)
+  - metrics: each run's MetricsRegistry snapshot (in the --json output only)
+  - memory: peak Python memory of each build & download run (with --memory;
+    tracing slows the runs, so compare timings only between like runs)
+
+The browser (webdriver) backend isn't covered, since it needs a real browser;
+its parse cost is measured on synthetic tables instead.
+
+Usage:
+    python benchmark_suite.py [--only build,download,parse] [--days N]
+                              [--build-workers N] [--files N] [--workers 1,4]
+                              [--latency-ms MS] [--bandwidth-kbps KBPS]
+                              [--mp3-kb KB] [--repeat N]
+                              [--throttle unlimited|default|adaptive]
+                              [--memory] [--json PATH]
+"""
+import argparse
+import asyncio
+import datetime as dt
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'code'))
+
+from bs4 import BeautifulSoup
+from broadcastify_archtk import btk
+
+import benchmark_parsing
+from mock_broadcastify import MockBroadcastify, patch_urls
+
+
+FEED_ID = '1'
+
+
+class _FakeResponse:
+    # Just enough of a requests.Response for ArchiveTimesClient._parse_entries
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def new_archive(args):
+    archive = btk.BroadcastifyArchive(FEED_ID, username='benchmark',
+                                      password='benchmark',
+                                      archive_dates='retention',
+                                      verbose=False,
+                                      adaptive_throttle=(args.throttle
+                                                         == 'adaptive'))
+    if args.throttle == 'unlimited':
+        for type in ('page', 'file', 'date_nav'):
+            archive.throttle.set_rate(type, 1e6, 1e6)
+
+    return archive
+
+
+def measure(func, memory):
+    # Run func; return its result, the elapsed seconds & (if
+    # `memory`) the peak traced memory in bytes
+    if memory:
+        tracemalloc.start()
+
+    try:
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+
+    return result, seconds, peak
+
+
+def bench_build(args, server):
+    archive = new_archive(args)
+    archive.feed_name  # Not part of the per-date cost
+
+    before = server.requests['archive_times']
+    _, seconds, peak = measure(lambda: archive.build(
+                                   days_back=args.days - 1, backend='http',
+                                   max_workers=args.build_workers),
+                               args.memory)
+    dates = server.requests['archive_times'] - before
+
+    return {'dates': dates,
+            'entries': len(archive.entries),
+            'seconds': seconds,
+            'ms_per_date': 1000 * seconds / dates,
+            'peak_mb': peak / 2**20 if peak is not None else None,
+            'metrics': archive.metrics.snapshot()}
+
+
+def bench_download(args, server, entries, max_workers, use_async):
+    archive = new_archive(args)
+    output_path = tempfile.mkdtemp(prefix='btk_benchmark_') + os.sep
+
+    if use_async:
+        async def download():
+            async with btk.AsyncArchiveDownloader(
+                    archive, login=True, username=archive.username,
+                    password=archive.password) as downloader:
+                return await downloader.get_archive_mp3s(
+                    entries, output_path, max_workers=max_workers)
+
+        def run():
+            return asyncio.run(download())
+    else:
+        def run():
+            downloader = btk.ArchiveDownloader(archive, login=True,
+                                               username=archive.username,
+                                               password=archive.password)
+            return downloader.get_archive_mp3s(entries, output_path,
+                                               max_workers=max_workers)
+
+    try:
+        results, seconds, peak = measure(run, args.memory)
+        downloaded = [r for r in results if r['status'] == 'downloaded']
+        megabytes = sum(r['size'] or 0 for r in downloaded) / 2**20
+        metrics = archive.metrics.snapshot()
+
+        # Everything is on disk now, so a re-run only plans & skips
+        _, rerun_seconds, _ = measure(run, False)
+    finally:
+        shutil.rmtree(output_path, ignore_errors=True)
+
+    return {'client': 'asyncio' if use_async else 'threads',
+            'max_workers': max_workers,
+            'files': len(downloaded),
+            'failed': len(results) - len(downloaded),
+            'seconds': seconds,
+            'files_per_s': len(downloaded) / seconds,
+            'mb_per_s': megabytes / seconds,
+            'rerun_ms': 1000 * rerun_seconds,
+            'peak_mb': peak / 2**20 if peak is not None else None,
+            'metrics': metrics}
+
+
+def bench_parse(args, server):
+    date = dt.date(2020, 1, 15)
+    times_json = json.dumps(server.archive_times(FEED_ID, date))
+    page = ('<html><body><a href="{}/mp3/x.mp3">Download</a></body></html>'
+            .format(server.url))
+    archive = new_archive(args)
+    client = btk.ArchiveTimesClient(archive)
+    downloader = btk.ArchiveDownloader(archive)
+    browser = benchmark_parsing.FakeBrowser(benchmark_parsing.page_html(
+        benchmark_parsing.calendar_html(date), benchmark_parsing.att_html(),
+        150))
+
+    funcs = {
+        'archive_times_json': lambda: client._parse_entries(
+            _FakeResponse(times_json), date),
+        'download_page': lambda: downloader._parse_mp3_path(
+            BeautifulSoup(page, 'lxml')),
+        'browser_tables': lambda: benchmark_parsing.table_parse(browser),
+    }
+
+    return {name: 1000 * timeit.timeit(func, number=args.repeat) / args.repeat
+            for name, func in funcs.items()}
+
+
+def report(results):
+    if 'build' in results:
+        r = results['build']
+        print(f"Build: {r['dates']} dates, {r['entries']} entries in "
+              f"{r['seconds']:.2f} s ({r['ms_per_date']:.1f} ms per date)"
+              + (f"; peak {r['peak_mb']:.1f} MB" if r['peak_mb'] else ''))
+
+    if 'download' in results:
+        print('Download:')
+        for r in results['download']:
+            print(f"  {r['client']:<8}{r['max_workers']:>3} workers: "
+                  f"{r['files']} files in {r['seconds']:.2f} s "
+                  f"({r['files_per_s']:.1f} files/s, "
+                  f"{r['mb_per_s']:.1f} MB/s); re-run {r['rerun_ms']:.0f} ms"
+                  + (f"; peak {r['peak_mb']:.1f} MB" if r['peak_mb'] else '')
+                  + (f"; {r['failed']} FAILED" if r['failed'] else ''))
+
+    if 'parse' in results:
+        print('Parse (ms per call):')
+        for name, ms in results['parse'].items():
+            print(f'  {name:<20}{ms:8.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--only', default='build,download,parse',
+                        help='comma-separated benchmarks to run')
+    parser.add_argument('--days', type=int, default=30,
+                        help='number of dates to build')
+    parser.add_argument('--build-workers', type=int, default=1,
+                        help='max_workers for the build')
+    parser.add_argument('--files', type=int, default=40,
+                        help='number of mp3 files to download per run')
+    parser.add_argument('--workers', default='1,4',
+                        help='comma-separated max_workers values to compare')
+    parser.add_argument('--latency-ms', type=float, default=20,
+                        help='latency added to every server response')
+    parser.add_argument('--bandwidth-kbps', type=float, default=0,
+                        help='per-file transfer rate in KB/s (0: unlimited)')
+    parser.add_argument('--mp3-kb', type=int, default=512,
+                        help='size of each mp3 file')
+    parser.add_argument('--throttle', default='unlimited',
+                        choices=['unlimited', 'default', 'adaptive'],
+                        help="the toolkit's request throttle: lifted, the "
+                             "default rates, or adaptive_throttle=True")
+    parser.add_argument('--repeat', type=int, default=200,
+                        help='number of calls per parse benchmark')
+    parser.add_argument('--memory', action='store_true',
+                        help='trace peak memory of build & download runs')
+    parser.add_argument('--json', metavar='PATH',
+                        help='also write the results to a JSON file')
+    args = parser.parse_args()
+
+    benchmarks = args.only.split(',')
+    workers = [int(w) for w in args.workers.split(',')]
+    clients = [False] + ([True] if btk._aiohttp is not None else [])
+
+    server = MockBroadcastify(latency=args.latency_ms / 1000,
+                              bandwidth=args.bandwidth_kbps * 1024,
+                              mp3_size=args.mp3_kb * 1024)
+    patch_urls(btk, server.url)
+
+    print(f'Mock server at {server.url}: {args.latency_ms:g} ms latency, '
+          + (f'{args.bandwidth_kbps:g} KB/s per file'
+             if args.bandwidth_kbps else 'unlimited bandwidth')
+          + f'; {args.throttle} throttle\n')
+
+    results = {'settings': vars(args)}
+    with server:
+        if 'build' in benchmarks:
+            results['build'] = bench_build(args, server)
+
+        if 'download' in benchmarks:
+            # Entries for the days before today, parsed as the http backend
+            # would
+            client = btk.ArchiveTimesClient(new_archive(args))
+            today = dt.date.today()
+            entries = []
+            for day in range(1, args.files // server.entries_per_day + 2):
+                date = today - dt.timedelta(days=day)
+                times = json.dumps(server.archive_times(FEED_ID, date))
+                entries.extend({'uri': uri, 'start_time': start,
+                                'end_time': end}
+                               for uri, start, end in client._parse_entries(
+                                   _FakeResponse(times), date))
+            entries = entries[:args.files]
+
+            results['download'] = [
+                bench_download(args, server, entries, n, use_async)
+                for use_async in clients for n in workers]
+
+        if 'parse' in benchmarks:
+            results['parse'] = bench_parse(args, server)
+
+        results['requests'] = dict(server.requests)
+
+    report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
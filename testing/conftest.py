@@ -0,0 +1,76 @@
+"""
+Shared fixtures for the toolkit's tests, which run offline against the mock
+Broadcastify server in mock_broadcastify.py.
+
+Usage (from the repository root):
+    python -m pytest testing
+"""
+import datetime as dt
+import os
+import sys
+
+import pytest
+
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'code'))
+
+from broadcastify_archtk import btk
+
+
+FEED_ID = '1'
+MP3_SIZE = 20000
+
+_URL_NAMES = ('_FEED_URL_STEM', '_ARCHIVE_FEED_STEM', '_ARCHIVE_DOWNLOAD_STEM',
+              '_BROADCASTIFY_URL', '_LOGIN_URL', '_ARCHIVE_TIMES_URL')
+
+
+def make_entries(date, n, minutes=30):
+    # n back-to-back archive entry dictionaries for `date`
+    start = dt.datetime.combine(date, dt.time())
+    return [{'uri': '{}{:%Y%m%d}{:02d}'.format(FEED_ID, date, i),
+             'start_time': start + dt.timedelta(minutes=minutes * i),
+             'end_time': start + dt.timedelta(minutes=minutes * (i + 1))}
+            for i in range(n)]
+
+
+def new_archive(**kwargs):
+    # An archive that needs no browser, prints nothing & isn't throttled
+    archive = btk.BroadcastifyArchive(FEED_ID, username='test',
+                                      password='test',
+                                      archive_dates='retention',
+                                      verbose=False, **kwargs)
+    for type in ('page', 'file', 'date_nav'):
+        archive.throttle.set_rate(type, 1e6, 1e6)
+
+    return archive
+
+
+@pytest.fixture
+def server():
+    # A running mock server, with the toolkit's URLs pointed at it. The mock
+    # is only imported here, so tests that don't use it run without it.
+    from mock_broadcastify import MockBroadcastify, patch_urls
+
+    originals = {name: getattr(btk, name) for name in _URL_NAMES
+                 if hasattr(btk, name)}
+
+    with MockBroadcastify(entries_per_day=3, mp3_size=MP3_SIZE) as server:
+        patch_urls(btk, server.url)
+        try:
+            yield server
+        finally:
+            for name in _URL_NAMES:
+                if name in originals:
+                    setattr(btk, name, originals[name])
+                elif hasattr(btk, name):
+                    delattr(btk, name)
+
+
+@pytest.fixture
+def archive(server):
+    return new_archive()
+
+
+@pytest.fixture
+def output_path(tmp_path):
+    return str(tmp_path) + os.sep
@@ -0,0 +1,223 @@
+"""
+A local stand-in for the parts of Broadcastify the toolkit talks to over
+http, for offline, reproducible benchmarks.
+
+The server answers:
+    GET  /listen/feed/<feed_id>        feed page (the feed name in span.px13)
+    GET  /archives/ajax.php            archive times JSON for ?feedId=&date=
+    GET  /archives/idv2/<uri>          an archive entry's download page
+    GET  /mp3/<uri>.mp3                a synthetic mp3 file (honors Range)
+    POST /login/                       login form (always succeeds)
+
+Every response can be delayed by a fixed latency, and mp3 files can be sent
+at a limited bandwidth. patch_urls() points the toolkit at the server.
+
+Usage:
+    with MockBroadcastify(latency=0.05, bandwidth=2 * 1024 * 1024) as server:
+        patch_urls(btk, server.url)
+        ...
+"""
+import datetime as dt
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+ENTRIES_PER_DAY = 48
+CHUNK_SIZE = 64 * 1024
+
+
+def patch_urls(btk, base_url):
+    # Point the toolkit's Broadcastify URLs at `base_url`
+    btk._FEED_URL_STEM = base_url + '/listen/feed/'
+    btk._ARCHIVE_FEED_STEM = base_url + '/archives/feed/'
+    btk._ARCHIVE_DOWNLOAD_STEM = base_url + '/archives/idv2/'
+    btk._BROADCASTIFY_URL = base_url + '/'
+    btk._LOGIN_URL = base_url + '/login/'
+    btk._ARCHIVE_TIMES_URL = base_url + '/archives/ajax.php'
+
+
+def entry_uri(feed_id, date, i):
+    # The URI of the i-th archive entry of `date`
+    return '{}{}{:02d}'.format(feed_id, date.strftime('%Y%m%d'), i)
+
+
+class MockBroadcastify:
+    def __init__(self, latency=0.0, bandwidth=0, mp3_size=512 * 1024,
+                 entries_per_day=ENTRIES_PER_DAY, feed_name='Benchmark Feed'):
+        """
+        Parameters
+        ----------
+        latency : float
+            Seconds to wait before answering each request.
+        bandwidth : int
+            Bytes per second at which mp3 files are sent; 0 for unlimited.
+        mp3_size : int
+            Size in bytes of every synthetic mp3 file.
+        entries_per_day : int
+            Number of (back-to-back) archive entries listed for each date.
+        feed_name : str
+            The name shown on every feed page.
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.mp3_size = mp3_size
+        self.entries_per_day = entries_per_day
+        self.feed_name = feed_name
+        self.requests = Counter()
+
+        # One deterministic payload, sliced for every file & range request
+        pattern = b'ID3\x03\x00\x00\x00\x00\x00\x00' + bytes(range(256))
+        self.payload = (pattern * (mp3_size // len(pattern) + 1))[:mp3_size]
+
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                           self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return 'http://{}:{}'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, route):
+        with self._lock:
+            self.requests[route] += 1
+
+    def archive_times(self, feed_id, date):
+        # The archive times JSON rows for `date`
+        rows = []
+        for i in range(self.entries_per_day):
+            start = (dt.datetime.combine(date, dt.time())
+                     + dt.timedelta(minutes=30 * i))
+            end = start + dt.timedelta(minutes=29)
+            rows.append(['<a href="/archives/downloadv2/{}">Download</a>'
+                         .format(entry_uri(feed_id, date, i)),
+                         start.strftime('%I:%M %p'),
+                         end.strftime('%I:%M %p')])
+        return {'data': rows}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(_Handler):
+            mock = server
+
+        return Handler
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep connections alive, as Broadcastify does, so connection pooling is
+    # exercised
+    protocol_version = 'HTTP/1.1'
+    mock = None
+
+    def do_GET(self):
+        time.sleep(self.mock.latency)
+        url = urlparse(self.path)
+
+        match = re.match(r'^/listen/feed/(\w+)$', url.path)
+        if match:
+            self.mock.count('feed')
+            return self._send_html('<html><body><span class="px13">{}</span>'
+                                   '</body></html>'.format(self.mock.feed_name))
+
+        if url.path == '/archives/ajax.php':
+            self.mock.count('archive_times')
+            query = parse_qs(url.query)
+            date = dt.datetime.strptime(query['date'][0], '%m/%d/%Y').date()
+            body = json.dumps(self.mock.archive_times(query['feedId'][0],
+                                                      date)).encode()
+            return self._send(200, body, 'application/json')
+
+        match = re.match(r'^/archives/idv2/(\w+)$', url.path)
+        if match:
+            self.mock.count('download_page')
+            return self._send_html('<html><body><a href="{}/mp3/{}.mp3">'
+                                   'Download</a></body></html>'
+                                   .format(self.mock.url, match.group(1)))
+
+        match = re.match(r'^/mp3/(\w+)\.mp3$', url.path)
+        if match:
+            self.mock.count('mp3')
+            return self._send_mp3()
+
+        if url.path == '/':
+            return self._send_html('<html><body></body></html>')
+
+        self._send(404, b'Not found', 'text/plain')
+
+    def do_POST(self):
+        time.sleep(self.mock.latency)
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if urlparse(self.path).path == '/login/':
+            self.mock.count('login')
+            return self._send_html('<html><body>Welcome</body></html>',
+                                   {'Set-Cookie': 'bcfyuser1=benchmark; '
+                                                  'Path=/'})
+
+        self._send(404, b'Not found', 'text/plain')
+
+    def _send_mp3(self):
+        payload = self.mock.payload
+        offset = 0
+
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+        if match:
+            offset = int(match.group(1))
+            if offset >= len(payload):
+                return self._send(416, b'', 'audio/mpeg',
+                                  {'Content-Range':
+                                   'bytes */{}'.format(len(payload))})
+
+        self.send_response(206 if offset else 200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Content-Length', str(len(payload) - offset))
+        if offset:
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+                offset, len(payload) - 1, len(payload)))
+        self.end_headers()
+
+        for i in range(offset, len(payload), CHUNK_SIZE):
+            chunk = payload[i:i + CHUNK_SIZE]
+            self.wfile.write(chunk)
+            if self.mock.bandwidth:
+                time.sleep(len(chunk) / self.mock.bandwidth)
+
+    def _send_html(self, html, headers=None):
+        self._send(200, html.encode(), 'text/html; charset=utf-8', headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
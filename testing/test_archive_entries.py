@@ -0,0 +1,97 @@
+import datetime as dt
+
+import pytest
+
+from broadcastify_archtk.btk import ArchiveEntries
+
+from conftest import make_entries
+
+
+DATE = dt.date(2020, 1, 15)
+
+
+def test_entries_are_kept_sorted_by_start_time():
+    entries = make_entries(DATE, 6)
+    archive_entries = ArchiveEntries(entries[::-1])
+
+    assert list(archive_entries) == entries
+    assert archive_entries.uris == [entry['uri'] for entry in entries]
+
+
+def test_extend_merges_interleaved_entries():
+    entries = make_entries(DATE, 6)
+    archive_entries = ArchiveEntries(entries[::2])
+    archive_entries.extend(entries[1::2])
+
+    assert list(archive_entries) == entries
+    assert len(archive_entries) == 6
+
+
+def test_extend_accepts_att_rows():
+    entries = make_entries(DATE, 2)
+    archive_entries = ArchiveEntries(
+        [[entry['uri'], entry['start_time'], entry['end_time']]
+         for entry in entries])
+
+    assert list(archive_entries) == entries
+
+
+def test_earliest_and_latest_end():
+    entries = make_entries(DATE, 4)
+    archive_entries = ArchiveEntries(entries)
+
+    assert archive_entries.earliest_end == entries[0]['end_time']
+    assert archive_entries.latest_end == entries[-1]['end_time']
+    assert ArchiveEntries().earliest_end is None
+    assert ArchiveEntries().latest_end is None
+
+
+def test_between_selects_entries_inside_the_range():
+    entries = make_entries(DATE, 6)
+    archive_entries = ArchiveEntries(entries)
+
+    selected = archive_entries.between(entries[1]['start_time'],
+                                       entries[3]['end_time'])
+    assert list(selected) == entries[1:4]
+
+    # An entry that starts in the range but ends after it is left out
+    selected = archive_entries.between(entries[1]['start_time'],
+                                       entries[3]['end_time']
+                                       - dt.timedelta(minutes=1))
+    assert list(selected) == entries[1:3]
+
+
+def test_between_with_open_ends():
+    entries = make_entries(DATE, 6)
+    archive_entries = ArchiveEntries(entries)
+
+    assert list(archive_entries.between(start=entries[4]['start_time'])
+                ) == entries[4:]
+    assert list(archive_entries.between(end=entries[1]['end_time'])
+                ) == entries[:2]
+    assert list(archive_entries.between()) == entries
+
+
+def test_indexing_and_slicing():
+    entries = make_entries(DATE, 5)
+    archive_entries = ArchiveEntries(entries)
+
+    assert archive_entries[0] == entries[0]
+    assert archive_entries[-1] == entries[-1]
+    assert archive_entries[-5] == entries[0]
+    assert archive_entries[1:3] == entries[1:3]
+    assert archive_entries[::-2] == entries[::-2]
+
+    with pytest.raises(IndexError):
+        archive_entries[5]
+    with pytest.raises(IndexError):
+        archive_entries[-6]
+
+
+def test_changing_an_entry_does_not_change_the_container():
+    entries = make_entries(DATE, 2)
+    archive_entries = ArchiveEntries(entries)
+
+    archive_entries[0]['uri'] = 'changed'
+
+    assert archive_entries[0]['uri'] == entries[0]['uri']
@@ -0,0 +1,326 @@
+import asyncio
+import datetime as dt
+import os
+
+import pytest
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import (ArchiveDownloader, _DownloadManifest,
+                                     _hash_file)
+
+import mock_broadcastify
+from conftest import MP3_SIZE, make_entries, new_archive
+
+
+DATE = dt.date(2020, 1, 15)
+
+
+#-----------------------------------------------------------------------------
+# _DownloadManifest
+#-----------------------------------------------------------------------------
+def test_manifest_records_are_read_back(tmp_path):
+    manifest = _DownloadManifest(str(tmp_path))
+    manifest.record('a', 'a.mp3', 100, 'abc', 200)
+    manifest.record('b', 'b.mp3', http_status=404)
+
+    assert manifest.get_many(['a', 'b', 'c']) == {
+        'a': {'name': 'a.mp3', 'size': 100, 'checksum': 'abc'},
+        'b': {'name': 'b.mp3', 'size': None, 'checksum': None}}
+
+
+def test_manifest_replaces_a_uri_record(tmp_path):
+    manifest = _DownloadManifest(str(tmp_path))
+    manifest.record('a', 'a.mp3', http_status=404)
+    manifest.record('a', 'a.mp3', 100, 'abc', 200)
+
+    assert manifest.get_many(['a'])['a']['size'] == 100
+
+
+def test_manifest_queries_more_uris_than_sqlite_parameters(tmp_path):
+    manifest = _DownloadManifest(str(tmp_path))
+    uris = [str(i) for i in range(1200)]
+    for uri in uris[::100]:
+        manifest.record(uri, uri + '.mp3', 1)
+
+    assert sorted(manifest.get_many(uris), key=int) == uris[::100]
+    assert manifest.get_owners([uri + '.mp3' for uri in uris]) == {
+        uri + '.mp3': uri for uri in uris[::100]}
+
+
+def test_manifest_persists_across_instances(tmp_path):
+    _DownloadManifest(str(tmp_path)).record('a', 'a.mp3', 1)
+
+    assert 'a' in _DownloadManifest(str(tmp_path)).get_many(['a'])
+
+
+#-----------------------------------------------------------------------------
+# ArchiveDownloader._plan_downloads
+#-----------------------------------------------------------------------------
+@pytest.fixture
+def downloader():
+    return ArchiveDownloader(new_archive())
+
+
+def write(path, data=b'x' * 100):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_new_entries_need_downloading(downloader, output_path):
+    entries = make_entries(DATE, 3)
+
+    results = downloader._plan_downloads(entries, output_path)
+
+    assert [result['status'] for result in results] == [None] * 3
+    assert [result['uri'] for result in results] == [entry['uri']
+                                                     for entry in entries]
+    assert results[0]['path'] == output_path + '1-20200115-0030.mp3'
+
+
+def test_recorded_files_exist(downloader, output_path):
+    entry = make_entries(DATE, 1)[0]
+    write(output_path + 'kept.mp3')
+    _DownloadManifest(output_path).record(entry['uri'], 'kept.mp3', 100,
+                                          'abc')
+
+    result, = downloader._plan_downloads([entry], output_path)
+
+    # The file keeps the name it was downloaded under
+    assert result['path'] == output_path + 'kept.mp3'
+    assert result['status'] == 'exists'
+    assert (result['size'], result['checksum']) == (100, 'abc')
+
+
+def test_deleted_files_are_downloaded_again(downloader, output_path):
+    entry = make_entries(DATE, 1)[0]
+    _DownloadManifest(output_path).record(entry['uri'], 'gone.mp3', 100)
+
+    result, = downloader._plan_downloads([entry], output_path)
+
+    assert result['status'] is None
+    assert result['path'] == output_path + 'gone.mp3'
+
+
+def test_files_recorded_as_unavailable_are_tried_again(downloader,
+                                                       output_path):
+    entry = make_entries(DATE, 1)[0]
+    write(output_path + 'late.mp3')
+    _DownloadManifest(output_path).record(entry['uri'], 'late.mp3',
+                                          http_status=404)
+
+    result, = downloader._plan_downloads([entry], output_path)
+
+    assert result['status'] is None
+
+
+def test_colliding_names_get_their_uri(downloader, output_path):
+    # Two entries ending in the same minute would share a file name
+    first, second = make_entries(DATE, 2)
+    second['end_time'] = first['end_time']
+
+    results = downloader._plan_downloads([first, second], output_path)
+
+    assert [result['path'] for result in results] == [
+        output_path + '1-20200115-0030-' + first['uri'] + '.mp3',
+        output_path + '1-20200115-0030-' + second['uri'] + '.mp3']
+
+
+def test_name_owned_by_another_uri_gets_the_uri(downloader, output_path):
+    entry = make_entries(DATE, 1)[0]
+    _DownloadManifest(output_path).record('other', '1-20200115-0030.mp3',
+                                          100)
+
+    result, = downloader._plan_downloads([entry], output_path)
+
+    assert result['path'] == (output_path + '1-20200115-0030-' +
+                              entry['uri'] + '.mp3')
+
+
+def test_unrecorded_files_are_left_to_be_checked(downloader, output_path):
+    entry = make_entries(DATE, 1)[0]
+    write(output_path + '1-20200115-0030.mp3')
+
+    result, = downloader._plan_downloads([entry], output_path)
+
+    # Not trusted until the server confirms its size, but left in place
+    # until then
+    assert result['status'] is None
+    assert sorted(os.listdir(output_path)) == [
+        '1-20200115-0030.mp3', btk._MANIFEST_DB_NAME]
+
+
+def test_verify_downloads_mismatched_files_again(downloader, output_path):
+    entries = make_entries(DATE, 2)
+    manifest = _DownloadManifest(output_path)
+    for entry in entries:
+        name = entry['uri'] + '.mp3'
+        write(output_path + name, b'good')
+        manifest.record(entry['uri'], name, 4, _hash_file(output_path + name))
+    # Changed after it was downloaded, but not in size
+    write(output_path + entries[1]['uri'] + '.mp3', b'evil')
+
+    unverified = downloader._plan_downloads(entries, output_path)
+    verified = downloader._plan_downloads(entries, output_path, verify=True)
+
+    assert [result['status'] for result in unverified] == ['exists'] * 2
+    assert [result['status'] for result in verified] == ['exists', None]
+    assert not os.path.exists(output_path + entries[1]['uri'] + '.mp3')
+
+
+def test_dry_run_changes_nothing(downloader, tmp_path):
+    entry = make_entries(DATE, 1)[0]
+    output_path = str(tmp_path / 'new') + os.sep
+
+    result, = downloader._plan_downloads([entry], output_path, dry_run=True)
+
+    assert result['status'] is None
+    assert not os.path.exists(output_path)
+
+    os.mkdir(output_path)
+    write(output_path + '1-20200115-0030.mp3')
+    downloader._plan_downloads([entry], output_path, dry_run=True)
+
+    assert os.listdir(output_path) == ['1-20200115-0030.mp3']
+
+
+#-----------------------------------------------------------------------------
+# Downloads against the mock server
+#-----------------------------------------------------------------------------
+def download(archive, entries, output_path, **kwargs):
+    archive.entries = btk.ArchiveEntries(entries)
+    return archive.download(all_entries=True, output_path=output_path,
+                            **kwargs)
+
+
+def test_download_records_files_in_the_manifest(server, archive,
+                                                output_path):
+    entries = make_entries(DATE, 3)
+
+    results = download(archive, entries, output_path)
+
+    assert [result['status'] for result in results] == ['downloaded'] * 3
+    records = _DownloadManifest(output_path).get_many(
+                [entry['uri'] for entry in entries])
+    for result in results:
+        assert os.path.getsize(result['path']) == MP3_SIZE
+        assert records[result['uri']] == {
+            'name': os.path.basename(result['path']), 'size': MP3_SIZE,
+            'checksum': _hash_file(result['path'])}
+
+
+def test_rerun_skips_downloaded_files_without_requests(server, archive,
+                                                       output_path):
+    entries = make_entries(DATE, 3)
+    download(archive, entries, output_path)
+    requests_before = dict(server.requests)
+
+    results = download(archive, entries, output_path)
+
+    assert [result['status'] for result in results] == ['exists'] * 3
+    assert dict(server.requests) == requests_before
+
+
+def test_deleted_file_is_downloaded_again(server, archive, output_path):
+    entries = make_entries(DATE, 2)
+    results = download(archive, entries, output_path)
+    os.remove(results[1]['path'])
+
+    results = download(archive, entries, output_path)
+
+    assert [result['status'] for result in results] == ['exists',
+                                                        'downloaded']
+
+
+def test_colliding_entries_are_both_downloaded(server, archive, output_path):
+    first, second = make_entries(DATE, 2)
+    second['end_time'] = first['end_time']
+
+    results = download(archive, [first, second], output_path)
+
+    assert [result['status'] for result in results] == ['downloaded'] * 2
+    assert results[0]['path'] != results[1]['path']
+    assert all(os.path.exists(result['path']) for result in results)
+
+
+def test_unrecorded_files_are_checked_against_the_server(server, archive,
+                                                         output_path):
+    entries = make_entries(DATE, 2)
+    results = download(archive, entries, output_path)
+
+    # As if downloaded before the manifest was kept, one of them cut short
+    os.remove(output_path + btk._MANIFEST_DB_NAME)
+    with open(results[0]['path'], 'r+b') as f:
+        f.truncate(MP3_SIZE // 4)
+
+    results = download(archive, entries, output_path)
+
+    assert [result['status'] for result in results] == ['downloaded',
+                                                        'exists']
+    assert all(os.path.getsize(result['path']) == MP3_SIZE
+               for result in results)
+    assert all(result['checksum'] == _hash_file(result['path'])
+               for result in results)
+    # One request each to resume the cut-short file & to confirm the other
+    assert server.requests['mp3'] == 4
+
+
+@pytest.mark.skipif(btk._aiohttp is None, reason='aiohttp is not installed')
+def test_async_download_shares_the_manifest(server, archive, output_path):
+    first, second = make_entries(DATE, 2)
+    second['end_time'] = first['end_time']
+    archive.entries = btk.ArchiveEntries([first, second])
+
+    results = asyncio.run(archive.download_async(all_entries=True,
+                                                 output_path=output_path))
+
+    assert [result['status'] for result in results] == ['downloaded'] * 2
+    assert results[0]['path'] != results[1]['path']
+
+    # The synchronous downloader finds them in the manifest
+    assert [result['status'] for result in download(
+                archive, [first, second], output_path)] == ['exists'] * 2
+    assert server.requests['mp3'] == 2
+
+
+@pytest.mark.parametrize('status', [404, 500])
+def test_unrecorded_files_are_kept_if_not_downloaded(server, archive,
+                                                     output_path, monkeypatch,
+                                                     status):
+    archive.retry_policy.retries = 0
+    monkeypatch.setattr(mock_broadcastify._Handler, '_send_mp3',
+                        lambda handler: handler._send(status, b'',
+                                                      'text/plain'))
+    entries = make_entries(DATE, 2)
+    for name in ('1-20200115-0030.mp3', '1-20200115-0100.mp3'):
+        write(output_path + name, server.payload[:100])
+
+    results = download(archive, entries, output_path)
+
+    assert [result['status'] for result in results] == (
+        ['unavailable'] * 2 if status == 404 else ['failed'] * 2)
+    for result in results:
+        assert read(result['path']) == server.payload[:100]
+        assert not os.path.exists(result['path'] + btk._PARTIAL_SUFFIX)
+
+
+@pytest.mark.skipif(btk._aiohttp is None, reason='aiohttp is not installed')
+def test_unrecorded_files_are_kept_by_async_downloads(server, archive,
+                                                      output_path,
+                                                      monkeypatch):
+    archive.retry_policy.retries = 0
+    monkeypatch.setattr(mock_broadcastify._Handler, '_send_mp3',
+                        lambda handler: handler._send(500, b'', 'text/plain'))
+    entry = make_entries(DATE, 1)[0]
+    write(output_path + '1-20200115-0030.mp3', server.payload[:100])
+    archive.entries = btk.ArchiveEntries([entry])
+
+    result, = asyncio.run(archive.download_async(all_entries=True,
+                                                 output_path=output_path))
+
+    assert result['status'] == 'failed'
+    assert read(result['path']) == server.payload[:100]
@@ -0,0 +1,109 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import ArchiveDownloader, MetricsRegistry
+
+import mock_broadcastify
+from conftest import new_archive
+
+
+class _LockstepMetrics(MetricsRegistry):
+    # Holds each thread that has parsed a download page until the other has
+    # too, so both threads are between parsing & returning at once
+    def __init__(self, parties):
+        super().__init__()
+        self.barrier = threading.Barrier(parties, timeout=5)
+
+    def observe(self, name, value, **labels):
+        super().observe(name, value, **labels)
+        if name == 'parse_seconds':
+            self.barrier.wait()
+
+
+def test_concurrent_resolves_get_their_own_pages(server):
+    archive = new_archive(metrics=_LockstepMetrics(2))
+    downloader = ArchiveDownloader(archive)
+    uris = ['12020011500', '12020011501']
+
+    def resolve(uri):
+        # As _resolve_mp3_url does, without its lock
+        return downloader._parse_mp3_path(downloader.get_download_soup(uri))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        urls = list(executor.map(resolve, uris))
+
+    assert urls == [f'{server.url}/mp3/{uri}.mp3' for uri in uris]
+
+
+def test_last_page_is_kept_per_thread(server, archive):
+    downloader = ArchiveDownloader(archive)
+
+    soup = downloader.get_download_soup('12020011500')
+    other = []
+    thread = threading.Thread(target=lambda: other.append(
+                 downloader.get_download_soup('12020011501')))
+    thread.start()
+    thread.join()
+
+    assert downloader.current_archive_id == '12020011500'
+    assert downloader.download_page_soup is soup
+    assert other[0] is not soup
+
+
+def expire_cached_login(server, archive, monkeypatch):
+    # Log the archive in with cached cookies the server no longer accepts;
+    # download pages then need the cookie the mock's login form sets
+    send_html = mock_broadcastify._Handler._send_html
+
+    def premium_pages(handler, html, headers=None):
+        if ('/archives/idv2/' in handler.path and
+                'bcfyuser1=benchmark' not in handler.headers.get('Cookie',
+                                                                 '')):
+            html = '<html><body><div class="alert-warning"></div></body></html>'
+        send_html(handler, html, headers)
+
+    monkeypatch.setattr(mock_broadcastify._Handler, '_send_html',
+                        premium_pages)
+
+    host = server.url.split('//')[1].split(':')[0]
+    archive.session.cookies.set('bcfyuser1', 'expired', domain=host, path='/')
+    archive.session._btk_username = 'test'
+    archive.session._btk_login_cached = True
+
+
+def test_expired_cached_login_is_renewed_once(server, archive, monkeypatch):
+    expire_cached_login(server, archive, monkeypatch)
+    downloader = ArchiveDownloader(archive)
+    uris = [f'120200115{i:02d}' for i in range(4)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        urls = list(executor.map(downloader._resolve_mp3_url, uris))
+
+    assert urls == [f'{server.url}/mp3/{uri}.mp3' for uri in uris]
+    assert server.requests['login'] == 1
+
+
+def test_concurrent_forced_logins_are_shared(server, archive):
+    archive._authenticate()
+    login = btk._login_count(archive.session)
+
+    # Every thread found the same login refused
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(4):
+            executor.submit(archive._authenticate, True, login)
+
+    assert server.requests['login'] == 2
+    assert btk._login_count(archive.session) == login + 1
+
+
+def test_refused_fresh_login_is_not_renewed(server, archive, monkeypatch):
+    expire_cached_login(server, archive, monkeypatch)
+    archive.session._btk_login_cached = False
+    downloader = ArchiveDownloader(archive)
+
+    with pytest.raises(btk.NavigatorException):
+        downloader._resolve_mp3_url('12020011500')
+    assert server.requests['login'] == 0
@@ -0,0 +1,135 @@
+import contextlib
+import datetime as dt
+
+import pytest
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import _EntryIndex
+
+from conftest import FEED_ID, make_entries, new_archive
+
+
+TODAY = dt.date.today()
+DATES = [TODAY - dt.timedelta(days=n) for n in (3, 2, 1, 0)]
+
+
+def rows(date, n):
+    # Entries as the ATT gives them: [uri, start_time, end_time] lists
+    return [[entry['uri'], entry['start_time'], entry['end_time']]
+            for entry in make_entries(date, n)]
+
+
+#-----------------------------------------------------------------------------
+# _EntryIndex
+#-----------------------------------------------------------------------------
+def test_stored_dates_are_read_back(tmp_path):
+    index = _EntryIndex(str(tmp_path))
+    index.store_date(FEED_ID, DATES[0], rows(DATES[0], 3))
+    index.store_date(FEED_ID, DATES[1], [])
+
+    assert index.get_dates(FEED_ID, DATES) == {DATES[0]: rows(DATES[0], 3),
+                                               DATES[1]: []}
+
+
+def test_index_is_kept_per_feed(tmp_path):
+    index = _EntryIndex(str(tmp_path))
+    index.store_date(FEED_ID, DATES[0], rows(DATES[0], 1))
+
+    assert index.get_dates('2', DATES) == {}
+
+
+def test_storing_a_date_again_replaces_it(tmp_path):
+    index = _EntryIndex(str(tmp_path))
+    index.store_date(FEED_ID, DATES[0], rows(DATES[0], 3))
+    index.store_date(FEED_ID, DATES[0], rows(DATES[0], 2))
+
+    assert index.get_dates(FEED_ID, DATES[:1]) == {DATES[0]: rows(DATES[0],
+                                                                  2)}
+
+
+def test_only_requested_dates_are_returned(tmp_path):
+    index = _EntryIndex(str(tmp_path))
+    for date in DATES[:3]:
+        index.store_date(FEED_ID, date, rows(date, 1))
+
+    assert list(index.get_dates(FEED_ID, [DATES[0], DATES[2]])) == [
+        DATES[0], DATES[2]]
+    assert index.get_dates(FEED_ID, []) == {}
+
+
+#-----------------------------------------------------------------------------
+# Incremental builds
+#-----------------------------------------------------------------------------
+@pytest.fixture
+def calendar(monkeypatch):
+    # Stand in for the webdriver & archive calendar; records the dates
+    # scraped
+    scraped = []
+
+    class FakeCalendar:
+        def __init__(self, archive, browser, throttle=None):
+            pass
+
+        def harvest_month(self, dates):
+            for date in dates:
+                scraped.append(date)
+                yield date, rows(date, 2) if date != DATES[1] else []
+
+    class FakeBrowser:
+        def get(self, url):
+            pass
+
+    monkeypatch.setattr(btk, 'ArchiveCalendar', FakeCalendar)
+    monkeypatch.setattr(btk.BroadcastifyArchive, '_launch_browser',
+                        lambda self, login=False: contextlib.nullcontext(
+                            FakeBrowser()))
+    return scraped
+
+
+@pytest.fixture
+def archive(tmp_path):
+    return new_archive(cache_dir=str(tmp_path))
+
+
+def build(archive, **kwargs):
+    archive.build(start=DATES[0], end=DATES[-1], chronological=True,
+                  rebuild=True, **kwargs)
+    return archive.entries
+
+
+def test_build_indexes_past_dates(calendar, archive):
+    build(archive)
+
+    # Including the one with no entries, but not today, which is still open
+    assert archive.entry_index.get_dates(FEED_ID, DATES) == {
+        DATES[0]: rows(DATES[0], 2), DATES[1]: [], DATES[2]: rows(DATES[2], 2)}
+
+
+def test_rebuild_scrapes_only_today(calendar, archive):
+    first = build(archive)
+    calendar.clear()
+
+    second = build(archive)
+
+    assert calendar == [TODAY]
+    assert list(second) == list(first)
+
+
+def test_rebuild_without_the_index_scrapes_everything(calendar, archive):
+    build(archive)
+    calendar.clear()
+
+    build(archive, use_index=False)
+
+    assert calendar == DATES
+
+
+def test_build_without_a_cache_dir_scrapes_everything(calendar):
+    archive = new_archive()
+    build(archive)
+    calendar.clear()
+
+    build(archive)
+
+    assert archive.entry_index is None
+    assert calendar == DATES
@@ -0,0 +1,87 @@
+import datetime as dt
+from contextlib import nullcontext
+
+import pytest
+
+from broadcastify_archtk.btk import ArchiveDownloader
+
+import mock_broadcastify
+from conftest import make_entries
+
+
+TODAY = dt.date.today()
+YESTERDAY = TODAY - dt.timedelta(days=1)
+
+
+@pytest.fixture
+def missing(server, monkeypatch):
+    # URIs whose mp3 files the server doesn't have (yet)
+    missing = set()
+    send_mp3 = mock_broadcastify._Handler._send_mp3
+
+    def send_if_up(handler):
+        if any(f'/{uri}.mp3' in handler.path for uri in missing):
+            return handler._send(404, b'', 'text/plain')
+        send_mp3(handler)
+
+    monkeypatch.setattr(mock_broadcastify._Handler, '_send_mp3', send_if_up)
+    return missing
+
+
+def rows(date, n):
+    # n archive times rows for `date`, as polled
+    return [[entry['uri'], entry['start_time'], entry['end_time']]
+            for entry in make_entries(date, n)]
+
+
+def test_follow_retries_unavailable_files(server, archive, missing,
+                                          output_path, monkeypatch):
+    first_uri = f'1{TODAY:%Y%m%d}00'
+    missing.add(first_uri)
+    polls = []
+
+    def poll(dates):
+        # The file is up by the second poll
+        polls.append(dates)
+        if len(polls) == 2:
+            missing.clear()
+        return {date: rows(date, 2) for date in dates}
+
+    monkeypatch.setattr(type(archive), '_follow_source',
+                        lambda self, backend: nullcontext(poll))
+
+    results = archive.follow(output_path, interval=0, max_polls=2)
+
+    statuses = [(result['uri'], result['status']) for result in results]
+    assert statuses == [(first_uri, 'unavailable'),
+                        (f'1{TODAY:%Y%m%d}01', 'downloaded'),
+                        (first_uri, 'downloaded')]
+    assert len(archive.entries) == 2
+
+
+def test_unavailable_files_wait_for_their_day(server, archive, missing,
+                                              output_path):
+    dn = ArchiveDownloader(archive)
+    yesterdays_uri = f'1{YESTERDAY:%Y%m%d}00'
+    missing.add(yesterdays_uri)
+    known_uris, unavailable = set(), {}
+
+    def follow_poll(polled):
+        return archive._follow_poll(lambda dates: polled, list(polled), dn,
+                                    output_path, 1, known_uris, unavailable)
+
+    follow_poll({YESTERDAY: rows(YESTERDAY, 1), TODAY: rows(TODAY, 1)})
+    assert list(unavailable) == [YESTERDAY]
+
+    # A poll of only today, with nothing new, keeps yesterday's file waiting
+    assert follow_poll({TODAY: rows(TODAY, 1)}) == (True, [])
+    assert list(unavailable) == [YESTERDAY]
+
+    missing.clear()
+    _, results = follow_poll({YESTERDAY: rows(YESTERDAY, 1),
+                              TODAY: rows(TODAY, 1)})
+
+    assert [(result['uri'], result['status']) for result in results] == [
+        (yesterdays_uri, 'downloaded')]
+    assert unavailable == {}
+
@@ -0,0 +1,54 @@
+import datetime as dt
+
+import pytest
+
+from conftest import new_archive
+
+
+TODAY = dt.date.today()
+DATES = [TODAY - dt.timedelta(days=n) for n in (3, 2, 1)]
+
+
+@pytest.fixture
+def archive(server, tmp_path):
+    return new_archive(cache_dir=str(tmp_path))
+
+
+def http_build(archive):
+    return dict(archive.iter_build(start=DATES[0], end=DATES[-1],
+                                   chronological=True, backend='http'))
+
+
+def test_http_backend_logs_in_first(server, archive):
+    built = http_build(archive)
+
+    assert sorted(built) == DATES
+    assert server.requests['login'] == 1
+    assert all(len(entries) == server.entries_per_day
+               for entries in built.values())
+
+
+def test_http_dates_are_indexed(server, archive):
+    http_build(archive)
+    requests_before = server.requests['archive_times']
+
+    http_build(archive)
+
+    assert server.requests['archive_times'] == requests_before
+    assert sorted(archive.entry_index.get_dates(archive.feed_id, DATES)
+                  ) == DATES
+
+
+def test_empty_http_dates_are_not_indexed(server, archive, monkeypatch):
+    archive_times = server.archive_times
+    monkeypatch.setattr(server, 'archive_times', lambda feed_id, date: (
+        {'data': []} if date == DATES[1] else archive_times(feed_id, date)))
+
+    assert len(http_build(archive)[DATES[1]]) == 0
+    assert sorted(archive.entry_index.get_dates(archive.feed_id, DATES)
+                  ) == [DATES[0], DATES[2]]
+
+    # The next build requests it again
+    requests_before = server.requests['archive_times']
+    http_build(archive)
+    assert server.requests['archive_times'] == requests_before + 1
@@ -0,0 +1,56 @@
+import datetime as dt
+
+from broadcastify_archtk import btk
+
+from conftest import MP3_SIZE, new_archive
+
+
+TODAY = dt.date.today()
+DATES = [TODAY - dt.timedelta(days=n) for n in (2, 1)]
+
+
+def test_iter_build_yields_archive_entries(server, archive):
+    built = list(archive.iter_build(start=DATES[0], end=DATES[-1],
+                                    chronological=True, backend='http'))
+
+    assert [date for date, _ in built] == DATES
+    for date, entries in built:
+        assert isinstance(entries, btk.ArchiveEntries)
+        assert len(entries) == server.entries_per_day
+        assert entries[0]['uri'] == f'1{date:%Y%m%d}00'
+        assert all(isinstance(entry['start_time'], dt.datetime)
+                   for entry in entries)
+
+
+def test_indexed_dates_are_yielded_as_archive_entries(server, tmp_path):
+    archive = new_archive(cache_dir=str(tmp_path))
+    scraped = dict(archive.iter_build(start=DATES[0], end=DATES[-1],
+                                      backend='http'))
+
+    indexed = dict(archive.iter_build(start=DATES[0], end=DATES[-1],
+                                      backend='http'))
+
+    assert all(isinstance(entries, btk.ArchiveEntries)
+               for entries in indexed.values())
+    assert {date: list(entries) for date, entries in indexed.items()} == {
+        date: list(entries) for date, entries in scraped.items()}
+
+
+def test_yielded_entries_can_be_downloaded(server, archive, output_path):
+    for date, entries in archive.iter_build(start=DATES[0], end=DATES[0],
+                                            backend='http'):
+        archive.entries = entries
+        results = archive.download(all_entries=True, output_path=output_path)
+
+    assert [result['status'] for result in results] == (
+        ['downloaded'] * server.entries_per_day)
+    assert all(result['size'] == MP3_SIZE for result in results)
+
+
+def test_build_fills_entries_in_order(server, archive):
+    archive.build(start=DATES[0], end=DATES[-1], backend='http')
+
+    assert isinstance(archive.entries, btk.ArchiveEntries)
+    assert len(archive.entries) == 2 * server.entries_per_day
+    starts = [entry['start_time'] for entry in archive.entries]
+    assert starts == sorted(starts)
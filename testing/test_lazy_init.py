@@ -0,0 +1,126 @@
+import datetime as dt
+
+import pytest
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import _FeedInfoCache
+
+from conftest import FEED_ID, new_archive
+
+
+TODAY = dt.date.today()
+
+
+def days_ago(n):
+    return TODAY - dt.timedelta(days=n)
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    # Stand in for reading the archive calendar in a webdriver; set
+    # calendar['dates'] to what it shows
+    calendar = {'dates': (days_ago(30), TODAY), 'reads': 0}
+
+    def read_calendar(archive):
+        calendar['reads'] += 1
+        archive._start_date, archive._end_date = calendar['dates']
+
+    monkeypatch.setattr(btk.BroadcastifyArchive, '_get_calendar_dates',
+                        read_calendar)
+    return calendar
+
+
+def calendar_archive(tmp_path):
+    archive = new_archive(cache_dir=str(tmp_path))
+    archive.archive_dates = 'calendar'
+    return archive
+
+
+def test_creating_an_archive_makes_no_requests(server):
+    new_archive()
+
+    assert sum(server.requests.values()) == 0
+
+
+def test_feed_name_is_retrieved_once_and_cached(server, tmp_path):
+    archive = new_archive(cache_dir=str(tmp_path))
+
+    assert archive.feed_name == server.feed_name
+    assert archive.feed_name == server.feed_name
+    assert new_archive(cache_dir=str(tmp_path)).feed_name == server.feed_name
+    assert server.requests['feed'] == 1
+
+
+def test_retention_dates_are_not_taken_from_the_cache(tmp_path):
+    _FeedInfoCache(str(tmp_path)).put_dates(FEED_ID, days_ago(10),
+                                            days_ago(3))
+
+    archive = new_archive(cache_dir=str(tmp_path))
+
+    assert archive.end_date == TODAY
+    assert archive.start_date == days_ago(archive.retention_days)
+
+
+def test_calendar_dates_are_cached(calendar, tmp_path):
+    assert calendar_archive(tmp_path).end_date == TODAY
+    assert calendar_archive(tmp_path).end_date == TODAY
+
+    assert calendar['reads'] == 1
+
+
+def test_cached_calendar_dates_expire(calendar, tmp_path, monkeypatch):
+    calendar_archive(tmp_path).end_date
+    calendar['dates'] = (days_ago(29), TODAY)
+
+    now = btk._timer()
+    monkeypatch.setattr(btk, '_timer',
+                        lambda: now + btk._ARCHIVE_DATES_TTL + 1)
+
+    assert calendar_archive(tmp_path).start_date == days_ago(29)
+    assert calendar['reads'] == 2
+
+
+def test_cached_calendar_dates_expire_with_their_day(tmp_path, monkeypatch):
+    cache = _FeedInfoCache(str(tmp_path))
+    yesterday = dt.datetime.combine(days_ago(1), dt.time(23, 59)).timestamp()
+    monkeypatch.setattr(btk, '_timer', lambda: yesterday)
+    cache.put_dates(FEED_ID, days_ago(31), days_ago(1))
+    monkeypatch.undo()
+
+    # Even if that was less than the TTL ago
+    monkeypatch.setattr(btk, '_timer', lambda: yesterday + 60)
+    assert cache.get_dates(FEED_ID) is None
+
+
+def test_dates_are_retrieved_again_on_a_new_day(server):
+    archive = new_archive()
+    archive.end_date
+
+    # As if retrieved yesterday
+    archive._start_date = days_ago(181)
+    archive._end_date = days_ago(1)
+    archive._dates_retrieved_on = days_ago(1)
+
+    assert archive.end_date == TODAY
+
+
+def test_dates_past_the_end_are_looked_up_again(calendar, tmp_path):
+    calendar['dates'] = (days_ago(30), days_ago(2))
+    archive = calendar_archive(tmp_path)
+    archive.end_date
+
+    # The feed has gained days since; the cache doesn't know yet
+    calendar['dates'] = (days_ago(30), TODAY)
+    dates = archive._get_date_list(days_ago(1), TODAY, None, True)
+
+    assert dates == [days_ago(1), TODAY]
+    assert calendar['reads'] == 2
+    assert calendar_archive(tmp_path).end_date == TODAY
+
+
+def test_dates_past_the_calendar_are_still_refused(calendar, tmp_path):
+    archive = calendar_archive(tmp_path)
+
+    with pytest.raises(AttributeError):
+        archive._get_date_list(days_ago(1), TODAY + dt.timedelta(days=1),
+                               None, True)
@@ -0,0 +1,161 @@
+import os
+import stat
+
+import pytest
+import requests
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import _LoginCache, _log_in_browser
+
+from conftest import new_archive
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # A wall clock that only moves when told to
+    clock = [1e9]
+    monkeypatch.setattr(btk, '_timer', lambda: clock[0])
+    return clock
+
+
+def cookie_jar(expires=None):
+    jar = requests.cookies.RequestsCookieJar()
+    jar.set('bcfyuser1', 'abc', domain='.broadcastify.com', path='/',
+            expires=expires)
+    return jar
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+#-----------------------------------------------------------------------------
+# _LoginCache
+#-----------------------------------------------------------------------------
+def test_cached_cookies_are_read_back(tmp_path):
+    cache = _LoginCache(str(tmp_path))
+    cache.put('user', cookie_jar())
+
+    assert _LoginCache(str(tmp_path)).get('user') == [
+        {'name': 'bcfyuser1', 'value': 'abc', 'domain': '.broadcastify.com',
+         'path': '/', 'secure': False, 'expires': None}]
+    assert cache.get('other') is None
+
+
+def test_cached_cookies_expire_after_the_ttl(tmp_path, clock):
+    cache = _LoginCache(str(tmp_path))
+    cache.put('user', cookie_jar())
+
+    clock[0] += btk._LOGIN_TTL - 1
+    assert cache.get('user') is not None
+    clock[0] += 1
+    assert cache.get('user') is None
+
+
+def test_cached_cookies_expire_with_the_first_cookie(tmp_path, clock):
+    cache = _LoginCache(str(tmp_path))
+    cache.put('user', cookie_jar(expires=int(clock[0]) + 60))
+
+    clock[0] += 60
+    assert cache.get('user') is None
+
+
+def test_cleared_cookies_are_gone(tmp_path):
+    cache = _LoginCache(str(tmp_path))
+    cache.put('user', cookie_jar())
+
+    cache.clear('user')
+
+    assert cache.get('user') is None
+
+
+def test_cache_is_readable_only_by_its_owner(tmp_path):
+    path = str(tmp_path / btk._CACHE_DB_NAME)
+    with open(path, 'w'):
+        pass
+    os.chmod(path, 0o644)
+
+    _LoginCache(str(tmp_path))
+
+    assert mode(path) == 0o600
+
+
+#-----------------------------------------------------------------------------
+# Logging in against the mock server
+#-----------------------------------------------------------------------------
+def test_login_is_cached_for_later_archives(server, tmp_path):
+    new_archive(cache_dir=str(tmp_path))._authenticate()
+
+    archive = new_archive(cache_dir=str(tmp_path))
+    archive._authenticate()
+
+    assert server.requests['login'] == 1
+    assert archive.session.cookies.get('bcfyuser1') == 'benchmark'
+    assert archive.session._btk_login_cached
+
+
+def test_cleared_login_cache_logs_in_again(server, tmp_path):
+    archive = new_archive(cache_dir=str(tmp_path))
+    archive._authenticate()
+
+    archive.clear_login_cache()
+    new_archive(cache_dir=str(tmp_path))._authenticate()
+
+    assert server.requests['login'] == 2
+
+
+def test_forced_login_ignores_the_cache(server, tmp_path):
+    new_archive(cache_dir=str(tmp_path))._authenticate()
+
+    archive = new_archive(cache_dir=str(tmp_path))
+    archive._authenticate(force=True)
+
+    assert server.requests['login'] == 2
+    assert not archive.session._btk_login_cached
+
+
+#-----------------------------------------------------------------------------
+# _log_in_browser
+#-----------------------------------------------------------------------------
+class FakeBrowser:
+    def __init__(self):
+        self.urls = []
+        self.cookies = []
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+
+def test_browser_gets_the_session_cookies():
+    session = requests.Session()
+    session.cookies = cookie_jar(expires=2e9)
+    session.cookies.set('other', 'x', domain='example.com', path='/')
+    session._btk_username = 'user'
+    browser = FakeBrowser()
+
+    _log_in_browser(browser, session, 'user', 'password', None)
+
+    assert browser.urls == [btk._BROADCASTIFY_URL]
+    assert browser.cookies == [{'name': 'bcfyuser1', 'value': 'abc',
+                                'path': '/', 'secure': False,
+                                'domain': '.broadcastify.com',
+                                'expiry': 2000000000}]
+
+
+def test_browser_logs_in_itself_without_http(monkeypatch):
+    def no_http(*args, **kwargs):
+        raise requests.ConnectionError()
+
+    submitted = []
+    monkeypatch.setattr(btk, '_authenticate_session', no_http)
+    monkeypatch.setattr(btk, '_submit_login_form',
+                        lambda *args: submitted.append(args))
+    browser = FakeBrowser()
+
+    _log_in_browser(browser, requests.Session(), 'user', 'password', None)
+
+    assert submitted == [(browser, 'user', 'password')]
+    assert browser.cookies == []
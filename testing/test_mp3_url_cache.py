@@ -0,0 +1,111 @@
+import datetime as dt
+import os
+
+import pytest
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import _Mp3UrlCache
+
+from conftest import make_entries, new_archive
+
+
+DATE = dt.date(2020, 1, 15)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # A wall clock that only moves when told to
+    clock = [1e9]
+    monkeypatch.setattr(btk, '_timer', lambda: clock[0])
+    return clock
+
+
+#-----------------------------------------------------------------------------
+# _Mp3UrlCache
+#-----------------------------------------------------------------------------
+def test_cached_urls_are_read_back(tmp_path):
+    cache = _Mp3UrlCache(str(tmp_path))
+    cache.put('a', 'http://a.mp3')
+    cache.put('b', 'http://b.mp3')
+
+    assert cache.get_many(['a', 'b', 'c']) == {'a': 'http://a.mp3',
+                                               'b': 'http://b.mp3'}
+    assert _Mp3UrlCache(str(tmp_path)).get_many(['a']) == {'a': 'http://a.mp3'}
+
+
+def test_invalidated_urls_are_dropped(tmp_path):
+    cache = _Mp3UrlCache(str(tmp_path))
+    cache.put('a', 'http://a.mp3')
+
+    cache.invalidate('a')
+
+    assert cache.get_many(['a']) == {}
+
+
+def test_urls_expire(tmp_path, clock):
+    cache = _Mp3UrlCache(str(tmp_path), ttl=60)
+    cache.put('a', 'http://a.mp3')
+
+    clock[0] += 59
+    assert cache.get_many(['a']) == {'a': 'http://a.mp3'}
+    clock[0] += 1
+    assert cache.get_many(['a']) == {}
+
+
+def test_oldest_urls_are_evicted(tmp_path, clock):
+    cache = _Mp3UrlCache(str(tmp_path), max_size=2)
+    for uri in 'abc':
+        clock[0] += 1
+        cache.put(uri, f'http://{uri}.mp3')
+
+    assert cache.get_many('abc') == {'b': 'http://b.mp3', 'c': 'http://c.mp3'}
+
+
+#-----------------------------------------------------------------------------
+# Downloads against the mock server
+#-----------------------------------------------------------------------------
+@pytest.fixture
+def archive(server, tmp_path):
+    return new_archive(cache_dir=str(tmp_path / 'cache'))
+
+
+def download(archive, entries, output_path):
+    archive.entries = btk.ArchiveEntries(entries)
+    return archive.download(all_entries=True, output_path=output_path)
+
+
+def test_resolved_urls_are_cached(server, archive, output_path):
+    entries = make_entries(DATE, 2)
+
+    download(archive, entries, output_path)
+
+    assert archive.mp3_url_cache.get_many(
+        [entry['uri'] for entry in entries]) == {
+            entry['uri']: f"{server.url}/mp3/{entry['uri']}.mp3"
+            for entry in entries}
+
+
+def test_cached_urls_skip_the_download_page(server, archive, output_path,
+                                            tmp_path):
+    entries = make_entries(DATE, 2)
+    download(archive, entries, output_path)
+
+    # Download again somewhere else, without the first run's manifest
+    other_path = str(tmp_path / 'other') + os.sep
+    results = download(archive, entries, other_path)
+
+    assert [result['status'] for result in results] == ['downloaded'] * 2
+    assert server.requests['download_page'] == 2
+    assert server.requests['mp3'] == 4
+
+
+def test_stale_cached_urls_are_resolved_again(server, archive, output_path):
+    entry = make_entries(DATE, 1)[0]
+    archive.mp3_url_cache.put(entry['uri'], f'{server.url}/moved.mp3')
+
+    result, = download(archive, [entry], output_path)
+
+    assert result['status'] == 'downloaded'
+    assert server.requests['download_page'] == 1
+    assert archive.mp3_url_cache.get_many([entry['uri']]) == {
+        entry['uri']: f"{server.url}/mp3/{entry['uri']}.mp3"}
@@ -0,0 +1,183 @@
+import datetime as dt
+import os
+
+import pytest
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import _DownloadManifest, _next_windows
+
+from conftest import make_entries, new_archive
+
+
+DATE = dt.date(2020, 1, 15)
+NOW = dt.datetime(2020, 1, 15, 12)
+
+
+def at(day, hour, minute=0):
+    # A datetime `day` days after NOW's date
+    return dt.datetime.combine(NOW.date() + dt.timedelta(days=day),
+                               dt.time(hour, minute))
+
+
+#-----------------------------------------------------------------------------
+# _next_windows
+#-----------------------------------------------------------------------------
+def test_next_windows_are_in_order():
+    windows = [(dt.time(20), dt.time(22)), (dt.time(1), dt.time(6))]
+
+    assert _next_windows(windows, NOW, 3) == [(at(0, 20), at(0, 22)),
+                                              (at(1, 1), at(1, 6)),
+                                              (at(1, 20), at(1, 22))]
+
+
+def test_open_window_starts_now():
+    windows = [(dt.time(9), dt.time(14))]
+
+    assert _next_windows(windows, NOW, 2) == [(NOW, at(0, 14)),
+                                              (at(1, 9), at(1, 14))]
+
+
+def test_window_past_midnight():
+    windows = [(dt.time(23), dt.time(2))]
+
+    assert _next_windows(windows, NOW, 1) == [(at(0, 23), at(1, 2))]
+    # Yesterday's window is still open just after midnight
+    assert _next_windows(windows, at(1, 1), 1) == [(at(1, 1), at(1, 2))]
+
+
+def test_overlapping_windows_are_merged():
+    windows = [(dt.time(1), dt.time(4)), (dt.time(3), dt.time(6)),
+               (dt.time(6), dt.time(7)), (dt.time(20), dt.time(21))]
+
+    assert _next_windows(windows, NOW, 3) == [(at(0, 20), at(0, 21)),
+                                              (at(1, 1), at(1, 7)),
+                                              (at(1, 20), at(1, 21))]
+
+
+def test_windows_merged_across_midnight():
+    windows = [(dt.time(22), dt.time(2)), (dt.time(1), dt.time(3))]
+
+    assert _next_windows(windows, NOW, 2) == [(at(0, 22), at(1, 3)),
+                                              (at(1, 22), at(2, 3))]
+
+
+@pytest.mark.parametrize('windows', [[(dt.time(1),)],
+                                     [(1, 6)],
+                                     [(dt.time(1), dt.datetime(2020, 1, 1))]])
+def test_windows_must_be_time_pairs(windows):
+    with pytest.raises(TypeError):
+        _next_windows(windows, NOW, 1)
+
+
+def test_windows_are_required():
+    with pytest.raises(ValueError):
+        _next_windows([], NOW, 1)
+
+
+#-----------------------------------------------------------------------------
+# BroadcastifyArchive.plan_download
+#-----------------------------------------------------------------------------
+@pytest.fixture
+def entries():
+    return make_entries(DATE, 6, minutes=4 * 60)
+
+
+@pytest.fixture
+def archive(entries):
+    archive = new_archive()
+    archive.entries = btk.ArchiveEntries(entries)
+    return archive
+
+
+def test_plan_orders_entries(archive, entries, output_path):
+    oldest = archive.plan_download(all_entries=True, output_path=output_path)
+    newest = archive.plan_download(all_entries=True, output_path=output_path,
+                                   order='newest')
+
+    assert oldest.entries == entries
+    assert newest.entries == entries[::-1]
+    assert len(oldest.batches) == 1
+    assert oldest.batches[0]['window'] is None
+
+
+def test_plan_puts_hours_first(archive, entries, output_path):
+    # The entries start at 00:00, 04:00, 08:00, 12:00, 16:00 & 20:00
+    plan = archive.plan_download(all_entries=True, output_path=output_path,
+                                 hours=[20, 8])
+
+    assert plan.entries == [entries[i] for i in (2, 5, 0, 1, 3, 4)]
+
+
+def test_plan_caps_files_per_batch(archive, entries, output_path):
+    plan = archive.plan_download(all_entries=True, output_path=output_path,
+                                 max_files=4)
+
+    assert plan.entries == entries[:4]
+    assert plan.deferred == entries[4:]
+
+
+def test_plan_caps_bytes_per_batch(archive, entries, output_path):
+    # Each 4-hour entry's estimated size at the default data rate
+    size = 4 * 60 * 60 * btk._MP3_BYTES_PER_SECOND
+
+    plan = archive.plan_download(all_entries=True, output_path=output_path,
+                                 max_bytes=2.5 * size)
+
+    assert plan.entries == entries[:2]
+    assert plan.batches[0]['estimated_bytes'] == 2 * size
+    assert plan.deferred == entries[2:]
+
+    # Every batch has at least one file, however large
+    plan = archive.plan_download(all_entries=True, output_path=output_path,
+                                 max_bytes=1)
+    assert plan.entries == entries[:1]
+
+
+def test_plan_schedules_a_batch_per_window(archive, entries, output_path):
+    plan = archive.plan_download(all_entries=True, output_path=output_path,
+                                 max_files=2, runs=2,
+                                 windows=[(dt.time(1), dt.time(6))])
+
+    assert [batch['entries'] for batch in plan.batches] == [entries[:2],
+                                                            entries[2:4]]
+    first, second = [batch['window'] for batch in plan.batches]
+    assert first[1] <= second[0]
+    assert plan.deferred == entries[4:]
+
+
+def test_plan_leaves_out_present_files(archive, entries, output_path):
+    results = btk.ArchiveDownloader(archive)._plan_downloads(entries[:2],
+                                                             output_path)
+    manifest = _DownloadManifest(output_path)
+    for result in results:
+        with open(result['path'], 'wb') as f:
+            f.write(b'x' * 1000)
+        manifest.record(result['uri'], os.path.basename(result['path']),
+                        1000)
+
+    plan = archive.plan_download(all_entries=True, output_path=output_path)
+
+    assert plan.present == entries[:2]
+    assert plan.entries == entries[2:]
+    # Sizes are estimated at the data rate of the files already downloaded
+    assert plan.bytes_per_second == pytest.approx(2000 / (8 * 60 * 60))
+
+
+def test_plan_writes_nothing(archive, tmp_path):
+    output_path = str(tmp_path / 'new') + os.sep
+
+    plan = archive.plan_download(all_entries=True, output_path=output_path)
+
+    assert len(plan.entries) == 6
+    assert not os.path.exists(output_path)
+
+
+def test_plan_with_no_entries_selected(archive, output_path):
+    assert archive.plan_download(start=dt.datetime(2021, 1, 1),
+                                 output_path=output_path) is None
+
+
+def test_plan_order_must_be_known(archive, output_path):
+    with pytest.raises(ValueError):
+        archive.plan_download(all_entries=True, output_path=output_path,
+                              order='random')
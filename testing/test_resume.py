@@ -0,0 +1,107 @@
+import asyncio
+import datetime as dt
+import os
+
+import pytest
+
+from broadcastify_archtk import btk
+
+import mock_broadcastify
+from conftest import MP3_SIZE, make_entries
+
+
+ENTRY = make_entries(dt.date(2020, 1, 15), 1)[0]
+NAME = '1-20200115-0030.mp3'
+
+
+def sync_download(archive, output_path):
+    return archive.download(all_entries=True, output_path=output_path)
+
+
+def async_download(archive, output_path):
+    return asyncio.run(archive.download_async(all_entries=True,
+                                              output_path=output_path))
+
+
+@pytest.fixture(params=['sync', 'async'])
+def download(request, archive):
+    if request.param == 'async':
+        if btk._aiohttp is None:
+            pytest.skip('aiohttp is not installed')
+        func = async_download
+    else:
+        func = sync_download
+
+    archive.entries = btk.ArchiveEntries([ENTRY])
+    return lambda output_path: func(archive, output_path)[0]
+
+
+def bytes_received(archive):
+    return sum(counter['value']
+               for counter in archive.metrics.snapshot()['counters']
+               if counter['name'] == 'file_bytes_total')
+
+
+def write_partial(server, output_path, size):
+    with open(output_path + NAME + btk._PARTIAL_SUFFIX, 'wb') as f:
+        f.write(server.payload[:size])
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_partial_download_is_resumed(server, archive, download, output_path):
+    offset = MP3_SIZE // 3
+    write_partial(server, output_path, offset)
+
+    result = download(output_path)
+
+    assert result['status'] == 'downloaded'
+    assert read(result['path']) == server.payload
+    assert result['checksum'] == btk._hash_file(result['path'])
+    assert bytes_received(archive) == MP3_SIZE - offset
+    assert not os.path.exists(result['path'] + btk._PARTIAL_SUFFIX)
+
+
+def test_complete_partial_download_is_kept(server, archive, download,
+                                           output_path):
+    write_partial(server, output_path, MP3_SIZE)
+
+    result = download(output_path)
+
+    # The server answers 416 for a range past the end of the file
+    assert result['status'] == 'exists'
+    assert read(result['path']) == server.payload
+    assert bytes_received(archive) == 0
+    assert server.requests['mp3'] == 1
+
+
+def test_wrong_content_range_restarts_the_download(server, archive, download,
+                                                   output_path, monkeypatch):
+    send_mp3 = mock_broadcastify._Handler._send_mp3
+
+    def send_from_start(handler):
+        # Answer the first ranged request with the wrong range
+        if 'Range' in handler.headers and server.requests['mp3'] == 1:
+            payload = server.payload
+            handler.send_response(206)
+            handler.send_header('Content-Type', 'audio/mpeg')
+            handler.send_header('Content-Length', str(len(payload)))
+            handler.send_header('Content-Range', 'bytes 0-{}/{}'.format(
+                len(payload) - 1, len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+        else:
+            send_mp3(handler)
+
+    monkeypatch.setattr(mock_broadcastify._Handler, '_send_mp3',
+                        send_from_start)
+    write_partial(server, output_path, MP3_SIZE // 2)
+
+    result = download(output_path)
+
+    assert result['status'] == 'downloaded'
+    assert read(result['path']) == server.payload
+    assert server.requests['mp3'] == 2
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+import requests
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import (NavigatorException, _classify_error,
+                                     _MissingMp3Error, _ResponseError,
+                                     _RetryPolicy, _retry_after)
+
+
+def response_error(status, headers=None):
+    return _ResponseError(status, headers or {}, f'HTTP {status}')
+
+
+@pytest.mark.parametrize('error, error_type', [
+    (response_error(429), 'rate_limited'),
+    (response_error(503, {'Retry-After': '30'}), 'rate_limited'),
+    (response_error(503), 'transient'),
+    (response_error(500), 'transient'),
+    (response_error(408), 'transient'),
+    (response_error(400), 'permanent'),
+    (response_error(404), 'permanent'),
+    (ConnectionError('incomplete download'), 'transient'),
+    (TimeoutError(), 'transient'),
+    (asyncio.TimeoutError(), 'transient'),
+    (requests.ConnectionError(), 'transient'),
+    (requests.Timeout(), 'transient'),
+    (requests.exceptions.ChunkedEncodingError(), 'transient'),
+    (NavigatorException('Premium subscription required.'), 'permanent'),
+    (_MissingMp3Error('No mp3 link'), 'permanent'),
+    (OSError(28, 'No space left on device'), 'permanent'),
+])
+def test_classify_error(error, error_type):
+    assert _classify_error(error) == error_type
+
+
+def test_retry_after_header():
+    assert _retry_after({'Retry-After': '12'}) == 12
+    assert _retry_after({'Retry-After': '-5'}) == 0
+    assert _retry_after({}) is None
+    assert _retry_after(None) is None
+
+
+def failing(errors, result='ok'):
+    # A function that raises each of `errors` in turn, then returns `result`
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(None)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return func, calls
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    # A retry policy that doesn't actually wait
+    monkeypatch.setattr(btk, '_sleep', lambda seconds: None)
+    return _RetryPolicy()
+
+
+def test_transient_errors_are_retried(policy):
+    func, calls = failing([response_error(502), ConnectionError()])
+
+    assert policy.call(func) == 'ok'
+    assert len(calls) == 3
+
+
+def test_permanent_errors_are_not_retried(policy):
+    func, calls = failing([_MissingMp3Error('No mp3 link')])
+
+    with pytest.raises(_MissingMp3Error):
+        policy.call(func)
+    assert len(calls) == 1
+
+
+def test_retries_give_up_after_the_last_attempt(policy):
+    func, calls = failing([response_error(500)] * 10)
+
+    with pytest.raises(_ResponseError):
+        policy.call(func)
+    assert len(calls) == btk._RETRY_ATTEMPTS + 1
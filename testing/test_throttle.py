@@ -0,0 +1,219 @@
+import pytest
+
+from broadcastify_archtk import btk
+from broadcastify_archtk.btk import (_AIMDController, _RequestThrottle,
+                                     _ResponseError, _TokenBucket)
+
+
+def test_bucket_allows_a_burst_then_spaces_requests():
+    bucket = _TokenBucket(rate=10, burst=2)
+
+    assert bucket._reserve() == 0
+    assert bucket._reserve() == 0
+    # The third request waits for a token to accrue (0.1 s at 10 per second)
+    assert bucket._reserve() == pytest.approx(0.1, abs=0.01)
+    # ...and the fourth for the one after it
+    assert bucket._reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_bucket_refund_returns_a_token():
+    bucket = _TokenBucket(rate=0.001, burst=1)
+
+    assert bucket._reserve() == 0
+    bucket.refund()
+    assert bucket._reserve() == 0
+
+
+def test_refund_does_not_exceed_the_burst():
+    bucket = _TokenBucket(rate=0.001, burst=1)
+
+    bucket.refund()
+    bucket.refund()
+
+    assert bucket._reserve() == 0
+    assert bucket._reserve() > 0
+
+
+def test_set_rate_applies_to_the_next_request():
+    bucket = _TokenBucket(rate=0.001, burst=1)
+    bucket._reserve()
+
+    bucket.set_rate(rate=1000)
+
+    assert bucket._reserve() == pytest.approx(0.001, abs=0.001)
+
+
+@pytest.mark.parametrize('rate', [0, -1, None])
+def test_rate_must_be_positive(rate):
+    with pytest.raises(ValueError):
+        _TokenBucket(rate)
+
+
+def test_throttle_keeps_a_bucket_per_type():
+    throttle = _RequestThrottle({'page': (0.001, 1), 'file': (0.001, 1)})
+
+    throttle._bucket('page')._reserve()
+
+    # Page requests don't hold up file requests
+    assert throttle._bucket('file')._reserve() == 0
+    assert throttle._bucket('page')._reserve() > 0
+
+
+def test_unknown_type_raises():
+    with pytest.raises(ValueError):
+        _RequestThrottle().throttle('unknown')
+
+
+def test_wait_is_deprecated_and_ignored():
+    throttle = _RequestThrottle({'page': (1e6, 1)})
+
+    with pytest.warns(DeprecationWarning):
+        throttle.throttle('page', wait=60)
+
+    # It didn't wait, & doesn't change how long the next request waits
+    assert throttle._bucket('page')._reserve() < 1
+
+
+def test_share_takes_a_fraction_of_each_rate():
+    throttle = _RequestThrottle({'page': (4, 2), 'file': (1, 1)})
+    shared = throttle.share(0.25)
+
+    assert shared.rates['page'] == (1, 2)
+    assert shared.rates['file'] == (0.25, 1)
+
+
+def test_shared_requests_count_against_the_parent():
+    throttle = _RequestThrottle({'page': (0.001, 2)})
+    workers = [throttle.share(0.5), throttle.share(0.5)]
+
+    # Each worker has a token, & so does the parent, for two in all
+    workers[0].throttle('page')
+    workers[1].throttle('page')
+
+    assert throttle._bucket('page')._reserve() > 0
+
+
+def test_shared_refund_reaches_the_parent():
+    throttle = _RequestThrottle({'file': (0.001, 1)})
+    shared = throttle.share(1)
+
+    shared.throttle('file')
+    shared.refund('file')
+
+    assert throttle._bucket('file')._reserve() == 0
+    assert shared._bucket('file')._reserve() == 0
+
+
+def test_share_scales_adaptive_bounds():
+    throttle = _RequestThrottle({'page': (1, 1)},
+                                bounds={'page': (0.5, 4, 2)})
+
+    assert throttle.share(0.5).bounds['page'] == (0.25, 2, 2)
+
+
+#-----------------------------------------------------------------------------
+# _AIMDController
+#-----------------------------------------------------------------------------
+def http_error(status):
+    return _ResponseError(status, {}, f'HTTP {status}')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # A monotonic clock that only moves when told to
+    clock = [1000.0]
+    monkeypatch.setattr(btk, '_monotonic', lambda: clock[0])
+    return clock
+
+
+def test_success_adds_a_step():
+    controller = _AIMDController(1, 21)
+
+    assert controller.step == 20 / btk._AIMD_STEPS
+    assert controller.update(5) == 5 + controller.step
+
+
+@pytest.mark.parametrize('error', [http_error(429), http_error(503),
+                                   http_error(500), ConnectionError(),
+                                   TimeoutError()])
+def test_overload_multiplies_the_rate(error):
+    assert _AIMDController(1, 20).update(8, error=error) == (
+        8 * btk._AIMD_BACKOFF)
+
+
+def test_permanent_errors_leave_the_rate():
+    assert _AIMDController(1, 20).update(8, error=http_error(404)) is None
+
+
+def test_slow_responses_cut_the_rate():
+    controller = _AIMDController(1, 20, target_latency=2)
+
+    assert controller.update(10, latency=3) == 10 * btk._AIMD_LATENCY_BACKOFF
+    # Fast enough, or with no target, a response is healthy
+    assert controller.update(10, latency=1) == 10 + controller.step
+    assert _AIMDController(1, 20).update(10, latency=3) > 10
+
+
+def test_rate_stays_within_its_bounds(clock):
+    controller = _AIMDController(2, 10)
+
+    assert controller.update(10) == 10
+    assert controller.update(9.9) == 10
+    assert controller.update(3, error=http_error(429)) == 2
+    # A rate set outside the bounds is brought back into them
+    clock[0] += btk._AIMD_COOLDOWN
+    assert controller.update(50, error=http_error(429)) == 10
+
+
+def test_cuts_are_spaced_by_the_cooldown(clock):
+    controller = _AIMDController(1, 20)
+
+    assert controller.update(16, error=http_error(429)) == 8
+    # Concurrent failures from the same overload count once
+    assert controller.update(8, error=http_error(429)) is None
+    clock[0] += btk._AIMD_COOLDOWN
+    assert controller.update(8, error=http_error(429)) == 4
+
+
+@pytest.mark.parametrize('bounds', [(0, 1), (-1, 1), (2, 1)])
+def test_bounds_must_be_ordered_and_positive(bounds):
+    with pytest.raises(ValueError):
+        _AIMDController(*bounds)
+
+
+def test_reports_adapt_a_bounded_rate(clock):
+    throttle = _RequestThrottle({'file': (4, 1)})
+    throttle.set_bounds('file', 1, 5)
+
+    throttle.report('file', latency=0.1)
+    assert throttle.rates['file'][0] == 4 + 4 / btk._AIMD_STEPS
+
+    throttle.report('file', error=http_error(429))
+    assert throttle.rates['file'][0] == pytest.approx(2.1)
+
+    clock[0] += btk._AIMD_COOLDOWN
+    throttle.report('file', error=http_error(429))
+    clock[0] += btk._AIMD_COOLDOWN
+    throttle.report('file', error=http_error(429))
+    assert throttle.rates['file'][0] == 1
+
+
+def test_unbounded_rates_ignore_reports():
+    throttle = _RequestThrottle({'file': (4, 1)})
+    throttle.set_bounds('file', 1, 5)
+    throttle.set_bounds('file', None, None)
+
+    throttle.report('file', error=http_error(429))
+    throttle.report('page', latency=0.1)
+
+    assert throttle.rates['file'][0] == 4
+
+
+def test_shared_reports_adapt_the_parent(clock):
+    throttle = _RequestThrottle({'file': (4, 1)}, bounds={'file': (1, 8, None)})
+    shared = throttle.share(0.5)
+
+    shared.report('file', error=http_error(503))
+
+    assert shared.rates['file'][0] == 1
+    assert throttle.rates['file'][0] == 2